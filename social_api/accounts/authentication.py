@@ -0,0 +1,172 @@
+"""
+This module implements token authentication backed by a two-tier cache.
+
+Resolving a token normally joins `authtoken_token` to `accounts_user` on every
+authenticated request. `CachedTokenAuthentication` keeps the user's fields,
+keyed by token, in a bounded in-process LRU for `TOKEN_AUTH_LOCAL_TTL`
+seconds and in the shared Django cache for `TOKEN_AUTH_CACHE_TTL` seconds,
+and only queries the database when both miss.
+
+Each token key has a generation in the shared cache, and shared entries are
+tagged with the generation read before their row was loaded. Signals in
+`accounts.signals` replace a token's generation, and drop it from this
+process's LRU, when the token is deleted or its user is changed, deactivated
+or deleted, both at once and when the transaction commits. An entry tagged
+with an older generation is ignored, so a lookup that read the row before
+the change committed cannot leave it cached, however late it stores it.
+
+Revocation only reaches other processes through the shared tier, so it must
+be a cache that all processes actually share (e.g. Redis or Memcached). With
+a shared cache, other processes' LRUs see the change once their short local
+TTL expires. With the default `LocMemCache`, which is private to each
+process, other processes keep accepting a deleted token or a deactivated
+user for up to `TOKEN_AUTH_CACHE_TTL` seconds.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .models import User
+
+# The password hash is never cached; it stays deferred on cached users.
+CACHED_USER_FIELDS = [field.attname for field in User._meta.concrete_fields if field.attname != 'password']
+
+
+def _shared_key(key):
+    # Token keys are credentials, so the shared cache only ever sees their digest.
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def _generation_key(key):
+    return 'auth:token-generation:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def _new_generation():
+    return uuid.uuid4().hex[:12]
+
+
+class TokenCache:
+    """
+    Two-tier cache of token key to user field values, with hit counters.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = OrderedDict()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Return the cached user field values for a token key, or None.
+        """
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None and time.monotonic() - entry[0] < settings.TOKEN_AUTH_LOCAL_TTL:
+                self._local.move_to_end(key)
+                self.local_hits += 1
+                return entry[1]
+        found = cache.get_many([_shared_key(key), _generation_key(key)])
+        entry = found.get(_shared_key(key))
+        with self._lock:
+            if entry is None or entry[0] != found.get(_generation_key(key)):
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+        self._store_local(key, entry[1])
+        return entry[1]
+
+    def generation(self, key):
+        """
+        Return the current generation of a token key, starting one if there is none.
+        Read it before loading the values to pass to `set`.
+        """
+        generation = _new_generation()
+        # A fresh random generation never matches entries stored before the old one was evicted.
+        if not cache.add(_generation_key(key), generation, timeout=None):
+            generation = cache.get(_generation_key(key), generation)
+        return generation
+
+    def set(self, key, values, generation):
+        """
+        Cache the user field values of a token key, loaded while `generation` was current, in both tiers.
+        Values that an invalidation has already superseded are only stored in the shared tier, where they are ignored.
+        """
+        cache.set(_shared_key(key), (generation, values), timeout=settings.TOKEN_AUTH_CACHE_TTL)
+        if cache.get(_generation_key(key)) == generation:
+            self._store_local(key, values)
+
+    def _store_local(self, key, values):
+        with self._lock:
+            self._local[key] = (time.monotonic(), values)
+            self._local.move_to_end(key)
+            while len(self._local) > settings.TOKEN_AUTH_LOCAL_MAX_ENTRIES:
+                self._local.popitem(last=False)
+
+    def _bump(self, keys):
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+        cache.set_many({_generation_key(key): _new_generation() for key in keys}, timeout=None)
+
+    def invalidate(self, keys):
+        """
+        Replace the generations of the given token keys, and drop their local
+        entries, now and again when the current transaction commits.
+        """
+        keys = list(keys)
+        if keys:
+            self._bump(keys)
+            transaction.on_commit(lambda: self._bump(keys))
+
+    def stats(self):
+        """
+        Return this process's hit and miss counters and the hit rate.
+        """
+        with self._lock:
+            lookups = self.local_hits + self.shared_hits + self.misses
+            return {
+                'local_hits': self.local_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': (self.local_hits + self.shared_hits) / lookups if lookups else 0.0,
+                'local_entries': len(self._local),
+            }
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for TokenAuthentication that serves token lookups from `token_cache`.
+
+    The authenticated user is rebuilt from the cached field values without
+    its password hash, which stays deferred and is loaded only if accessed.
+    """
+
+    def authenticate_credentials(self, key):
+        values = token_cache.get(key)
+        if values is None:
+            generation = token_cache.generation(key)
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, [getattr(user, name) for name in CACHED_USER_FIELDS], generation)
+            return user, token
+
+        user = User.from_db('default', CACHED_USER_FIELDS, values)
+        if not user.is_active:
+            # Deactivation invalidates the entry, but stay safe against a stale one.
+            return super().authenticate_credentials(key)
+        token = Token(key=key, user=user)
+        token._state.adding = False
+        token._state.db = 'default'
+        return user, token
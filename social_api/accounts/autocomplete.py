@@ -0,0 +1,107 @@
+"""
+This module implements an in-process prefix index of the most followed accounts.
+
+Autocomplete ranks prefix matches by follower count, but the case-folded
+column indexes return matches in alphabetical order. A short prefix's range
+scan, capped at `USER_AUTOCOMPLETE_SCAN_LIMIT` rows, would therefore miss
+popular accounts that sort late. This index holds the
+`USER_AUTOCOMPLETE_INDEX_SIZE` most followed accounts, sorted by each
+case-folded column with their follower totals, so the most followed matches
+of any prefix are found with two binary searches. It is reloaded with one
+scan of the follower total index every `USER_AUTOCOMPLETE_INDEX_TTL` seconds,
+on the background thread of `social_api.background`; lookups keep using the
+previous entries until the new ones are swapped in, so only the very first
+lookup of a process waits for a load.
+
+Accounts left out had no more followers than every indexed account when it
+was loaded, so the only ranking the capped range scan can get wrong is among
+those less followed accounts. The index only supplies candidate ids; names
+and totals are always read from the database.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from social_api import background
+from .models import UserStats
+
+COLUMNS = ('username_normalized', 'email_normalized')
+EMPTY = {column: [] for column in COLUMNS}
+
+
+class PopularAccountIndex:
+    """
+    Case-folded names of the most followed accounts, sorted per column.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._loading = False
+        self._entries = None
+
+    def _load(self):
+        """
+        Return the (name, user id, followers) entries of each column, scheduling a reload once stale.
+
+        Only the first load runs in the calling thread; lookups made while it
+        runs find no popular accounts and rank the range scan alone.
+        """
+        with self._lock:
+            entries = self._entries
+            stale = self._loaded_at is None or time.monotonic() - self._loaded_at >= settings.USER_AUTOCOMPLETE_INDEX_TTL
+            reload = stale and not self._loading
+            if reload:
+                self._loading = True
+        if reload:
+            if entries is None:
+                self._reload()
+                return self._entries or EMPTY
+            background.run(self._reload)
+        return entries or EMPTY
+
+    def _reload(self):
+        """
+        Build the entries without holding the lock, then swap them in.
+        """
+        try:
+            rows = list(
+                UserStats.objects.filter(followers_count__gt=0)
+                .order_by('-followers_count')
+                .values_list('user_id', 'followers_count', *(f'user__{column}' for column in COLUMNS))
+                [:settings.USER_AUTOCOMPLETE_INDEX_SIZE]
+            )
+            entries = {
+                column: sorted((row[2 + i], row[0], row[1]) for row in rows)
+                for i, column in enumerate(COLUMNS)
+            }
+            with self._lock:
+                self._entries = entries
+                self._loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def top_matches(self, column, prefix, limit):
+        """
+        Return the ids of up to `limit` indexed accounts whose `column` starts with `prefix`, most followed first.
+        """
+        entries = self._load()[column]
+        lo = bisect_left(entries, (prefix,))
+        hi = bisect_left(entries, (prefix + '\U0010ffff',), lo)
+        best = heapq.nsmallest(limit, (entries[i] for i in range(lo, hi)), key=lambda entry: (-entry[2], entry[0]))
+        return [user_id for _, user_id, _ in best]
+
+    def clear(self):
+        """
+        Drop the loaded entries, so the next lookup reloads them.
+        """
+        with self._lock:
+            self._loaded_at = None
+            self._entries = None
+
+
+popular_accounts = PopularAccountIndex()
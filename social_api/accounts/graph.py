@@ -0,0 +1,211 @@
+"""
+This module implements an in-process index of the follow graph.
+
+For each user it keeps two adjacency lists, the ids they follow and the ids
+of their followers, as sorted arrays of 64-bit ints. Lists are loaded from
+the database the first time they are needed and evicted least recently used
+first once `FOLLOW_GRAPH_MAX_USERS` are held. Follow signals apply new and
+removed edges to loaded lists once the writing transaction commits, and every
+list is reloaded after `FOLLOW_GRAPH_TTL` seconds, which bounds how stale it
+can get from writes made by other processes.
+
+Sorted arrays make membership a binary search and intersections (mutual
+follows, followers you follow) a linear merge, so relationship questions
+that would each be a join over `accounts.Follow` are answered in memory.
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import Follow
+
+
+def contains(ids, user_id):
+    """
+    Return whether the sorted array `ids` contains `user_id`.
+    """
+    i = bisect_left(ids, user_id)
+    return i < len(ids) and ids[i] == user_id
+
+
+def intersect(a, b):
+    """
+    Return the ids present in both sorted arrays, in ascending order.
+
+    Uses a linear merge for lists of similar length and a binary search of
+    the longer list for each id of the shorter one otherwise.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    result = []
+    if not a:
+        return result
+    if len(b) > 8 * len(a):
+        lo = 0
+        for user_id in a:
+            lo = bisect_left(b, user_id, lo)
+            if lo == len(b):
+                break
+            if b[lo] == user_id:
+                result.append(user_id)
+        return result
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            result.append(a[i])
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+class FollowGraph:
+    """
+    Lazily loaded, bounded adjacency lists of the follow graph.
+
+    Public methods take and return plain user ids; the arrays never leave
+    the lock, so edges can be applied in place while other threads read.
+    """
+    # Adjacency list name -> (column filtered on, column listed).
+    DIRECTIONS = {
+        'following': ('follower_id', 'following_id'),
+        'followers': ('following_id', 'follower_id'),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lists = {direction: OrderedDict() for direction in self.DIRECTIONS}
+        # Bumped on every applied edge, so a load racing with a write is not trusted for long.
+        self._generation = 0
+
+    def _get(self, direction, user_id):
+        """
+        Return the adjacency list of `user_id`, loading it if needed. Must be called with the lock held.
+        """
+        lists = self._lists[direction]
+        entry = lists.get(user_id)
+        if entry is not None and time.monotonic() - entry[0] < settings.FOLLOW_GRAPH_TTL:
+            lists.move_to_end(user_id)
+            return entry[1]
+
+        generation = self._generation
+        self._lock.release()
+        try:
+            key, column = self.DIRECTIONS[direction]
+            ids = array('q', Follow.objects.filter(**{key: user_id}).order_by(column).values_list(column, flat=True))
+        finally:
+            self._lock.acquire()
+        # An edge applied while loading may be missing from `ids`, so keep it only until the next read.
+        loaded_at = time.monotonic() if generation == self._generation else float('-inf')
+        lists[user_id] = (loaded_at, ids)
+        lists.move_to_end(user_id)
+        while len(lists) > settings.FOLLOW_GRAPH_MAX_USERS:
+            lists.popitem(last=False)
+        return ids
+
+    def add_edge(self, follower_id, following_id):
+        """
+        Record that `follower_id` follows `following_id` in any loaded lists.
+        """
+        with self._lock:
+            self._generation += 1
+            for direction, owner, user_id in (('following', follower_id, following_id), ('followers', following_id, follower_id)):
+                entry = self._lists[direction].get(owner)
+                if entry is not None:
+                    ids = entry[1]
+                    i = bisect_left(ids, user_id)
+                    if i == len(ids) or ids[i] != user_id:
+                        ids.insert(i, user_id)
+
+    def remove_edge(self, follower_id, following_id):
+        """
+        Record that `follower_id` no longer follows `following_id` in any loaded lists.
+        """
+        with self._lock:
+            self._generation += 1
+            for direction, owner, user_id in (('following', follower_id, following_id), ('followers', following_id, follower_id)):
+                entry = self._lists[direction].get(owner)
+                if entry is not None:
+                    ids = entry[1]
+                    i = bisect_left(ids, user_id)
+                    if i < len(ids) and ids[i] == user_id:
+                        del ids[i]
+
+    def clear(self):
+        """
+        Drop every loaded list.
+        """
+        with self._lock:
+            self._generation += 1
+            for lists in self._lists.values():
+                lists.clear()
+
+    def following(self, user_id):
+        """
+        Return the ids `user_id` follows, in ascending order.
+        """
+        with self._lock:
+            return list(self._get('following', user_id))
+
+    def followers(self, user_id):
+        """
+        Return the ids of `user_id`'s followers, in ascending order.
+        """
+        with self._lock:
+            return list(self._get('followers', user_id))
+
+    def follows(self, follower_id, following_id):
+        """
+        Return whether `follower_id` follows `following_id`.
+        """
+        with self._lock:
+            return contains(self._get('following', follower_id), following_id)
+
+    def followed_ids(self, follower_id, user_ids):
+        """
+        Return the subset of `user_ids` that `follower_id` follows.
+        """
+        with self._lock:
+            ids = self._get('following', follower_id)
+            return {user_id for user_id in user_ids if contains(ids, user_id)}
+
+    def relationships(self, viewer_id, user_ids):
+        """
+        Return, for each of `user_ids`, a pair of whether the viewer follows
+        them and whether they follow the viewer.
+        """
+        with self._lock:
+            following = self._get('following', viewer_id)
+            followers = self._get('followers', viewer_id)
+            return {user_id: (contains(following, user_id), contains(followers, user_id)) for user_id in user_ids}
+
+    def mutual_follows(self, user_id):
+        """
+        Return the ids that follow `user_id` and are followed back, in ascending order.
+        """
+        with self._lock:
+            return intersect(self._get('following', user_id), self._get('followers', user_id))
+
+    def common_followers(self, user_id, other_id):
+        """
+        Return the ids that follow both users, in ascending order.
+        """
+        with self._lock:
+            return intersect(self._get('followers', user_id), self._get('followers', other_id))
+
+    def followers_you_follow(self, viewer_id, user_id):
+        """
+        Return the ids of `user_id`'s followers whom the viewer follows, in ascending order.
+        """
+        with self._lock:
+            return intersect(self._get('followers', user_id), self._get('following', viewer_id))
+
+
+graph = FollowGraph()
@@ -0,0 +1,85 @@
+"""
+This module runs password hashing on a bounded worker pool with admission control.
+
+Hashing a password is deliberately slow. Doing it on the request workers lets
+a burst of logins or registrations occupy every worker and starve all other
+endpoints. Instead, at most `PASSWORD_HASHING_WORKERS` hashes run at a time,
+at most `PASSWORD_HASHING_MAX_PENDING` requests wait for or run one, and any
+request beyond that is rejected immediately with 503 and a `Retry-After`
+header rather than queueing without bound.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingOverloaded(APIException):
+    """
+    Raised when the hashing pool's queue is full; rendered as 503 with Retry-After.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-ins in progress, please retry shortly.'
+    default_code = 'hashing_overloaded'
+
+    def __init__(self, wait, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = wait # DRF's exception handler turns this into the Retry-After header.
+
+
+class HashingPool:
+    """
+    A lazily started thread pool whose pending work is capped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self.pending = 0
+        self.rejected = 0
+
+    def run(self, fn, *args):
+        """
+        Run `fn(*args)` on the pool and return its result, or raise HashingOverloaded if the pool is full.
+        """
+        with self._lock:
+            if self.pending >= settings.PASSWORD_HASHING_MAX_PENDING:
+                self.rejected += 1
+                raise HashingOverloaded(wait=settings.PASSWORD_HASHING_RETRY_AFTER)
+            self.pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASHING_WORKERS, thread_name_prefix='password-hashing'
+                )
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+
+pool = HashingPool()
+
+
+def hash_password(raw_password):
+    """
+    Return the encoded hash of `raw_password`, computed on the pool.
+    """
+    return pool.run(make_password, raw_password)
+
+
+def verify_user_password(user, raw_password):
+    """
+    Return whether `raw_password` is the user's password, verified on the pool.
+
+    Like `User.check_password`, a hash made with outdated parameters is
+    replaced after a successful check; the new hash is computed on the pool too.
+    """
+    is_correct, must_update = pool.run(verify_password, raw_password, user.password)
+    if is_correct and must_update:
+        user.password = hash_password(raw_password)
+        user.save(update_fields=['password'])
+    return is_correct
@@ -0,0 +1,129 @@
+"""
+This module defines a management command that benchmarks login latency and
+its effect on concurrent read requests.
+"""
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from accounts.hashing import pool
+from accounts.models import User
+
+
+def percentile(samples, fraction):
+    """
+    Return the sample at `fraction` (e.g. 0.99) of the sorted samples, in milliseconds.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+
+class Command(BaseCommand):
+    """
+    Runs read requests alone, then alongside a burst of logins, through the
+    full request stack in this process, and reports p50/p99 latencies, the
+    login status codes and how many logins the hashing pool shed.
+
+    A throwaway user is created for the run and deleted afterwards. Throttles
+    are lifted during the run, since every request comes from one address.
+    """
+    help = 'Benchmark login p50/p99 and its effect on concurrent read endpoints.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200, help='Number of login requests.')
+        parser.add_argument('--login-threads', type=int, default=16, help='Concurrent login clients.')
+        parser.add_argument('--reads', type=int, default=200, help='Number of read requests per phase.')
+        parser.add_argument('--read-threads', type=int, default=4, help='Concurrent read clients.')
+        parser.add_argument('--read-path', default=None, help='Path to read (default: the post list).')
+
+    def handle(self, *args, **options):
+        password = uuid.uuid4().hex
+        user = User.objects.create_user(
+            email=f'benchmark-{uuid.uuid4().hex[:12]}@example.invalid', username=f'benchmark-{uuid.uuid4().hex[:12]}',
+            password=password,
+        )
+        token = Token.objects.create(user=user)
+        read_path = options['read_path'] or reverse('post-list')
+        unthrottled = {scope: {'capacity': 10 ** 9, 'refill_per_second': 10 ** 9} for scope in ('email', 'ip')}
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver'], LOGIN_THROTTLE_BUCKETS=unthrottled):
+                baseline = self.run_reads(read_path, token.key, options)
+                loaded, logins, statuses = self.run_mixed(read_path, token.key, user.email, password, options)
+        finally:
+            user.delete()
+
+        self.report('reads alone', baseline)
+        self.report('reads during logins', loaded)
+        self.report('logins', logins)
+        self.stdout.write('login statuses: ' + ', '.join(f'{code}: {count}' for code, count in sorted(statuses.items())))
+        self.stdout.write(f'hashing pool rejections so far: {pool.rejected}')
+
+    def report(self, label, samples):
+        self.stdout.write(
+            f'{label:>22}: n={len(samples):<5} p50={percentile(samples, 0.5):8.1f} ms  p99={percentile(samples, 0.99):8.1f} ms'
+        )
+
+    def run_threads(self, count, total, request):
+        """
+        Make `total` calls of `request(client)` across `count` threads and return their durations and results.
+        """
+        durations, results = [], []
+        lock = threading.Lock()
+        remaining = [total]
+
+        def worker():
+            client = Client()
+            try:
+                while True:
+                    with lock:
+                        if remaining[0] == 0:
+                            return
+                        remaining[0] -= 1
+                    start = time.perf_counter()
+                    result = request(client)
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        durations.append(elapsed)
+                        results.append(result)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, durations, results
+
+    def run_reads(self, path, key, options):
+        threads, durations, _ = self.run_threads(
+            options['read_threads'], options['reads'],
+            lambda client: client.get(path, HTTP_AUTHORIZATION=f'Token {key}').status_code,
+        )
+        for thread in threads:
+            thread.join()
+        return durations
+
+    def run_mixed(self, path, key, email, password, options):
+        login_url = reverse('user-login')
+        login_threads, login_durations, statuses = self.run_threads(
+            options['login_threads'], options['logins'],
+            lambda client: client.post(login_url, {'email': email, 'password': password}).status_code,
+        )
+        read_threads, read_durations, _ = self.run_threads(
+            options['read_threads'], options['reads'],
+            lambda client: client.get(path, HTTP_AUTHORIZATION=f'Token {key}').status_code,
+        )
+        for thread in login_threads + read_threads:
+            thread.join()
+        counts = {}
+        for code in statuses:
+            counts[code] = counts.get(code, 0) + 1
+        return read_durations, login_durations, counts
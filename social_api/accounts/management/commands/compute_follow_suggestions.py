@@ -0,0 +1,54 @@
+"""
+This module defines a management command that precomputes "who to follow"
+suggestions for active users.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import User, FollowSuggestion
+from accounts.suggestions import refresh_user
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the stored suggestions of every user who logged in recently,
+    walking the users in primary key order, and drops the suggestions of
+    users who have not.
+
+    Each user is recomputed in its own short transaction, so the job can run
+    alongside live traffic and be interrupted at any point.
+    """
+    help = 'Precompute the top follow suggestions of active users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--active-days', type=int, default=30,
+            help='Only users who logged in within this many days get suggestions.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of user ids read per query.'
+        )
+
+    def handle(self, *args, **options):
+        active = User.objects.filter(
+            is_active=True, last_login__gte=timezone.now() - timedelta(days=options['active_days'])
+        )
+        last_pk = 0
+        refreshed = 0
+        while True:
+            pks = list(
+                active.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', flat=True)[:options['chunk_size']]
+            )
+            if not pks:
+                break
+            last_pk = pks[-1]
+            for pk in pks:
+                refresh_user(pk)
+            refreshed += len(pks)
+
+        dropped, _ = FollowSuggestion.objects.exclude(user__in=active).delete()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {refreshed} users, dropped {dropped} stale suggestions.'))
@@ -0,0 +1,84 @@
+"""
+This module defines a management command that recomputes the denormalized
+follower, following and post totals of users.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from accounts.models import User, UserStats, Follow
+from posts.models import Post
+from social_api.caching import invalidate
+
+
+class Command(BaseCommand):
+    """
+    Recomputes `UserStats` from the Follow and Post tables, one primary key
+    range of users at a time, creating any missing stats rows.
+
+    Each chunk is checked and fixed in its own short transaction, so only the
+    drifted rows of the current chunk are ever locked.
+    """
+    help = 'Recompute drifted follower, following and post totals of users in chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of users to check per transaction.'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        actual_followers = Coalesce(Subquery(
+            Follow.objects.filter(following=OuterRef('pk')).order_by().values('following')
+            .annotate(total=Count('pk')).values('total')
+        ), 0)
+        actual_following = Coalesce(Subquery(
+            Follow.objects.filter(follower=OuterRef('pk')).order_by().values('follower')
+            .annotate(total=Count('pk')).values('total')
+        ), 0)
+        actual_posts = Coalesce(Subquery(
+            Post.objects.filter(author=OuterRef('pk')).order_by().values('author')
+            .annotate(total=Count('pk')).values('total')
+        ), 0)
+
+        last_pk = 0
+        checked = fixed = 0
+        while True:
+            pks = list(
+                User.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not pks:
+                break
+            last_pk = pks[-1]
+            checked += len(pks)
+            with transaction.atomic():
+                UserStats.objects.bulk_create([UserStats(user_id=pk) for pk in pks], ignore_conflicts=True)
+                drifted = list(
+                    UserStats.objects.filter(pk__in=pks)
+                    .annotate(
+                        actual_followers=actual_followers,
+                        actual_following=actual_following,
+                        actual_posts=actual_posts,
+                    )
+                    .exclude(
+                        followers_count=F('actual_followers'),
+                        following_count=F('actual_following'),
+                        posts_count=F('actual_posts'),
+                    )
+                    .values_list('pk', flat=True)
+                )
+                if drifted:
+                    # Recount inside the UPDATE itself so that a follow or post landing
+                    # between the check and the fix is not overwritten.
+                    fixed += UserStats.objects.filter(pk__in=drifted).update(
+                        followers_count=actual_followers,
+                        following_count=actual_following,
+                        posts_count=actual_posts,
+                    )
+                    for pk in drifted:
+                        invalidate('userstats', pk)
+
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} users, fixed {fixed}.'))
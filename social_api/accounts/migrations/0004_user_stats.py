@@ -0,0 +1,47 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_user_stats(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    UserStats = apps.get_model('accounts', 'UserStats')
+    Follow = apps.get_model('accounts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=pk) for pk in User.objects.values_list('pk', flat=True).iterator()],
+        batch_size=1000,
+    )
+    followers = Follow.objects.filter(following=OuterRef('pk')).order_by().values('following').annotate(total=Count('pk')).values('total')
+    following = Follow.objects.filter(follower=OuterRef('pk')).order_by().values('follower').annotate(total=Count('pk')).values('total')
+    posts = Post.objects.filter(author=OuterRef('pk')).order_by().values('author').annotate(total=Count('pk')).values('total')
+    UserStats.objects.update(
+        followers_count=Coalesce(Subquery(followers), 0),
+        following_count=Coalesce(Subquery(following), 0),
+        posts_count=Coalesce(Subquery(posts), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_follow_created_indexes'),
+        ('posts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('followers_count', models.PositiveIntegerField(default=0)),
+                ('following_count', models.PositiveIntegerField(default=0)),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+    ]
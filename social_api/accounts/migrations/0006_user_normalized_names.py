@@ -0,0 +1,46 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+def backfill_normalized_names(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    users = []
+    for user in User.objects.only('username', 'email').iterator(chunk_size=1000):
+        user.username_normalized = user.username.casefold()
+        user.email_normalized = user.email.casefold()
+        users.append(user)
+        if len(users) == 1000:
+            User.objects.bulk_update(users, ['username_normalized', 'email_normalized'])
+            users = []
+    User.objects.bulk_update(users, ['username_normalized', 'email_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_follow_suggestion'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_normalized',
+            field=models.CharField(default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='username_normalized',
+            field=models.CharField(default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(backfill_normalized_names, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['username_normalized'], name='user_username_norm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['email_normalized'], name='user_email_norm_idx'),
+        ),
+    ]
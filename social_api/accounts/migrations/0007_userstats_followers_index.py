@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_normalized_names'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userstats',
+            index=models.Index(fields=['-followers_count'], name='userstats_followers_idx'),
+        ),
+    ]
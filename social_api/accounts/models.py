@@ -2,27 +2,136 @@
 This module defines custom user and follow models for a Django application.
 
 The `User` model extends Django's `AbstractUser` and uses email as the unique identifier.
-It also requires the username field during user creation.
+It also requires the username field during user creation, and keeps case-folded,
+indexed copies of the username and email for prefix autocomplete.
 
 The `Follow` model represents the relationship between two users where one user
 follows another. It includes fields for the follower, the followed user,
 and the timestamp of the follow action.
+
+The `UserStats` model keeps each user's denormalized follower, following and
+post totals in a row of its own, so counter updates never lock the user row.
+
+The `FollowSuggestion` model stores precomputed "who to follow" candidates.
 """
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from social_api.caching import invalidate
 
 class User(AbstractUser):
     """
     Custom User model that uses email as the unique identifier.
     """
     email = models.EmailField(unique=True)
+    # Case-folded copies for prefix range scans, maintained by save().
+    username_normalized = models.CharField(max_length=150, default='', editable=False)
+    email_normalized = models.CharField(max_length=254, default='', editable=False)
 
     # Set email as the unique identifier for user authentication
     USERNAME_FIELD = 'email'
     # Require username field during user creation
     REQUIRED_FIELDS = ['username']
 
+    class Meta(AbstractUser.Meta):
+        """
+        Newest users first, with the id as a tie-breaker for a stable cursor.
+        """
+        ordering = ['-date_joined', '-id']
+        indexes = [
+            models.Index(fields=['date_joined', 'id'], name='user_joined_id_idx'),
+            models.Index(fields=['username_normalized'], name='user_username_norm_idx'),
+            models.Index(fields=['email_normalized'], name='user_email_norm_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Refresh the case-folded username and email, saving them too when only some fields are saved.
+        """
+        self.username_normalized = self.username.casefold()
+        self.email_normalized = self.email.casefold()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {
+                *update_fields,
+                *(f'{name}_normalized' for name in ('username', 'email') if name in update_fields),
+            }
+        super().save(*args, **kwargs)
+        self._loaded_username = self.username
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember the username as loaded, so that saves can tell a rename from other edits.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_username = instance.__dict__.get('username')
+        return instance
+
+    def username_changed(self):
+        """
+        Return whether the username differs from the one loaded or last saved.
+        A user whose username was never loaded counts as changed.
+        """
+        loaded = getattr(self, '_loaded_username', None)
+        return loaded is None or loaded != self.username
+
+
+class FollowQuerySet(models.QuerySet):
+    """
+    QuerySet for follow relationships with batch membership lookups.
+    """
+    def followed_ids(self, follower, user_ids):
+        """
+        Return the subset of `user_ids` that `follower` follows, using one query,
+        or none when `FOLLOW_GRAPH_ENABLED` and the follower's list is loaded.
+        """
+        if not user_ids or follower is None or not follower.is_authenticated:
+            return set()
+        if settings.FOLLOW_GRAPH_ENABLED:
+            from .graph import graph
+            return graph.followed_ids(follower.pk, user_ids)
+        return set(
+            self.filter(follower=follower, following_id__in=user_ids)
+            .values_list('following_id', flat=True)
+        )
+
+    def relationships(self, viewer, user_ids):
+        """
+        Return, for each of `user_ids`, a pair of whether `viewer` follows them
+        and whether they follow `viewer`, using one query for both directions,
+        or none when `FOLLOW_GRAPH_ENABLED` and the viewer's lists are loaded.
+        """
+        if not user_ids or viewer is None or not viewer.is_authenticated:
+            return {user_id: (False, False) for user_id in user_ids}
+        if settings.FOLLOW_GRAPH_ENABLED:
+            from .graph import graph
+            return graph.relationships(viewer.pk, user_ids)
+        edges = set(
+            self.filter(
+                models.Q(follower=viewer, following_id__in=user_ids) | models.Q(following=viewer, follower_id__in=user_ids)
+            ).values_list('follower_id', 'following_id')
+        )
+        return {user_id: ((viewer.pk, user_id) in edges, (user_id, viewer.pk) in edges) for user_id in user_ids}
+
+    def state_token(self, follower):
+        """
+        Return a cheap fingerprint of who `follower` follows, for use in cache validators.
+
+        The row count changes on every follow or unfollow, and the newest `created_at`
+        changes when an unfollow is followed by a new follow.
+        """
+        if follower is None or not follower.is_authenticated:
+            return ''
+        state = self.filter(follower=follower).aggregate(
+            total=models.Count('pk'), newest=models.Max('created_at')
+        )
+        return f"{state['total']}:{state['newest'].isoformat() if state['newest'] else ''}"
+
 
 class Follow(models.Model):
     """
@@ -49,6 +158,8 @@ class Follow(models.Model):
     DateTimeField that automatically records the creation time of the follow relationship.
     """
 
+    objects = FollowQuerySet.as_manager()
+
     class Meta:
         """
         Meta class to define model-level options.
@@ -56,4 +167,76 @@ class Follow(models.Model):
         unique_together = ('follower', 'following')
         """
         Ensures that a user can only follow another user once.
-        """
\ No newline at end of file
+        """
+        indexes = [
+            models.Index(fields=['following', 'created_at', 'id'], name='follow_following_created_idx'),
+            models.Index(fields=['follower', 'created_at', 'id'], name='follow_follower_created_idx'),
+        ]
+        """
+        Support the cursors over a user's followers and over the users they follow.
+        """
+
+
+class UserStatsQuerySet(models.QuerySet):
+    """
+    QuerySet for user stats with atomic counter adjustments.
+    """
+    def adjust(self, user_id, **deltas):
+        """
+        Atomically add `deltas` (e.g. `followers_count=1`) to a user's counters
+        and invalidate the user's cached representation.
+        Counters that have drifted low stop at zero instead of failing the write.
+        """
+        self.filter(user_id=user_id).update(**{name: Greatest(F(name) + delta, 0) for name, delta in deltas.items()})
+        invalidate('userstats', user_id)
+
+    def adjust_follow(self, follower_id, following_id, delta):
+        """
+        Add `delta` to the follower's following total and to the followed user's follower total.
+
+        The two rows are always updated in primary key order, so concurrent
+        follows in opposite directions cannot deadlock on each other's locks.
+        """
+        updates = sorted([(follower_id, 'following_count'), (following_id, 'followers_count')])
+        for user_id, name in updates:
+            self.adjust(user_id, **{name: delta})
+
+
+class UserStats(models.Model):
+    """
+    Denormalized totals for a user, created together with the user.
+
+    The counters are adjusted with F() updates where follows and posts are
+    created or deleted through the API; `reconcile_user_stats` repairs any
+    drift, e.g. follows removed by deleting a user.
+    """
+    user = models.OneToOneField(User, primary_key=True, related_name='stats', on_delete=models.CASCADE)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    posts_count = models.PositiveIntegerField(default=0)
+
+    objects = UserStatsQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-followers_count'], name='userstats_followers_idx'), # Serves the most followed accounts to autocomplete.
+        ]
+
+
+class FollowSuggestion(models.Model):
+    """
+    A precomputed "who to follow" candidate for a user.
+
+    `score` is the number of accounts the user follows that follow the
+    candidate. Rows are written by `accounts.suggestions`; see that module.
+    """
+    user = models.ForeignKey(User, related_name='follow_suggestions', on_delete=models.CASCADE)
+    candidate = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    score = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('user', 'candidate')
+        indexes = [
+            models.Index(fields=['user', '-score', 'candidate'], name='suggestion_user_score_idx'), # Serves a user's top suggestions in rank order.
+        ]
+
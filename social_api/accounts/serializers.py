@@ -3,20 +3,94 @@ This module defines serializers for the User model.
 
 Includes serializers for:
     - User: Serializes basic user information.
+    - UserBatch: Adds whether each user follows the viewer, for batch lookups.
     - Registration: Handles user registration with password validation.
     - Login: Handles user login with email and password.
+    - Follower/Following: Serialize the users on either side of a follow.
+    - FollowSuggestion: Serializes a suggested account to follow.
+    - UserAutocomplete: Serializes a prefix autocomplete match.
 """
 
 from rest_framework import serializers
-from .models import User
+from social_api.caching import CachedRepresentationMixin, RepresentationCache
+from social_api.fieldsets import SparseFieldsetMixin
+from social_api.serializers import ViewerContextListSerializer, get_viewer
+from .hashing import hash_password
+from .models import User, Follow, FollowSuggestion
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, CachedRepresentationMixin, serializers.ModelSerializer):
     """
-    Serializes basic user information (id, email, username).
+    Serializes basic user information (id, email, username), the user's
+    follower, following and post totals, and whether the requesting user follows this user.
+    Representations are cached per user and stats version; `following` is always recomputed.
+    The totals are read from `UserStats`, which the view selects together with the user.
     """
+    representation_cache = RepresentationCache(
+        'user', dependencies=lambda user: [('user', user.pk), ('userstats', user.pk)]
+    )
+    uncached_fields = ('following',)
+
+    followers_count = serializers.IntegerField(source='stats.followers_count', read_only=True)
+    following_count = serializers.IntegerField(source='stats.following_count', read_only=True)
+    posts_count = serializers.IntegerField(source='stats.posts_count', read_only=True)
+    following = serializers.SerializerMethodField()
+
     class Meta:
         model = User
-        fields = ['id', 'email', 'username']
+        fields = ['id', 'email', 'username', 'followers_count', 'following_count', 'posts_count', 'following']
+        list_serializer_class = ViewerContextListSerializer
+
+    def get_viewer_context(self, users):
+        """
+        Look up, with one query, which of the users the viewer follows, unless `following` was left out.
+        """
+        if 'following' not in self.fields:
+            return {}
+        return {'followed_user_ids': Follow.objects.followed_ids(get_viewer(self), [user.pk for user in users])}
+
+    def get_following(self, obj):
+        """
+        Return whether the requesting user follows this user.
+        """
+        followed = self.context.get('followed_user_ids')
+        if followed is None:
+            followed = Follow.objects.followed_ids(get_viewer(self), [obj.pk])
+        return obj.pk in followed
+
+
+class UserBatchSerializer(UserSerializer):
+    """
+    Serializes users for the batch lookup, adding whether each user follows the requesting user.
+    Both viewer-relative flags of a page are computed with one query, and neither
+    when both are left out of a sparse fieldset.
+    """
+    uncached_fields = ('following', 'followed_by')
+
+    followed_by = serializers.SerializerMethodField()
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ['followed_by']
+
+    def get_viewer_context(self, users):
+        """
+        Look up, with one query, which of the users the viewer follows and which follow the viewer.
+        """
+        if 'followed_by' not in self.fields:
+            return super().get_viewer_context(users)
+        relationships = Follow.objects.relationships(get_viewer(self), [user.pk for user in users])
+        return {
+            'followed_user_ids': {pk for pk, (following, _) in relationships.items() if following},
+            'follower_user_ids': {pk for pk, (_, followed_by) in relationships.items() if followed_by},
+        }
+
+    def get_followed_by(self, obj):
+        """
+        Return whether this user follows the requesting user.
+        """
+        followers = self.context.get('follower_user_ids')
+        if followers is None:
+            return Follow.objects.relationships(get_viewer(self), [obj.pk])[obj.pk][1]
+        return obj.pk in followers
 
 
 class RegistrationSerializer(serializers.ModelSerializer):
@@ -40,14 +114,15 @@ class RegistrationSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """
-        Creates a new user instance.
+        Creates a new user instance, hashing the password on the bounded hashing pool.
         """
         validated_data.pop('password2')
-        user = User.objects.create_user(
-            email=validated_data['email'],
-            username=validated_data['username'],
-            password=validated_data['password']
+        user = User(
+            email=User.objects.normalize_email(validated_data['email']),
+            username=User.normalize_username(validated_data['username']),
+            password=hash_password(validated_data['password'])
         )
+        user.save()
         return user
 
 
@@ -56,4 +131,57 @@ class LoginSerializer(serializers.Serializer):
     Handles user login with email and password.
     """
     email = serializers.EmailField()
-    password = serializers.CharField()
\ No newline at end of file
+    password = serializers.CharField()
+
+
+class FollowerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Serializes the follower side of a Follow, as listed by the followers endpoint.
+    """
+    id = serializers.ReadOnlyField(source='follower.id')
+    email = serializers.ReadOnlyField(source='follower.email')
+    username = serializers.ReadOnlyField(source='follower.username')
+    followed_at = serializers.DateTimeField(source='created_at', read_only=True)
+
+    class Meta:
+        model = Follow
+        fields = ['id', 'email', 'username', 'followed_at']
+
+
+class FollowingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Serializes the followed side of a Follow, as listed by the following endpoint.
+    """
+    id = serializers.ReadOnlyField(source='following.id')
+    email = serializers.ReadOnlyField(source='following.email')
+    username = serializers.ReadOnlyField(source='following.username')
+    followed_at = serializers.DateTimeField(source='created_at', read_only=True)
+
+    class Meta:
+        model = Follow
+        fields = ['id', 'email', 'username', 'followed_at']
+
+
+class FollowSuggestionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Serializes a suggested account and how many of the viewer's followees follow it.
+    """
+    id = serializers.ReadOnlyField(source='candidate.id')
+    username = serializers.ReadOnlyField(source='candidate.username')
+    followers_count = serializers.IntegerField(source='candidate.stats.followers_count', read_only=True)
+    followed_by_count = serializers.IntegerField(source='score', read_only=True)
+
+    class Meta:
+        model = FollowSuggestion
+        fields = ['id', 'username', 'followers_count', 'followed_by_count']
+
+
+class UserAutocompleteSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Serializes a user matched by the autocomplete action, with the follower total it is ranked by.
+    """
+    followers_count = serializers.IntegerField(source='stats.followers_count', read_only=True)
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'email', 'followers_count']
@@ -0,0 +1,103 @@
+"""
+This module invalidates cached user representations when a user changes,
+gives every new user a stats row, keeps the follow graph index and the
+follow suggestions current, and drops cached token lookups.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from rest_framework.authtoken.models import Token
+
+from social_api import background
+from social_api.caching import invalidate
+from . import suggestions
+from .authentication import token_cache
+from .graph import graph
+from .models import User, UserStats, Follow
+
+# Saves limited to other fields (e.g. `last_login`) leave the representation unchanged.
+SERIALIZED_FIELDS = {'email', 'username'}
+
+
+def invalidate_user(sender, instance, update_fields=None, **kwargs):
+    """
+    Invalidate the cached representation of a saved or deleted user.
+    Cached posts depend on their author's version, so they are invalidated too.
+    """
+    if update_fields is not None and not SERIALIZED_FIELDS & set(update_fields):
+        return
+    invalidate('user', instance.pk)
+
+
+post_save.connect(invalidate_user, sender=User, dispatch_uid='cache_user_saved')
+post_delete.connect(invalidate_user, sender=User, dispatch_uid='cache_user_deleted')
+
+
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    """
+    Create the stats row of a new user, so counter updates always find it.
+    """
+    if created and not raw:
+        UserStats.objects.create(user=instance)
+
+
+post_save.connect(create_user_stats, sender=User, dispatch_uid='create_user_stats')
+
+
+def follow_saved(sender, instance, created, **kwargs):
+    """
+    Add a new follow to the graph index once it is committed.
+    """
+    if created:
+        transaction.on_commit(lambda: graph.add_edge(instance.follower_id, instance.following_id))
+
+
+def follow_deleted(sender, instance, **kwargs):
+    """
+    Remove a deleted follow from the graph index once the deletion is committed.
+    """
+    transaction.on_commit(lambda: graph.remove_edge(instance.follower_id, instance.following_id))
+
+
+post_save.connect(follow_saved, sender=Follow, dispatch_uid='graph_follow_saved')
+post_delete.connect(follow_deleted, sender=Follow, dispatch_uid='graph_follow_deleted')
+
+
+def refresh_suggestions_on_follow(sender, instance, created, **kwargs):
+    """
+    Update follow suggestions for a new follow in the background once it is committed.
+    """
+    if created:
+        transaction.on_commit(lambda: background.run(suggestions.follow_added, instance.follower_id, instance.following_id))
+
+
+def refresh_suggestions_on_unfollow(sender, instance, **kwargs):
+    """
+    Update follow suggestions for a removed follow in the background once the deletion is committed.
+    """
+    transaction.on_commit(lambda: background.run(suggestions.follow_removed, instance.follower_id, instance.following_id))
+
+
+post_save.connect(refresh_suggestions_on_follow, sender=Follow, dispatch_uid='suggestions_follow_saved')
+post_delete.connect(refresh_suggestions_on_unfollow, sender=Follow, dispatch_uid='suggestions_follow_deleted')
+
+
+def invalidate_user_tokens(sender, instance, update_fields=None, **kwargs):
+    """
+    Drop the cached token lookups of a changed user, e.g. one who was deactivated.
+    Saves of `last_login` alone, as on every login, keep them.
+    """
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    token_cache.invalidate(Token.objects.filter(user_id=instance.pk).values_list('key', flat=True))
+
+
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """
+    Drop the cached lookup of a deleted token, including tokens deleted with their user.
+    """
+    token_cache.invalidate([instance.key])
+
+
+post_save.connect(invalidate_user_tokens, sender=User, dispatch_uid='token_cache_user_saved')
+post_delete.connect(invalidate_deleted_token, sender=Token, dispatch_uid='token_cache_token_deleted')
+
@@ -0,0 +1,168 @@
+"""
+This module maintains the precomputed "who to follow" suggestions.
+
+A candidate's score for a user is the number of accounts the user follows
+that follow the candidate (friends of friends); accounts the user already
+follows, and the user themself, are never candidates. The
+`compute_follow_suggestions` command stores the top `FOLLOW_SUGGESTIONS_SIZE`
+candidates of every active user, so serving them is one indexed read.
+
+Follow changes adjust the stored rows incrementally on the background thread
+of `social_api.background` once they commit, without ranking anyone:
+
+    - The follower's row for the followed account is dropped, and the
+      accounts it follows gain a point (or lose one on unfollow).
+    - The followed account gains a point (or loses one) with the follower's
+      followers who already have suggestions, since the edge made it a
+      friend of a friend for them.
+
+A candidate gaining its first stored row starts at a score of 1, so it is
+only added where the top N has room; a candidate that was ranked below the
+stored top N is undercounted until the next batch run recomputes the user.
+No user ever keeps more than `FOLLOW_SUGGESTIONS_SIZE` rows.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Follow, FollowSuggestion
+
+
+def rank_candidates(user_id, limit):
+    """
+    Return up to `limit` (candidate id, score) pairs for a user, best first, with one aggregate query.
+    """
+    followees = Follow.objects.filter(follower_id=user_id).values('following_id')
+    return list(
+        Follow.objects.filter(follower_id__in=followees)
+        .exclude(following_id__in=followees)
+        .exclude(following_id=user_id)
+        .values('following_id')
+        .annotate(score=Count('pk'))
+        .order_by('-score', 'following_id')
+        .values_list('following_id', 'score')[:limit]
+    )
+
+
+def refresh_user(user_id):
+    """
+    Recompute and replace a user's stored suggestions.
+    """
+    ranked = rank_candidates(user_id, settings.FOLLOW_SUGGESTIONS_SIZE)
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id=user_id).delete()
+        FollowSuggestion.objects.bulk_create(
+            [FollowSuggestion(user_id=user_id, candidate_id=candidate_id, score=score) for candidate_id, score in ranked]
+        )
+
+
+def _affected_followers(follower_id, following_id):
+    """
+    Return the ids of the follower's followers whose suggestions can include `following_id`:
+    those with stored suggestions who neither are nor already follow that account.
+    """
+    already_following = Follow.objects.filter(following_id=following_id).values('follower_id')
+    return list(
+        Follow.objects.filter(
+            following_id=follower_id,
+            follower_id__in=FollowSuggestion.objects.values('user_id'),
+        )
+        .exclude(follower_id=following_id)
+        .exclude(follower_id__in=already_following)
+        .values_list('follower_id', flat=True)[:settings.FOLLOW_SUGGESTIONS_FANOUT_LIMIT]
+    )
+
+
+def _trim(user_id):
+    """
+    Delete a user's suggestions beyond the top `FOLLOW_SUGGESTIONS_SIZE`.
+    """
+    overflow = list(
+        FollowSuggestion.objects.filter(user_id=user_id)
+        .order_by('-score', 'candidate_id')
+        .values_list('pk', flat=True)[settings.FOLLOW_SUGGESTIONS_SIZE:]
+    )
+    if overflow:
+        FollowSuggestion.objects.filter(pk__in=overflow).delete()
+
+
+def _users_with_room(user_ids):
+    """
+    Return the subset of `user_ids` storing fewer than `FOLLOW_SUGGESTIONS_SIZE` suggestions.
+    """
+    full = (
+        FollowSuggestion.objects.filter(user_id__in=user_ids)
+        .values('user_id')
+        .annotate(stored=Count('pk'))
+        .filter(stored__gte=settings.FOLLOW_SUGGESTIONS_SIZE)
+        .values_list('user_id', flat=True)
+    )
+    return set(user_ids) - set(full)
+
+
+def follow_added(follower_id, following_id):
+    """
+    Update suggestions after `follower_id` followed `following_id`.
+    """
+    followees = Follow.objects.filter(follower_id=follower_id).values('following_id')
+    their_followees = Follow.objects.filter(follower_id=following_id)
+    with transaction.atomic():
+        own = FollowSuggestion.objects.filter(user_id=follower_id)
+        own.filter(candidate_id=following_id).delete()
+        own.filter(candidate_id__in=their_followees.values('following_id')).update(score=F('score') + 1)
+        room = settings.FOLLOW_SUGGESTIONS_SIZE - own.count()
+        if room > 0:
+            candidates = (
+                their_followees.exclude(following_id=follower_id)
+                .exclude(following_id__in=followees)
+                .exclude(following_id__in=own.values('candidate_id'))
+                .values_list('following_id', flat=True)[:room]
+            )
+            FollowSuggestion.objects.bulk_create(
+                [FollowSuggestion(user_id=follower_id, candidate_id=candidate_id, score=1) for candidate_id in candidates],
+                ignore_conflicts=True,
+            )
+
+    user_ids = _affected_followers(follower_id, following_id)
+    if not user_ids:
+        return
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id__in=user_ids, candidate_id=following_id).update(score=F('score') + 1)
+        # Users without a row yet get one if their top N has room; the rows
+        # just incremented are left alone.
+        FollowSuggestion.objects.bulk_create(
+            [
+                FollowSuggestion(user_id=user_id, candidate_id=following_id, score=1)
+                for user_id in _users_with_room(user_ids)
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def follow_removed(follower_id, following_id):
+    """
+    Update suggestions after `follower_id` unfollowed `following_id`.
+    """
+    followees = Follow.objects.filter(follower_id=follower_id).values('following_id')
+    with transaction.atomic():
+        lost = FollowSuggestion.objects.filter(
+            user_id=follower_id,
+            candidate_id__in=Follow.objects.filter(follower_id=following_id).values('following_id'),
+        )
+        lost.filter(score__lte=1).delete()
+        lost.update(score=F('score') - 1)
+        # The unfollowed account is a candidate again, scored like the batch job would.
+        score = Follow.objects.filter(follower_id__in=followees, following_id=following_id).count()
+        if score:
+            FollowSuggestion.objects.bulk_create(
+                [FollowSuggestion(user_id=follower_id, candidate_id=following_id, score=score)], ignore_conflicts=True
+            )
+            _trim(follower_id)
+
+    user_ids = _affected_followers(follower_id, following_id)
+    if not user_ids:
+        return
+    with transaction.atomic():
+        suggestions = FollowSuggestion.objects.filter(user_id__in=user_ids, candidate_id=following_id)
+        suggestions.filter(score__lte=1).delete()
+        suggestions.update(score=F('score') - 1)
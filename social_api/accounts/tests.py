@@ -6,14 +6,33 @@ Test cases cover:
 - User registration API
 - User login API
 - Follow/unfollow functionality
+- Followers/following pages and denormalized user stats
+- Batch user lookup with relationship flags
+- Username and email prefix autocomplete
+- The in-process follow graph index
+- Follow suggestions
+- Cached token authentication
+- Sign-in throttling and the password hashing pool
 """
 
-from django.test import TestCase
+from array import array
+from io import StringIO
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
-from .models import User, Follow
+from .autocomplete import popular_accounts
+from .authentication import CACHED_USER_FIELDS, CachedTokenAuthentication, token_cache
+from .graph import graph, intersect
+from .hashing import pool
+from .models import User, Follow, UserStats, FollowSuggestion
+from posts.models import Post
 from rest_framework.authtoken.models import Token
+from social_api.caching import cache_stats
 
 
 class UserModelTest(TestCase):
@@ -146,4 +165,429 @@ class UserAPITest(APITestCase):
         # unfollow
         res = self.client.post(unfollow_url)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertFalse(Follow.objects.filter(follower=self.user, following=other).exists())
\ No newline at end of file
+        self.assertFalse(Follow.objects.filter(follower=self.user, following=other).exists())
+
+    def test_user_following_flag(self):
+        """
+        Tests that users report whether the viewer follows them.
+        """
+        other = User.objects.create(email='other@test.com', username='otheruser')
+        Follow.objects.create(follower=self.user, following=other)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.get(reverse('user-list'))
+        flags = {item['username']: item['following'] for item in response.data['results']}
+        self.assertEqual(flags, {'otheruser': True, 'testuser': False})
+
+    def test_user_representation_cache(self):
+        """
+        Tests that user retrieves are served from the cache, counted, and invalidated on change.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        url = reverse('user-detail', kwargs={'pk': self.user.pk})
+        self.client.get(url)
+        before = cache_stats()['user']
+        response = self.client.get(url)
+        after = cache_stats()['user']
+        self.assertEqual((after['hits'] - before['hits'], after['misses'] - before['misses']), (1, 0))
+        self.user.username = 'renamed'
+        self.user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.data['username'], 'renamed')
+        self.assertEqual(cache_stats()['user']['misses'] - after['misses'], 1)
+
+    def test_followers_and_following_are_paginated(self):
+        """
+        Tests that followers and following pages cost a fixed number of queries and report the stored totals.
+        """
+        others = [User.objects.create(email=f'fan{i}@test.com', username=f'fan{i}') for i in range(5)]
+        for other in others:
+            Follow.objects.create(follower=other, following=self.user)
+        Follow.objects.create(follower=self.user, following=others[0])
+        call_command('reconcile_user_stats', stdout=StringIO()) # The follows above bypassed the counters.
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        url = reverse('user-followers', kwargs={'pk': self.user.pk})
+        with self.assertNumQueries(3): # Token lookup, the user with its stats, one page of follows joined with the followers.
+            response = self.client.get(url, {'page_size': 2})
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual([f['username'] for f in response.data['results']], ['fan4', 'fan3']) # Most recent first.
+        response = self.client.get(response.data['next'])
+        self.assertEqual([f['username'] for f in response.data['results']], ['fan2', 'fan1'])
+        response = self.client.get(reverse('user-following', kwargs={'pk': self.user.pk}))
+        self.assertEqual((response.data['count'], response.data['results'][0]['username']), (1, 'fan0'))
+
+    def test_stats_follow_real_state_changes(self):
+        """
+        Tests that follow, unfollow and post create/delete adjust the totals only when something changed.
+        """
+        other = User.objects.create(email='other@test.com', username='otheruser')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        for _ in range(2): # Following twice counts once.
+            self.client.post(reverse('user-follow', kwargs={'pk': other.pk}))
+        detail = reverse('user-detail', kwargs={'pk': other.pk})
+        response = self.client.get(detail)
+        self.assertEqual((response.data['followers_count'], response.data['following_count']), (1, 0))
+        self.assertEqual(self.client.get(reverse('user-detail', kwargs={'pk': self.user.pk})).data['following_count'], 1)
+        for _ in range(2): # Unfollowing twice counts once.
+            self.client.post(reverse('user-unfollow', kwargs={'pk': other.pk}))
+        self.assertEqual(self.client.get(detail).data['followers_count'], 0)
+        post = self.client.post(reverse('post-list'), {'title': 'Title', 'content': 'Content'}).data
+        self.assertEqual(UserStats.objects.get(user=self.user).posts_count, 1)
+        self.client.delete(reverse('post-detail', kwargs={'pk': post['id']}))
+        self.assertEqual(UserStats.objects.get(user=self.user).posts_count, 0)
+
+    def test_user_list_stats_cost_no_extra_queries(self):
+        """
+        Tests that the totals of a page of users are read in the same query as the users.
+        """
+        for i in range(5):
+            User.objects.create(email=f'user{i}@test.com', username=f'user{i}')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        cache.clear() # Measures a cold representation cache.
+        with self.assertNumQueries(4): # Token lookup, page ids, users with their stats, viewer's follows.
+            response = self.client.get(reverse('user-list'))
+        self.assertTrue(all(item['posts_count'] == 0 for item in response.data['results']))
+
+    def test_user_batch_lookup(self):
+        """
+        Tests that the batch lookup returns the requested users in order, with
+        both follow flags, in one query for the users and one for the flags.
+        """
+        others = [User.objects.create(email=f'user{i}@test.com', username=f'user{i}') for i in range(3)]
+        Follow.objects.create(follower=self.user, following=others[0])
+        Follow.objects.create(follower=others[1], following=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        ids = [others[2].pk, others[0].pk, 9999, others[1].pk, others[0].pk]
+        cache.clear() # Measures a cold representation cache.
+        with self.assertNumQueries(3): # Token lookup, users with their stats, follows in both directions.
+            response = self.client.get(reverse('user-batch'), {'ids': ','.join(map(str, ids))})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item['id'], item['following'], item['followed_by']) for item in response.data],
+            [(others[2].pk, False, False), (others[0].pk, True, False), (others[1].pk, False, True)],
+        )
+        with self.assertNumQueries(1): # Users only; the flags were left out.
+            self.client.get(reverse('user-batch'), {'ids': others[0].pk, 'fields': 'id,username'})
+
+    def test_user_batch_lookup_rejects_bad_ids(self):
+        """
+        Tests that malformed, out of range or too many ids are rejected.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.get(reverse('user-batch'), {'ids': '1,two'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('user-batch'), {'ids': '1,99999999999999999999'}) # Beyond a 64-bit id.
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.settings(USER_BATCH_MAX_IDS=2):
+            response = self.client.get(reverse('user-batch'), {'ids': '1,2,3'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_autocomplete(self):
+        """
+        Tests that autocomplete matches a case-insensitive prefix, most followed first, in one query.
+        """
+        alice = User.objects.create(email='Alice@test.com', username='Alice')
+        User.objects.create(email='alina@test.com', username='alina')
+        User.objects.create(email='bob@test.com', username='bob')
+        alex = User.objects.create(email='zed@test.com', username='aLex')
+        UserStats.objects.filter(user=alex).update(followers_count=5)
+        UserStats.objects.filter(user=alice).update(followers_count=2)
+        popular_accounts.clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.client.get(reverse('user-autocomplete'), {'q': 'a'}) # Caches the token lookup and loads the popular accounts.
+        with self.assertNumQueries(1): # Prefix range scan joined to the stats; the popular matches are all in it.
+            response = self.client.get(reverse('user-autocomplete'), {'q': 'AL'})
+        self.assertEqual([item['username'] for item in response.data], ['aLex', 'Alice', 'alina'])
+        response = self.client.get(reverse('user-autocomplete'), {'q': 'ali', 'limit': 1})
+        self.assertEqual([item['username'] for item in response.data], ['Alice'])
+        response = self.client.get(reverse('user-autocomplete'), {'q': 'ZED', 'field': 'email'})
+        self.assertEqual([item['id'] for item in response.data], [alex.pk])
+        self.assertEqual(self.client.get(reverse('user-autocomplete'), {'q': ''}).data, [])
+
+    def test_autocomplete_ranks_matches_beyond_scan_limit(self):
+        """
+        Tests that a popular account comes first even when more than USER_AUTOCOMPLETE_SCAN_LIMIT matches sort before it.
+        """
+        for i in range(settings.USER_AUTOCOMPLETE_SCAN_LIMIT):
+            User.objects.create(email=f'aa{i:03d}@test.com', username=f'aa{i:03d}')
+        popular = User.objects.create(email='azz@test.com', username='azz')
+        UserStats.objects.filter(user=popular).update(followers_count=50)
+        popular_accounts.clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.get(reverse('user-autocomplete'), {'q': 'a', 'limit': 2})
+        self.assertEqual([item['username'] for item in response.data], ['azz', 'aa000'])
+        popular.username = 'bzz'
+        popular.save() # Renamed after the index was loaded.
+        response = self.client.get(reverse('user-autocomplete'), {'q': 'a', 'limit': 2})
+        self.assertEqual([item['username'] for item in response.data], ['aa000', 'aa001'])
+
+    def test_autocomplete_index_serves_old_entries_while_reloading(self):
+        """
+        Tests that a stale popular account index keeps answering, without queries, while another thread reloads it.
+        """
+        popular = User.objects.create(email='azz@test.com', username='azz')
+        UserStats.objects.filter(user=popular).update(followers_count=50)
+        popular_accounts.clear()
+        popular_accounts.top_matches('username_normalized', 'a', 1) # Loads the index.
+        popular_accounts._loading = True # As if a reload were running.
+        try:
+            with override_settings(USER_AUTOCOMPLETE_INDEX_TTL=0), self.assertNumQueries(0):
+                self.assertEqual(popular_accounts.top_matches('username_normalized', 'a', 1), [popular.pk])
+        finally:
+            popular_accounts._loading = False
+
+    def test_normalized_names_follow_renames(self):
+        """
+        Tests that saving a renamed user, even with update_fields, refreshes its case-folded copies.
+        """
+        self.user.username = 'Renamed'
+        self.user.save(update_fields=['username'])
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.username_normalized, self.user.email_normalized), ('renamed', 'test@test.com'))
+
+    def test_reconcile_user_stats(self):
+        """
+        Tests that the reconcile command repairs drifted totals and creates missing stats rows.
+        """
+        other = User.objects.create(email='other@test.com', username='otheruser')
+        Follow.objects.create(follower=self.user, following=other)
+        Post.objects.create(author=other, title='Title', content='Content')
+        UserStats.objects.filter(user=self.user).delete()
+        out = StringIO()
+        call_command('reconcile_user_stats', chunk_size=1, stdout=out)
+        self.assertIn('fixed 2', out.getvalue())
+        self.assertEqual(
+            list(UserStats.objects.order_by('user_id').values_list('followers_count', 'following_count', 'posts_count')),
+            [(0, 1, 0), (1, 0, 1)],
+        )
+
+class FollowGraphTest(TestCase):
+    """
+    Test cases for the in-process follow graph index.
+    """
+
+    def setUp(self):
+        """
+        Creates four users, where a and b follow each other and both follow c, and empties the index.
+        """
+        self.a, self.b, self.c, self.d = [
+            User.objects.create(email=f'{name}@test.com', username=name) for name in 'abcd'
+        ]
+        for follower, following in [(self.a, self.b), (self.b, self.a), (self.a, self.c), (self.b, self.c)]:
+            Follow.objects.create(follower=follower, following=following)
+        graph.clear() # The index is per process and outlives each test's transaction.
+        self.addCleanup(graph.clear)
+
+    def test_intersect(self):
+        """
+        Tests that both intersection strategies agree.
+        """
+        self.assertEqual(intersect(array('q', [1, 3, 5, 7]), array('q', [2, 3, 7, 9])), [3, 7])
+        self.assertEqual(intersect(array('q', [4, 50]), array('q', range(100))), [4, 50]) # Lopsided sizes use binary search.
+        self.assertEqual(intersect(array('q'), array('q', [1])), [])
+
+    def test_lists_load_once(self):
+        """
+        Tests that each adjacency list is read from the database once and then answered in memory.
+        """
+        with self.assertNumQueries(2): # a's following and followers lists.
+            relations = graph.relationships(self.a.pk, [self.b.pk, self.c.pk, self.d.pk])
+        self.assertEqual(relations, {self.b.pk: (True, True), self.c.pk: (True, False), self.d.pk: (False, False)})
+        with self.assertNumQueries(0):
+            self.assertEqual(graph.mutual_follows(self.a.pk), [self.b.pk])
+            self.assertTrue(graph.follows(self.a.pk, self.c.pk))
+
+    def test_common_followers_and_followers_you_follow(self):
+        """
+        Tests the intersection queries over two users' lists.
+        """
+        self.assertEqual(graph.common_followers(self.b.pk, self.c.pk), [self.a.pk])
+        self.assertEqual(graph.followers_you_follow(self.a.pk, self.c.pk), [self.b.pk])
+
+    def test_signals_keep_loaded_lists_current(self):
+        """
+        Tests that committed follows and unfollows are applied to loaded lists.
+        """
+        self.assertEqual(graph.following(self.d.pk), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.d, following=self.c)
+            Follow.objects.filter(follower=self.a, following=self.c).delete()
+        with self.assertNumQueries(1): # Only c's followers list is new.
+            self.assertEqual(graph.following(self.d.pk), [self.c.pk])
+            self.assertEqual(graph.followers(self.c.pk), [self.b.pk, self.d.pk])
+
+    @override_settings(FOLLOW_GRAPH_ENABLED=True)
+    def test_followed_ids_uses_graph(self):
+        """
+        Tests that batch following lookups are served by the index when it is enabled.
+        """
+        Follow.objects.followed_ids(self.a, [self.b.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(Follow.objects.followed_ids(self.a, [self.b.pk, self.c.pk, self.d.pk]), {self.b.pk, self.c.pk})
+
+class FollowSuggestionTest(APITestCase):
+    """
+    Test cases for the precomputed "who to follow" suggestions.
+    """
+
+    def setUp(self):
+        """
+        Creates a viewer who follows b and c, where b and c both follow d, c follows e and b follows the viewer.
+        """
+        self.viewer = User.objects.create(email='viewer@test.com', username='viewer', last_login=timezone.now())
+        self.b, self.c, self.d, self.e = [User.objects.create(email=f'{name}@test.com', username=name) for name in 'bcde']
+        for follower, following in [
+            (self.viewer, self.b), (self.viewer, self.c), (self.b, self.d), (self.c, self.d), (self.c, self.e), (self.b, self.viewer),
+        ]:
+            Follow.objects.create(follower=follower, following=following)
+        call_command('compute_follow_suggestions', stdout=StringIO())
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.viewer).key}')
+        self.url = reverse('user-suggestions')
+
+    def test_suggestions_are_one_read(self):
+        """
+        Tests that suggestions are ranked by followees who follow them, exclude followed accounts and cost one query.
+        """
+        with self.assertNumQueries(2): # Token lookup, the stored suggestions joined with the candidates.
+            response = self.client.get(self.url)
+        self.assertEqual([(s['username'], s['followed_by_count']) for s in response.data], [('d', 2), ('e', 1)])
+        self.assertEqual(FollowSuggestion.objects.exclude(user=self.viewer).count(), 0) # Inactive users get none.
+
+    def test_follow_changes_refresh_suggestions(self):
+        """
+        Tests that following a suggestion removes it and that a followee's new follow reaches the viewer.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('user-follow', kwargs={'pk': self.d.pk}))
+        self.assertEqual([s['username'] for s in self.client.get(self.url).data], ['e'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.b, following=self.e) # A followee follows e too.
+        self.assertEqual(self.client.get(self.url).data[0]['followed_by_count'], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.filter(follower=self.c, following=self.e).delete()
+            Follow.objects.filter(follower=self.b, following=self.e).delete()
+        self.assertEqual(self.client.get(self.url).data, [])
+
+    @override_settings(FOLLOW_SUGGESTIONS_SIZE=2)
+    def test_follow_changes_keep_top_n(self):
+        """
+        Tests that follow changes adjust the stored rows incrementally and never store more than the top N.
+        """
+        f, g = [User.objects.create(email=f'{name}@test.com', username=name) for name in 'fg']
+        Follow.objects.create(follower=f, following=g)
+        Follow.objects.create(follower=f, following=self.c)
+        FollowSuggestion.objects.bulk_create([FollowSuggestion(user=self.b, candidate=candidate, score=1) for candidate in (self.c, self.e)]) # b's top 2 is full.
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.viewer, following=f) # g and f would enter full top 2s at 1.
+        stored = lambda user: list(FollowSuggestion.objects.filter(user=user).order_by('-score', 'candidate_id').values_list('candidate__username', 'score'))
+        self.assertEqual(stored(self.viewer), [('d', 2), ('e', 1)])
+        self.assertEqual(stored(self.b), [('c', 1), ('e', 1)])
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.filter(follower=self.viewer, following=self.c).delete()
+        self.assertEqual(stored(self.viewer), [('c', 1), ('d', 1)]) # c is a candidate again through f; e is gone.
+
+class CachedTokenAuthenticationTest(APITestCase):
+    """
+    Test cases for the cached token authentication.
+    """
+
+    def setUp(self):
+        """
+        Creates a user with a token and authenticates the client with it.
+        """
+        self.user = User.objects.create(email='test@test.com', username='testuser')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = reverse('user-detail', kwargs={'pk': self.user.pk})
+
+    def test_token_lookups_are_cached(self):
+        """
+        Tests that repeated requests resolve the token from the local tier, then from the shared tier.
+        """
+        self.client.get(self.url)
+        before = token_cache.stats()
+        with self.assertNumQueries(0):
+            CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        with override_settings(TOKEN_AUTH_LOCAL_TTL=0): # Local entries expire at once, so the shared tier answers.
+            user, _ = CachedTokenAuthentication().authenticate_credentials(self.token.key)
+            CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        after = token_cache.stats()
+        self.assertEqual((after['local_hits'] - before['local_hits'], after['shared_hits'] - before['shared_hits']), (1, 2))
+        self.assertEqual((user.pk, user.username), (self.user.pk, 'testuser'))
+        self.assertIn('password', user.get_deferred_fields()) # The password hash is never cached.
+
+    def test_deactivation_and_token_deletion_invalidate(self):
+        """
+        Tests that a deactivated user or a deleted token stops authenticating at once.
+        """
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        self.token.delete()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_lookup_racing_a_deactivation_is_not_cached(self):
+        """
+        Tests that a lookup which read the user before a deactivation committed cannot cache it after the commit.
+        """
+        generation = token_cache.generation(self.token.key) # A request starts its lookup...
+        values = [getattr(self.user, name) for name in CACHED_USER_FIELDS] # ...and reads the still active user.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        token_cache.set(self.token.key, values, generation) # The lookup stores its result after the commit.
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+class SignInAdmissionTest(APITestCase):
+    """
+    Test cases for sign-in throttling and the bounded password hashing pool.
+    """
+
+    def setUp(self):
+        """
+        Creates a user and empties the throttle buckets.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(email='test@test.com', username='testuser', password='testpass123')
+        self.url = reverse('user-login')
+
+    def test_email_bucket_rejects_before_hashing(self):
+        """
+        Tests that repeated attempts on one email are refused with 429 once its bucket is empty.
+        """
+        for _ in range(5):
+            response = self.client.post(self.url, {'email': 'test@test.com', 'password': 'wrong'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        before = pool.pending, pool.rejected
+        response = self.client.post(self.url, {'email': 'TEST@test.com', 'password': 'testpass123'}) # Emails are case-folded.
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual((pool.pending, pool.rejected), before) # The hasher was never asked.
+        response = self.client.post(self.url, {'email': 'other@test.com', 'password': 'wrong'}) # Other emails are unaffected.
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(PASSWORD_HASHING_MAX_PENDING=0)
+    def test_full_pool_sheds_load(self):
+        """
+        Tests that sign-ins are refused with 503 and Retry-After when the hashing pool is full.
+        """
+        response = self.client.post(self.url, {'email': 'test@test.com', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_login_and_register_hash_on_pool(self):
+        """
+        Tests that login verifies and registration hashes passwords through the pool.
+        """
+        response = self.client.post(self.url, {'email': 'test@test.com', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(reverse('user-register'), {
+            'email': 'new@test.com', 'username': 'newuser', 'password': 'newpass123', 'password2': 'newpass123',
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(User.objects.get(email='new@test.com').check_password('newpass123'))
+
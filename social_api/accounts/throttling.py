@@ -0,0 +1,74 @@
+"""
+This module defines token-bucket throttles for the login and registration endpoints.
+
+Throttles run before the view, so rejected attempts never reach the password
+hasher. Each identity (an email address or a client IP) owns a bucket of
+`capacity` tokens that refills at `refill_per_second`; every attempt takes a
+token and is refused with 429 and `Retry-After` when the bucket is empty.
+Buckets live in the Django cache, so all processes sharing the cache share
+them; concurrent attempts may occasionally both spend the last token.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base class for cache-backed token-bucket throttles.
+
+    Subclasses set `scope`, a key of the `LOGIN_THROTTLE_BUCKETS` setting, and
+    implement `get_identity(request)`, returning None to skip throttling.
+    """
+    scope = None
+
+    def get_identity(self, request):
+        raise NotImplementedError('.get_identity() must be overridden')
+
+    def allow_request(self, request, view):
+        identity = self.get_identity(request)
+        if identity is None:
+            return True
+        bucket = settings.LOGIN_THROTTLE_BUCKETS[self.scope]
+        capacity, refill = bucket['capacity'], bucket['refill_per_second']
+        # Identities are client input, so only their digest goes into the cache key.
+        key = f'throttle:bucket:{self.scope}:' + hashlib.sha256(identity.encode()).hexdigest()
+
+        now = time.time()
+        tokens, updated_at = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill)
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) / refill
+            return False
+        # A full bucket is implied once the idle time would have refilled it.
+        cache.set(key, (tokens - 1, now), timeout=int(capacity / refill) + 1)
+        return True
+
+    def wait(self):
+        return getattr(self, 'wait_seconds', None)
+
+
+class LoginEmailThrottle(TokenBucketThrottle):
+    """
+    Limits attempts against a single email address, whichever client makes them.
+    """
+    scope = 'email'
+
+    def get_identity(self, request):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email:
+            return None
+        return email.strip().lower()
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    """
+    Limits attempts from a single client address, whichever emails it tries.
+    """
+    scope = 'ip'
+
+    def get_identity(self, request):
+        return self.get_ident(request)
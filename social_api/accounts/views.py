@@ -8,23 +8,44 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
+from django.contrib.auth.models import update_last_login
+from django.db import transaction
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.conf import settings
 
-from .models import User, Follow
+from .models import User, Follow, UserStats, FollowSuggestion
 from .serializers import (
     UserSerializer,
+    UserBatchSerializer,
     RegistrationSerializer,
-    LoginSerializer
+    LoginSerializer,
+    FollowerSerializer,
+    FollowingSerializer,
+    FollowSuggestionSerializer,
+    UserAutocompleteSerializer
 )
+from .autocomplete import popular_accounts
+from .hashing import verify_user_password
 from .permissions import IsAuthenticatedUser
+from .throttling import LoginEmailThrottle, LoginIPThrottle
+from notifications import events
+from social_api.caching import CachedRepresentationViewMixin
+from social_api.fieldsets import get_field_selection
+from social_api.pagination import CreatedAtCursorPagination, DateJoinedCursorPagination
 
+# UserSerializer fields read from the user's stats row.
+STATS_FIELDS = ('followers_count', 'following_count', 'posts_count')
 
-class UserViewSet(viewsets.ModelViewSet):
+
+class UserViewSet(CachedRepresentationViewMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing users, including registration, login, follow/unfollow actions.
+    List and retrieve serve cached representations and only load cache misses in full.
     """
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    cache_page_fields = ('id', 'date_joined')
+    pagination_class = DateJoinedCursorPagination
     permission_classes_by_action = {
         'register': [AllowAny],
         'login': [AllowAny],
@@ -40,6 +61,15 @@ class UserViewSet(viewsets.ModelViewSet):
         except KeyError:
             return [permission() for permission in self.permission_classes_by_action['default']]
 
+    def get_queryset(self):
+        """
+        Select each user's stats row along with the user when the totals are needed.
+        """
+        fields = get_field_selection(self.request)
+        if self.action in ('followers', 'following') or any(name in fields for name in STATS_FIELDS):
+            return self.queryset.select_related('stats')
+        return self.queryset.all()
+
     def get_serializer_class(self):
         """
         Determines the appropriate serializer class based on the action being performed.
@@ -48,9 +78,11 @@ class UserViewSet(viewsets.ModelViewSet):
             return RegistrationSerializer
         elif self.action == 'login':
             return LoginSerializer
+        elif self.action == 'batch':
+            return UserBatchSerializer
         return UserSerializer
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[LoginIPThrottle, LoginEmailThrottle])
     def login(self, request):
         """
         Logs in a user and returns an authentication token upon successful credentials.
@@ -66,6 +98,8 @@ class UserViewSet(viewsets.ModelViewSet):
                 - username: Username of the user.
             - On failure (400 Bad Request):
                 - error: Description of the error (e.g., Invalid credentials).
+            - When throttled (429) or when the hashing pool is full (503):
+                - detail: Description of the error; retry after the Retry-After header.
         """
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
@@ -75,8 +109,9 @@ class UserViewSet(viewsets.ModelViewSet):
                 user = User.objects.get(email=email)
             except User.DoesNotExist:
                 return Response({'error': 'User with this email does not exist'}, status=status.HTTP_404_NOT_FOUND)
-            if user.check_password(password):
+            if verify_user_password(user, password):
                 token, created = Token.objects.get_or_create(user=user)
+                update_last_login(None, user) # Marks the user active for batch jobs such as follow suggestions.
                 return Response({
                     'token': token.key,
                     'user_id': user.id,
@@ -86,7 +121,7 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Invalid credentials'}, status=status.HTTP_400_BAD_REQUEST)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[LoginIPThrottle, LoginEmailThrottle])
     def register(self, request):
         """
         Registers a new user and returns an authentication token upon successful registration.
@@ -102,6 +137,8 @@ class UserViewSet(viewsets.ModelViewSet):
                 - username: Username of the user.
             - On failure (400 Bad Request):
                 - Details of the validation errors encountered during registration.
+            - When throttled (429) or when the hashing pool is full (503):
+                - detail: Description of the error; retry after the Retry-After header.
         """
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
@@ -118,7 +155,7 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def follow(self, request, pk=None):
         """
-        Allows a logged-in user to follow another user.
+        Allows a logged-in user to follow another user, who is notified of a new follow.
 
         **Request:** (Requires authentication and valid user permissions)
 
@@ -132,7 +169,11 @@ class UserViewSet(viewsets.ModelViewSet):
         if request.user == user_to_follow:
             return Response({'error': 'Cannot follow yourself'}, status=status.HTTP_400_BAD_REQUEST)
 
-        Follow.objects.get_or_create(follower=request.user, following=user_to_follow)
+        with transaction.atomic():
+            follow, created = Follow.objects.get_or_create(follower=request.user, following=user_to_follow)
+            if created:
+                UserStats.objects.adjust_follow(request.user.pk, user_to_follow.pk, 1)
+                events.emit('follow', recipient_id=user_to_follow.pk, actor_id=request.user.pk)
         return Response({'status': 'followed'}, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'])
@@ -147,26 +188,148 @@ class UserViewSet(viewsets.ModelViewSet):
                 - status: 'unfollowed' indicating successful unfollow action.
         """
         user_to_unfollow = self.get_object()
-        Follow.objects.filter(follower=request.user, following=user_to_unfollow).delete()
+        with transaction.atomic():
+            deleted, _ = Follow.objects.filter(follower=request.user, following=user_to_unfollow).delete()
+            if deleted:
+                UserStats.objects.adjust_follow(request.user.pk, user_to_unfollow.pk, -deleted)
         return Response({'status': 'unfollowed'}, status=status.HTTP_200_OK)
 
-    @action(detail=True, methods=['get'])
+    @action(detail=True, methods=['get'], pagination_class=CreatedAtCursorPagination)
     def followers(self, request, pk=None):
         """
-        Retrieves the list of users who follow this user (specified by pk),
-        along with the total count of followers.
+        Retrieves the users who follow this user (specified by pk), most recent first,
+        cursor-paginated on the follow time, along with the total count of followers.
+
+        Each page is one indexed query joining the followers; the total is read
+        from the user's stats row rather than counted.
+        """
+        user = self.get_object()
+        follows = Follow.objects.filter(following=user).select_related('follower').only(
+            'created_at', 'follower__email', 'follower__username'
+        )
+        return self.follow_page(follows, FollowerSerializer, user.stats.followers_count)
+
+    @action(detail=True, methods=['get'], pagination_class=CreatedAtCursorPagination)
+    def following(self, request, pk=None):
+        """
+        Retrieves the users this user (specified by pk) follows, most recent first,
+        cursor-paginated on the follow time, along with the total count.
         """
         user = self.get_object()
-        followers_qs = user.followers.all()
-        followers_data = [
-            {
-                'id': follow.follower.id,
-                'email': follow.follower.email,
-                'username': follow.follower.username
-            }
-            for follow in followers_qs
-        ]
-        return Response({
-            'count': followers_qs.count(),
-            'followers': followers_data
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        follows = Follow.objects.filter(follower=user).select_related('following').only(
+            'created_at', 'following__email', 'following__username'
+        )
+        return self.follow_page(follows, FollowingSerializer, user.stats.following_count)
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """
+        Returns the users with the given ids, in the order requested, so that
+        clients can hydrate many user ids in one round trip.
+
+        **Query parameters:**
+            - ids: Comma-separated user ids, at most USER_BATCH_MAX_IDS of them.
+
+        **Response:**
+            - On success (200 OK): The users found, each with the `following` and
+              `followed_by` flags relative to the requesting user. Unknown ids are skipped.
+            - On failure (400 Bad Request):
+                - error: Description of the error (e.g., too many ids).
+
+        The users, with their stats, are one query and the two flags one more.
+        """
+        try:
+            ids = list(dict.fromkeys(
+                int(value) for value in ','.join(request.query_params.getlist('ids')).split(',') if value.strip()
+            ))
+            if any(not -2**63 <= pk < 2**63 for pk in ids):
+                raise ValueError('id out of the 64-bit range')
+        except ValueError:
+            return Response({'error': 'ids must be comma-separated integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > settings.USER_BATCH_MAX_IDS:
+            return Response(
+                {'error': f'At most {settings.USER_BATCH_MAX_IDS} ids can be requested at once.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        users = self.get_queryset().in_bulk(ids) if ids else {}
+        serializer = self.get_serializer([users[pk] for pk in ids if pk in users], many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Returns the users whose username (or email) starts with a prefix,
+        ignoring case, most followed first, for mention and recipient pickers.
+
+        **Query parameters:**
+            - q: The prefix typed so far.
+            - field: `username` (default) or `email`.
+            - limit: Number of users to return (default and maximum USER_AUTOCOMPLETE_SIZE).
+
+        Candidates are the most followed matches from the in-process index of
+        popular accounts (see `accounts.autocomplete`) and a range scan of the
+        case-folded column's index, capped at USER_AUTOCOMPLETE_SCAN_LIMIT rows.
+        Both are read joined to the stats for ranking, so the cost does not
+        grow with the number of users or of matches.
+        """
+        field = request.query_params.get('field', 'username')
+        if field not in ('username', 'email'):
+            return Response({'error': 'field must be username or email.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', settings.USER_AUTOCOMPLETE_SIZE)), settings.USER_AUTOCOMPLETE_SIZE)
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        prefix = request.query_params.get('q', '').strip().casefold()
+        if not prefix:
+            return Response([])
+
+        column = f'{field}_normalized'
+        limit = max(limit, 0)
+        # Every string with the prefix sorts between the prefix and the prefix followed by the highest code point.
+        candidates = (
+            User.objects.filter(**{f'{column}__gte': prefix, f'{column}__lt': prefix + '\U0010ffff'})
+            .select_related('stats')
+            .only('username', 'email', column, 'stats__followers_count')
+        )
+        matches = {user.pk: user for user in candidates.order_by(column)[:settings.USER_AUTOCOMPLETE_SCAN_LIMIT]}
+        popular = [pk for pk in popular_accounts.top_matches(column, prefix, limit) if pk not in matches]
+        if popular:
+            # Re-checked against the prefix, since the index may predate a rename.
+            matches.update(candidates.in_bulk(popular))
+        ranked = sorted(matches.values(), key=lambda user: (-user.stats.followers_count, getattr(user, column)))
+        serializer = UserAutocompleteSerializer(ranked[:limit], many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def suggestions(self, request):
+        """
+        Returns accounts the logged-in user may want to follow, ranked by how
+        many of the accounts they follow already follow each one.
+
+        **Query parameters:**
+            - limit: Number of suggestions to return (default and maximum FOLLOW_SUGGESTIONS_SIZE).
+
+        Suggestions are precomputed (see `accounts.suggestions`), so this is one
+        indexed read of the user's stored suggestions.
+        """
+        try:
+            limit = min(int(request.query_params.get('limit', settings.FOLLOW_SUGGESTIONS_SIZE)), settings.FOLLOW_SUGGESTIONS_SIZE)
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        suggestions = (
+            FollowSuggestion.objects.filter(user=request.user)
+            .select_related('candidate__stats')
+            .order_by('-score', 'candidate')[:max(limit, 0)]
+        )
+        serializer = FollowSuggestionSerializer(suggestions, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    def follow_page(self, follows, serializer_class, count):
+        """
+        Return one cursor page of `follows` serialized with `serializer_class`, with the total `count`.
+        """
+        page = self.paginate_queryset(follows)
+        serializer = serializer_class(page, many=True, context=self.get_serializer_context())
+        response = self.get_paginated_response(serializer.data)
+        response.data = {'count': count, **response.data}
+        return response
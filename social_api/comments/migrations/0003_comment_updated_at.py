@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    """
+    Start existing rows' modification time at their creation time.
+    """
+    Comment = apps.get_model('comments', 'Comment')
+    Comment.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0002_pagination_ordering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
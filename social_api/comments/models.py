@@ -1,5 +1,9 @@
 """
 This module defines the Comment model.
+
+Comments form threads: a reply points at its parent and stores a materialized
+`path`, its ancestors' ids and its own as zero-padded segments, so a whole
+subtree is one range scan of the path index, in depth-first order.
 """
 from django.db import models
 from django.conf import settings
@@ -12,4 +16,43 @@ class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments') # Foreign key to the Post model. When a post is deleted, all associated comments are also deleted.
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE) # Foreign key to the User model (defined in settings). When a user is deleted, their comments are also deleted.
     text = models.TextField() # The text content of the comment.
-    created_at = models.DateTimeField(auto_now_add=True) # Automatically sets the creation timestamp when the comment is created.
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True) # Automatically sets the creation timestamp when the comment is created.
+    updated_at = models.DateTimeField(auto_now=True) # Automatically updated on every save; drives conditional GETs.
+    parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies') # The comment this one replies to, or None for a root comment. Deleting a comment deletes its replies.
+    path = models.CharField(max_length=255, default='', editable=False) # Materialized path, e.g. '0000000007/0000000012/'; set by save().
+    reply_count = models.PositiveIntegerField(default=0) # Number of direct replies, kept in step on create and delete with F() updates.
+
+    class Meta:
+        ordering = ['-created_at', '-id'] # Newest first, with the id as a tie-breaker for a stable cursor.
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='comment_created_id_idx'), # Supports the cursor over all comments.
+            models.Index(fields=['post', 'created_at', 'id'], name='comment_post_created_id_idx'), # Supports the cursor over a single post's comments.
+            models.Index(fields=['post', 'parent', 'created_at', 'id'], name='comment_post_parent_idx'), # Supports the cursor over a post's root comments.
+            models.Index(fields=['parent', 'created_at', 'id'], name='comment_parent_created_idx'), # Supports each comment's first replies.
+            models.Index(fields=['path'], name='comment_path_idx'), # Supports subtree range scans.
+        ]
+
+    @property
+    def depth(self):
+        """
+        Return the nesting level of the comment, 0 for a root comment.
+        """
+        return self.path.count('/') - 1
+
+    def subtree_range(self):
+        """
+        Return the (lower, upper) bounds of the paths of this comment and its descendants.
+
+        Paths hold only digits and '/', so every path starting with this one
+        sorts before the same path with its final '/' raised to '0'.
+        """
+        return self.path, self.path[:-1] + '0'
+
+    def save(self, *args, **kwargs):
+        """
+        Save the comment, then give a new comment its path, which needs its id.
+        """
+        super().save(*args, **kwargs)
+        if not self.path:
+            self.path = (self.parent.path if self.parent_id else '') + f'{self.pk:010d}/'
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
\ No newline at end of file
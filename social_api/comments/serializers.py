@@ -1,13 +1,84 @@
 """
-This module defines the CommentSerializer for serializing and deserializing Comment objects.
+This module defines the CommentSerializer for serializing and deserializing Comment objects,
+and the serializers for root comments with their first replies.
 """
+from django.conf import settings
 from rest_framework import serializers
+from accounts.models import Follow
+from social_api.fieldsets import SparseFieldsetMixin
+from social_api.serializers import ViewerContextListSerializer, get_viewer
 from .models import Comment
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source='user.username')
+    following = serializers.SerializerMethodField() # Whether the requesting user follows the comment's author.
 
     class Meta:
         model = Comment
-        fields = ['id', 'user', 'post', 'text', 'created_at']
-        read_only_fields = ['user', 'created_at']
\ No newline at end of file
+        fields = ['id', 'user', 'post', 'parent', 'text', 'created_at', 'reply_count', 'following']
+        read_only_fields = ['user', 'created_at', 'reply_count']
+        list_serializer_class = ViewerContextListSerializer # Computes `following` for a whole page in one query.
+
+    def validate(self, data):
+        """
+        Check that a reply stays on its parent's post, within the maximum depth,
+        and that an existing comment is not moved to another post or parent.
+        """
+        parent = data.get('parent')
+        if self.instance is not None:
+            if 'post' in data and data['post'].pk != self.instance.post_id:
+                raise serializers.ValidationError({'post': 'A comment cannot be moved to another post.'})
+            if 'parent' in data and parent != self.instance.parent:
+                raise serializers.ValidationError({'parent': 'A comment cannot be moved to another parent.'})
+            return data
+        if parent is not None:
+            if parent.post_id != data['post'].pk:
+                raise serializers.ValidationError({'parent': 'The parent comment belongs to another post.'})
+            if parent.depth + 1 > settings.COMMENT_MAX_DEPTH:
+                raise serializers.ValidationError({'parent': 'Replies cannot be nested this deeply.'})
+        return data
+
+    def get_viewer_context(self, comments):
+        """
+        Look up, with one query, which of the comment authors the viewer follows, unless `following` was left out.
+        """
+        if 'following' not in self.fields:
+            return {}
+        return {'followed_user_ids': Follow.objects.followed_ids(get_viewer(self), {c.user_id for c in comments})}
+
+    def get_following(self, obj):
+        """
+        Return whether the requesting user follows the author of this comment.
+        """
+        followed = self.context.get('followed_user_ids')
+        if followed is None:
+            followed = Follow.objects.followed_ids(get_viewer(self), [obj.user_id])
+        return obj.user_id in followed
+
+
+class CommentReplySerializer(CommentSerializer):
+    """
+    Serializes a reply embedded under a root comment by CommentThreadSerializer,
+    whose viewer lookup already covered the replies' authors.
+    """
+
+    def get_viewer_context(self, comments):
+        return {}
+
+
+class CommentThreadSerializer(CommentSerializer):
+    """
+    Serializes a root comment with its first replies, oldest first, as loaded
+    into `first_replies` by the view's sliced prefetch.
+    """
+    replies = CommentReplySerializer(source='first_replies', many=True, read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ['replies']
+
+    def get_viewer_context(self, comments):
+        """
+        Look up, with one query, which authors of the roots and of their replies the viewer follows.
+        """
+        replies = [reply for comment in comments for reply in getattr(comment, 'first_replies', [])]
+        return super().get_viewer_context(list(comments) + replies)
\ No newline at end of file
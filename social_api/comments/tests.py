@@ -5,7 +5,7 @@ from django.test import TestCase
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
-from accounts.models import User
+from accounts.models import User, Follow
 from posts.models import Post
 from rest_framework.authtoken.models import Token
 from .models import Comment
@@ -31,4 +31,158 @@ class CommentAPITest(APITestCase):
         data = {'post': self.post.id, 'text': 'Nice post'} # Create the data for the comment.
         response = self.client.post(url, data) # Make a POST request to create the comment.
         self.assertEqual(response.status_code, status.HTTP_201_CREATED) # Assert that the response status code is 201 Created.
-        self.assertTrue(Comment.objects.filter(post=self.post, user=self.user).exists()) # Assert that the comment was actually created in the database.
\ No newline at end of file
+        self.assertTrue(Comment.objects.filter(post=self.post, user=self.user).exists()) # Assert that the comment was actually created in the database.
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1) # Assert that the post's comment counter was incremented.
+
+    def test_delete_comment_updates_counter(self):
+        """
+        Test that deleting a comment decrements the post's comment counter.
+        """
+        response = self.client.post(reverse('comment-list'), {'post': self.post.id, 'text': 'Nice post'}) # Create a comment through the API.
+        url = reverse('comment-detail', kwargs={'pk': response.data['id']}) # Get the URL for the comment detail endpoint.
+        response = self.client.delete(url) # Make a DELETE request to remove the comment.
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0) # Assert that the counter went back to zero.
+
+    def test_get_comments_by_post_is_paginated(self):
+        """
+        Test that listing a post's comments returns cursor-paginated pages.
+        """
+        for i in range(3):
+            Comment.objects.create(post=self.post, user=self.user, text=f'Comment {i}') # Create three comments on the post.
+        url = reverse('comment-get-comments-by-post', kwargs={'post_id': self.post.id}) + '?page_size=2' # Request pages of two comments.
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c['text'] for c in response.data['results']], ['Comment 2', 'Comment 1']) # Newest first.
+        response = self.client.get(response.data['next']) # Follow the cursor to the next page.
+        self.assertEqual([c['text'] for c in response.data['results']], ['Comment 0'])
+
+    def test_get_comments_by_post_since(self):
+        """
+        Test that the `since` cursor of a page returns only the comments posted after it.
+        """
+        for i in range(2):
+            Comment.objects.create(post=self.post, user=self.user, text=f'Comment {i}')
+        url = reverse('comment-get-comments-by-post', kwargs={'post_id': self.post.id})
+        since = self.client.get(url).data['since'] # Cursor for the newest comment seen.
+        Comment.objects.create(post=self.post, user=self.user, text='Comment 2')
+        response = self.client.get(url, {'since': since})
+        self.assertEqual([c['text'] for c in response.data['results']], ['Comment 2']) # Only the newer comment.
+        response = self.client.get(url, {'since': response.data['since']})
+        self.assertEqual(response.data['results'], []) # Nothing newer yet.
+        self.assertEqual(self.client.get(url, {'since': 'not-a-cursor'}).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_comment_following_flag(self):
+        """
+        Test that each listed comment reports whether the viewer follows its author.
+        """
+        others = [User.objects.create(email=f'other{i}@test.com', username=f'other{i}') for i in range(3)] # Create commenters without hashing passwords.
+        for other in others:
+            Comment.objects.create(post=self.post, user=other, text='Hello')
+        Follow.objects.create(follower=self.user, following=others[0]) # The viewer follows one commenter.
+        url = reverse('comment-get-comments-by-post', kwargs={'post_id': self.post.id})
+        response = self.client.get(url)
+        flags = {c['user']: c['following'] for c in response.data['results']}
+        self.assertEqual(flags, {'other0': True, 'other1': False, 'other2': False})
+
+    def test_comments_by_post_conditional_get(self):
+        """
+        Test that an unchanged comment page is answered with 304 and that new comments and author renames change the ETag.
+        """
+        Comment.objects.create(post=self.post, user=self.user, text='First')
+        url = reverse('comment-get-comments-by-post', kwargs={'post_id': self.post.id})
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.client.post(reverse('comment-list'), {'post': self.post.id, 'text': 'Second'})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+        etag = self.client.get(url)['ETag']
+        detail = reverse('comment-detail', kwargs={'pk': Comment.objects.get(text='First').pk})
+        detail_etag = self.client.get(detail)['ETag']
+        self.user.username = 'renamed'
+        self.user.save() # Changes the embedded author name.
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(detail, HTTP_IF_NONE_MATCH=detail_etag).status_code, status.HTTP_200_OK)
+
+    def test_comment_sparse_fieldsets(self):
+        """
+        Test that omitting the author fields skips both the user join and the follow lookup.
+        """
+        for i in range(3):
+            Comment.objects.create(post=self.post, user=self.user, text=f'Comment {i}')
+        url = reverse('comment-get-comments-by-post', kwargs={'post_id': self.post.id})
+        with self.assertNumQueries(4): # Token lookup, validator page, viewer's follow state, comments.
+            response = self.client.get(url, {'omit': 'user,following'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'post', 'text', 'created_at', 'parent', 'reply_count'})
+
+    def reply(self, text, parent=None):
+        """
+        Create a comment on the test post through the API, optionally replying to `parent`, and return its id.
+        """
+        data = {'post': self.post.id, 'text': text}
+        if parent is not None:
+            data['parent'] = parent
+        return self.client.post(reverse('comment-list'), data).data['id']
+
+    def test_replies_maintain_paths_and_counts(self):
+        """
+        Test that replies get materialized paths and that reply and comment counters follow creates and deletes.
+        """
+        root = self.reply('Root')
+        child = self.reply('Child', parent=root)
+        grandchild = self.reply('Grandchild', parent=child)
+        self.reply('Second child', parent=root)
+        self.assertEqual(Comment.objects.get(pk=grandchild).path, f'{root:010d}/{child:010d}/{grandchild:010d}/')
+        self.assertEqual(Comment.objects.get(pk=root).reply_count, 2) # Direct replies only.
+        self.client.delete(reverse('comment-detail', kwargs={'pk': child})) # Deletes the grandchild with it.
+        self.assertEqual(Comment.objects.get(pk=root).reply_count, 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 2)
+
+    def test_reply_validation(self):
+        """
+        Test that a reply must stay on its parent's post and that comments cannot change post or parent.
+        """
+        other_post = Post.objects.create(author=self.user, title='Other', content='Content')
+        root = self.reply('Root')
+        response = self.client.post(reverse('comment-list'), {'post': other_post.id, 'text': 'Reply', 'parent': root})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        other_root = self.reply('Other root')
+        response = self.client.patch(reverse('comment-detail', kwargs={'pk': other_root}), {'parent': root})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.put(reverse('comment-detail', kwargs={'pk': root}), {'post': other_post.id, 'text': 'Moved'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(reverse('comment-detail', kwargs={'pk': root}), {'post': self.post.id, 'text': 'Edited'}) # The same post is fine.
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_comment_thread(self):
+        """
+        Test that a thread returns the comment and its whole subtree depth-first.
+        """
+        root = self.reply('Root')
+        first = self.reply('First', parent=root)
+        second = self.reply('Second', parent=root)
+        nested = self.reply('Nested', parent=first)
+        self.reply('Elsewhere')
+        with self.assertNumQueries(3): # Comment, subtree with authors, viewer's follows.
+            response = self.client.get(reverse('comment-thread', kwargs={'pk': root}))
+        self.assertEqual([c['id'] for c in response.data], [root, first, nested, second])
+
+    def test_threads_by_post(self):
+        """
+        Test that root comments come with their first replies in a constant number of queries.
+        """
+        roots = [self.reply(f'Root {i}') for i in range(3)]
+        for root in roots:
+            for i in range(3):
+                self.reply(f'Reply {i}', parent=root)
+        url = reverse('comment-get-threads-by-post', kwargs={'post_id': self.post.id})
+        with self.assertNumQueries(3): # Roots with authors, their first replies, viewer's follows.
+            response = self.client.get(url, {'replies': 2})
+        self.assertEqual([c['id'] for c in response.data['results']], roots[::-1]) # Newest roots first.
+        first = response.data['results'][0]
+        self.assertEqual([r['text'] for r in first['replies']], ['Reply 0', 'Reply 1']) # Oldest replies first.
+        self.assertEqual(first['reply_count'], 3)
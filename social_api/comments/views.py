@@ -1,34 +1,148 @@
 """
 This module defines the CommentViewSet for managing comments using Django REST framework.
 """
-from rest_framework import viewsets, permissions
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Prefetch
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from accounts.models import Follow
+from notifications import events
+from posts.models import Post
+from social_api.caching import version_token
+from social_api.conditional import ConditionalGetMixin
+from social_api.fieldsets import get_field_selection
+from social_api.pagination import CreatedAtCursorPagination, SinceCursorPagination
 from .models import Comment
-from .serializers import CommentSerializer
+from .serializers import CommentSerializer, CommentThreadSerializer
 from .permissions import IsCommentOwnerOrReadOnly
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing comments on posts.
+    Reads answer conditional requests with 304 before serializing.
     """
     queryset = Comment.objects.all()
+    conditional_fields = ('id', 'created_at', 'updated_at', 'user')
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsCommentOwnerOrReadOnly]
 
+    def get_queryset(self):
+        """
+        Join the comment authors when their usernames are part of the requested fields.
+        """
+        if 'user' in get_field_selection(self.request):
+            return self.queryset.select_related('user')
+        return self.queryset.all()
+
+    def get_validator_extras(self, items):
+        """
+        The `following` flag depends on whom the viewer follows, and comments
+        embed their authors' usernames, whose changes bump the authors' cache versions.
+        """
+        return (
+            Follow.objects.state_token(self.request.user),
+            version_token(('user', item.user_id) for item in items),
+        )
+
     def perform_create(self, serializer):
         """
-        Save the comment with the logged-in user as the author.
+        Save the comment with the logged-in user as the author,
+        increment the post's comment counter and the parent's reply counter,
+        and notify the parent comment's author of a reply and the post's author
+        of a comment, once per recipient: a reply to the post author's own
+        comment only notifies them of the reply.
         """
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            comment = serializer.save(user=self.request.user)
+            Post.objects.filter(pk=comment.post_id).update(
+                comments_count=F('comments_count') + 1, updated_at=timezone.now()
+            )
+            if comment.parent_id:
+                Comment.objects.filter(pk=comment.parent_id).update(
+                    reply_count=F('reply_count') + 1, updated_at=timezone.now()
+                )
+                events.emit('reply', recipient_id=comment.parent.user_id, actor_id=comment.user_id, target_id=comment.parent_id)
+            if not comment.parent_id or comment.parent.user_id != comment.post.author_id:
+                events.emit('comment', recipient_id=comment.post.author_id, actor_id=comment.user_id, target_id=comment.post_id)
 
-    @action(detail=False, methods=['get'], url_path='post/(?P<post_id>[^/.]+)/list')
+    def perform_destroy(self, instance):
+        """
+        Delete the comment with its replies, and decrement the post's comment
+        counter by the number of comments removed and the parent's reply counter by one.
+        """
+        with transaction.atomic():
+            _, deleted = Comment.objects.filter(pk=instance.pk).delete()
+            deleted = deleted.get(Comment._meta.label, 0)
+            if deleted:
+                Post.objects.filter(pk=instance.post_id).update(
+                    comments_count=F('comments_count') - deleted, updated_at=timezone.now()
+                )
+                if instance.parent_id:
+                    Comment.objects.filter(pk=instance.parent_id).update(
+                        reply_count=Greatest(F('reply_count') - 1, 0), updated_at=timezone.now()
+                    )
+
+    @action(detail=False, methods=['get'], url_path=r'post/(?P<post_id>\d+)/list', pagination_class=SinceCursorPagination)
     def get_comments_by_post(self, request, post_id=None):
         """
-        Custom endpoint to get a list of comments for a single post by its ID.
+        Custom endpoint to get a cursor-paginated list of comments for a single post by its ID.
         e.g. GET /comments/post/1/list/
+
+        Pages are keyset ranges on (post, created_at, id), served by the
+        `comment_post_created_id_idx` index, with the authors joined in the same
+        query. Each response carries a `since` cursor; passing it back as
+        `?since=` returns only the comments posted after the newest one seen.
+        """
+        comments = self.get_queryset().filter(post_id=post_id)
+
+        def render():
+            page = self.paginate_queryset(comments)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        return self.conditional_response(comments, render)
+
+    @action(detail=True, methods=['get'])
+    def thread(self, request, pk=None):
+        """
+        Returns this comment and all of its replies, at any depth, in depth-first
+        order with siblings oldest first, up to COMMENT_THREAD_MAX_SIZE comments.
+        e.g. GET /comments/1/thread/
+
+        The subtree is one range scan of the path index, whatever its depth.
+        """
+        comment = self.get_object()
+        lower, upper = comment.subtree_range()
+        comments = self.get_queryset().filter(path__gte=lower, path__lt=upper).order_by('path')
+        serializer = self.get_serializer(comments[:settings.COMMENT_THREAD_MAX_SIZE], many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path=r'post/(?P<post_id>\d+)/threads', pagination_class=CreatedAtCursorPagination)
+    def get_threads_by_post(self, request, post_id=None):
+        """
+        Returns a cursor-paginated list of a post's root comments, newest first,
+        each with its first replies, oldest first, and its total reply count.
+        e.g. GET /comments/post/1/threads/?replies=3
+
+        **Query parameters:**
+            - replies: Number of replies per root (default and maximum COMMENT_REPLIES_PREVIEW_SIZE).
+
+        A page costs one query for the roots and one sliced prefetch for all of
+        their replies, however many roots and replies there are.
         """
-        comments = Comment.objects.filter(post_id=post_id)
-        serializer = self.get_serializer(comments, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        try:
+            size = min(int(request.query_params.get('replies', settings.COMMENT_REPLIES_PREVIEW_SIZE)), settings.COMMENT_REPLIES_PREVIEW_SIZE)
+        except ValueError:
+            return Response({'error': 'replies must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        replies = self.get_queryset().order_by('created_at', 'id')[:max(size, 0)]
+        roots = self.get_queryset().filter(post_id=post_id, parent=None).prefetch_related(
+            Prefetch('replies', queryset=replies, to_attr='first_replies')
+        )
+        page = self.paginate_queryset(roots)
+        serializer = CommentThreadSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+This module defines the materialized home timeline models.
+
+`TimelineEntry` rows are written when a post is fanned out to its author's
+followers. `HighFanoutAuthor` records authors with too many followers to fan
+out to; their posts are merged into followers' feeds at read time instead.
+"""
+from django.db import models
+from django.conf import settings
+from posts.models import Post
+
+class TimelineEntry(models.Model):
+    """
+    A post delivered to a user's home timeline.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries') # The user whose timeline holds the entry.
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries') # The delivered post. Deleting the post removes it from every timeline.
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+') # Copy of the post's author, so an unfollow purges with one indexed delete.
+    created_at = models.DateTimeField() # Copy of the post's creation time, ordering the timeline with the post id.
+
+    class Meta:
+        unique_together = ('user', 'post') # A post appears at most once per timeline.
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'post'], name='timeline_user_created_idx'), # Supports reading feed pages and trimming a timeline to its cap.
+            models.Index(fields=['user', 'author'], name='timeline_user_author_idx'), # Supports purging an author on unfollow.
+        ]
+
+
+class HighFanoutAuthor(models.Model):
+    """
+    An author whose follower count exceeded `FEED_FANOUT_THRESHOLD` when posting.
+    """
+    author = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='+') # The author whose posts are pulled at read time.
+    detected_at = models.DateTimeField(auto_now_add=True) # When the author first crossed the threshold.
@@ -0,0 +1,72 @@
+"""
+This module defines the cursor pagination of the home feed.
+
+The feed is merged from several sources (see `feed.timeline.feed_page`), so
+it cannot be paginated as one queryset. Its cursors carry the (created_at,
+post id) of the row a page starts after, and every source is read past that
+position by its own index.
+"""
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor
+
+from posts.models import Post
+from social_api.pagination import CreatedAtCursorPagination
+from .timeline import feed_page
+
+
+class FeedCursorPagination(CreatedAtCursorPagination):
+    """
+    Newest-first keyset pagination over a user's merged home feed.
+    """
+
+    def paginate_feed(self, user, request):
+        """
+        Return the posts on the requested page of `user`'s feed.
+
+        The posts only carry their id, author and creation time, which is all
+        the page needs before its representations are looked up.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        position = None if cursor is None else self.decode_position(cursor.position)
+        reverse = cursor is not None and cursor.reverse
+
+        rows = feed_page(user, self.page_size + 1, position, reverse)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = [Post(id=post_id, author_id=author_id, created_at=created_at) for created_at, post_id, author_id in rows]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.encode_position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.encode_position(self.page[0])))
+
+    def encode_position(self, post):
+        return f'{post.created_at.isoformat()}|{post.pk}'
+
+    def decode_position(self, position):
+        """
+        Return the (created_at, post id) pair of a cursor position, or raise NotFound like an invalid cursor.
+        """
+        try:
+            created_at, pk = position.split('|')
+            created_at, pk = parse_datetime(created_at), int(pk)
+        except (AttributeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
@@ -0,0 +1,41 @@
+"""
+This module keeps home timelines in step with new posts and follow changes.
+
+The timeline writes run after the triggering transaction commits, so a
+rolled-back post or follow never reaches a timeline; fan-out to followers
+runs on the background thread.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import Follow
+from posts.models import Post
+from social_api import background
+from . import timeline
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    """
+    Push a newly created post into its author's followers' timelines.
+    """
+    if created:
+        transaction.on_commit(lambda: background.run(timeline.fan_out_post, instance))
+
+
+@receiver(post_save, sender=Follow)
+def backfill_on_follow(sender, instance, created, **kwargs):
+    """
+    Copy the followed author's recent posts into the follower's timeline.
+    """
+    if created:
+        transaction.on_commit(lambda: timeline.backfill_follow(instance.follower_id, instance.following_id))
+
+
+@receiver(post_delete, sender=Follow)
+def purge_on_unfollow(sender, instance, **kwargs):
+    """
+    Remove the unfollowed author's posts from the follower's timeline.
+    """
+    transaction.on_commit(lambda: timeline.purge_follow(instance.follower_id, instance.following_id))
@@ -0,0 +1,142 @@
+"""
+This module contains API tests for the home timeline.
+"""
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from accounts.models import User, Follow
+from posts.models import Post
+from rest_framework.authtoken.models import Token
+from .models import TimelineEntry, HighFanoutAuthor
+
+
+class FeedAPITest(APITestCase):
+    """
+    API test class for the fan-out-on-write home timeline.
+    """
+
+    def setUp(self):
+        """
+        Set up method to create a reader following an author before each test.
+        """
+        self.reader = User.objects.create_user(email='reader@test.com', username='reader', password='testpass123') # Create the user reading the feed.
+        self.author = User.objects.create(email='author@test.com', username='author') # Create an author without hashing a password.
+        self.stranger = User.objects.create(email='stranger@test.com', username='stranger') # Create an author nobody follows.
+        self.token = Token.objects.create(user=self.reader) # Create a token for the reader.
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key) # Authenticate the client with the token.
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.reader, following=self.author) # The reader follows the author.
+
+    def create_post(self, author, title):
+        """
+        Helper method to create a post and run its fan-out.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(author=author, title=title, content='Content')
+
+    def feed_titles(self):
+        """
+        Helper method to return the titles on the first page of the reader's feed.
+        """
+        response = self.client.get(reverse('feed-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post['title'] for post in response.data['results']]
+
+    def test_feed_contains_followed_and_own_posts(self):
+        """
+        Test that the feed holds posts of followed authors and the reader, newest first.
+        """
+        self.create_post(self.author, 'Followed')
+        self.create_post(self.stranger, 'Stranger')
+        self.create_post(self.reader, 'Own')
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post__title='Followed').exists()) # The post was fanned out.
+        self.assertEqual(self.feed_titles(), ['Own', 'Followed'])
+
+    @override_settings(FEED_FANOUT_THRESHOLD=0)
+    def test_high_fanout_author_is_merged_at_read_time(self):
+        """
+        Test that posts of authors above the fan-out threshold are pulled instead of pushed.
+        """
+        self.create_post(self.author, 'Popular')
+        self.assertTrue(HighFanoutAuthor.objects.filter(author=self.author).exists())
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader).exists()) # Nothing was fanned out.
+        self.assertEqual(self.feed_titles(), ['Popular'])
+
+    def test_follow_backfills_and_unfollow_purges(self):
+        """
+        Test that following copies recent posts in and unfollowing removes them.
+        """
+        self.create_post(self.stranger, 'Earlier')
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.reader, following=self.stranger) # Follow after the post exists.
+        self.assertEqual(self.feed_titles(), ['Earlier'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.filter(follower=self.reader, following=self.stranger).delete() # Unfollow again.
+        self.assertEqual(self.feed_titles(), [])
+
+    @override_settings(FEED_MAX_ENTRIES=2, FEED_TRIM_INTERVAL=1)
+    def test_timeline_is_trimmed_to_cap(self):
+        """
+        Test that a timeline keeps only the newest FEED_MAX_ENTRIES entries.
+        """
+        for i in range(4):
+            self.create_post(self.author, f'Post {i}')
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(user=self.reader).order_by('-created_at').values_list('post__title', flat=True)),
+            ['Post 3', 'Post 2'],
+        )
+
+    def test_feed_requires_authentication(self):
+        """
+        Test that an anonymous client cannot read a feed.
+        """
+        self.client.credentials() # Remove the authentication credentials.
+        response = self.client.get(reverse('feed-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(FEED_FANOUT_THRESHOLD=1)
+    def test_feed_pages_merge_sources(self):
+        """
+        Test that pages interleave timeline, pulled and own posts newest first, forwards and backwards.
+        """
+        popular = User.objects.create(email='popular@test.com', username='popular')
+        for follower in (self.reader, self.stranger):
+            with self.captureOnCommitCallbacks(execute=True):
+                Follow.objects.create(follower=follower, following=popular) # Two followers put `popular` over the threshold.
+        for i, author in enumerate([self.author, popular, self.reader] * 2):
+            self.create_post(author, f'Post {i}')
+        self.assertFalse(TimelineEntry.objects.filter(author=popular).exists()) # Pulled at read time.
+        pages, url = [], reverse('feed-list') + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            pages.append([post['title'] for post in response.data['results']])
+            url = response.data['next']
+        self.assertEqual(pages, [['Post 5', 'Post 4'], ['Post 3', 'Post 2'], ['Post 1', 'Post 0']])
+        response = self.client.get(response.data['previous']) # Back from the last page.
+        self.assertEqual([post['title'] for post in response.data['results']], ['Post 3', 'Post 2'])
+
+    @override_settings(FEED_FANOUT_THRESHOLD=1)
+    def test_feed_page_reads_each_source_by_index(self):
+        """
+        Test that every query reading a feed page is an index range scan, without sorting its matches.
+        """
+        popular = User.objects.create(email='popular@test.com', username='popular')
+        for follower in (self.reader, self.stranger):
+            Follow.objects.create(follower=follower, following=popular)
+        for i in range(3):
+            self.create_post(popular, f'Popular {i}')
+            self.create_post(self.author, f'Followed {i}')
+        url = self.client.get(reverse('feed-list') + '?page_size=2').data['next']
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        reads = [query['sql'] for query in queries if 'LIMIT' in query['sql']]
+        self.assertEqual(len(reads), 3) # Timeline, own posts, one pulled author.
+        with connection.cursor() as cursor:
+            for sql in reads:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = ' '.join(row[-1] for row in cursor.fetchall())
+                self.assertRegex(plan, r'^SEARCH \w+ USING (COVERING )?INDEX \w+ \(\w+=\? AND created_at<\?\)') # Seeks past the cursor.
+                self.assertNotIn('TEMP B-TREE', plan)
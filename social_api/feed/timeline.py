@@ -0,0 +1,179 @@
+"""
+This module implements the fan-out-on-write home timeline.
+
+A new post is copied into the timeline of each of its author's followers.
+Authors with more than `FEED_FANOUT_THRESHOLD` followers are recorded as
+`HighFanoutAuthor`s instead, and their posts are merged into their
+followers' feeds at read time. Timelines are trimmed to `FEED_MAX_ENTRIES`.
+
+Fan-out runs on the background thread of `social_api.background` once the
+post's transaction commits, so creating a post never waits for thousands of
+timeline inserts.
+
+A feed page is read from each source by its own index, newest first past
+the page's cursor: the timeline, the user's own posts and the posts of each
+followed high-fanout author. Each source returns at most one page, and the
+sources are merged in Python, so reading a page costs the same however long
+the histories behind it are.
+"""
+import heapq
+import random
+
+from django.conf import settings
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from accounts.models import Follow
+from posts.models import Post
+from .models import TimelineEntry, HighFanoutAuthor
+
+FANOUT_CHUNK_SIZE = 1000
+
+
+def fan_out_post(post):
+    """
+    Deliver a new post to the timelines of its author's followers.
+    """
+    if HighFanoutAuthor.objects.filter(author_id=post.author_id).exists():
+        return
+    threshold = settings.FEED_FANOUT_THRESHOLD
+    followers = Follow.objects.filter(following_id=post.author_id).order_by()
+    # A LIMITed count never reads more than threshold + 1 index entries.
+    if followers[:threshold + 1].count() > threshold:
+        HighFanoutAuthor.objects.get_or_create(author_id=post.author_id)
+        return
+
+    batch = []
+    for follower_id in followers.values_list('follower_id', flat=True).iterator(chunk_size=FANOUT_CHUNK_SIZE):
+        batch.append(follower_id)
+        if len(batch) == FANOUT_CHUNK_SIZE:
+            _deliver(post, batch)
+            batch = []
+    if batch:
+        _deliver(post, batch)
+
+
+def _deliver(post, user_ids):
+    """
+    Insert one post into several timelines and trim a sample of them.
+    """
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post.pk, author_id=post.author_id, created_at=post.created_at)
+            for user_id in user_ids
+        ],
+        ignore_conflicts=True,
+    )
+    # Trimming every recipient on every post would rescan whole timelines, so
+    # each recipient is trimmed on average once per FEED_TRIM_INTERVAL deliveries.
+    interval = settings.FEED_TRIM_INTERVAL
+    trim_timelines([user_id for user_id in user_ids if random.random() * interval < 1])
+
+
+def backfill_follow(follower_id, author_id):
+    """
+    Copy the most recent posts of a newly followed author into the follower's timeline.
+    """
+    if HighFanoutAuthor.objects.filter(author_id=author_id).exists():
+        return
+    recent = (
+        Post.objects.filter(author_id=author_id)
+        .order_by('-created_at', '-id')
+        .values_list('pk', 'created_at')[:settings.FEED_BACKFILL_POSTS]
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=follower_id, post_id=post_id, author_id=author_id, created_at=created_at)
+            for post_id, created_at in recent
+        ],
+        ignore_conflicts=True,
+    )
+    trim_timelines([follower_id])
+
+
+def purge_follow(follower_id, author_id):
+    """
+    Remove an unfollowed author's posts from the follower's timeline.
+    """
+    TimelineEntry.objects.filter(user_id=follower_id, author_id=author_id).delete()
+
+
+def trim_timelines(user_ids):
+    """
+    Delete the entries beyond `FEED_MAX_ENTRIES` from each of the given timelines.
+    """
+    if not user_ids:
+        return
+    overflow = (
+        TimelineEntry.objects.filter(user_id__in=user_ids)
+        .annotate(position=Window(
+            RowNumber(),
+            partition_by=[F('user_id')],
+            order_by=[F('created_at').desc(), F('post_id').desc()],
+        ))
+        .filter(position__gt=settings.FEED_MAX_ENTRIES)
+        .values_list('pk', flat=True)
+    )
+    pks = list(overflow)
+    if pks:
+        TimelineEntry.objects.filter(pk__in=pks).delete()
+
+
+def _past(position, reverse, pk_field):
+    """
+    Return the filter for rows after `position`, a (created_at, post id) pair, in feed order.
+
+    Written as a range on `created_at` minus the ties already seen, which
+    SQLite turns into a seek on the (..., created_at, post) indexes.
+    """
+    created_at, pk = position
+    if reverse:
+        return Q(created_at__gte=created_at) & ~Q(created_at=created_at, **{f'{pk_field}__lte': pk})
+    return Q(created_at__lte=created_at) & ~Q(created_at=created_at, **{f'{pk_field}__gte': pk})
+
+
+def feed_sources(user, limit, position=None, reverse=False):
+    """
+    Return one query per feed source, each yielding at most `limit` (created_at, post id, author id) rows.
+
+    The sources are the user's timeline, the user's own posts and the posts
+    of each followed high-fanout author. Rows come newest first after
+    `position`, or oldest first before it when `reverse` is set.
+    """
+    direction = '' if reverse else '-'
+    timeline = TimelineEntry.objects.filter(user=user)
+    if position is not None:
+        timeline = timeline.filter(_past(position, reverse, 'post_id'))
+    sources = [
+        timeline.order_by(f'{direction}created_at', f'{direction}post_id')
+        .values_list('created_at', 'post_id', 'author_id')[:limit]
+    ]
+    pulled_authors = Follow.objects.filter(
+        follower=user, following__in=HighFanoutAuthor.objects.values('author')
+    ).values_list('following_id', flat=True)
+    for author_id in [user.pk, *pulled_authors]:
+        posts = Post.objects.filter(author_id=author_id)
+        if position is not None:
+            posts = posts.filter(_past(position, reverse, 'id'))
+        sources.append(
+            posts.order_by(f'{direction}created_at', f'{direction}id')
+            .values_list('created_at', 'id', 'author_id')[:limit]
+        )
+    return sources
+
+
+def feed_page(user, limit, position=None, reverse=False):
+    """
+    Return up to `limit` (created_at, post id, author id) rows of a user's home feed.
+
+    Rows are in the order of `feed_sources`. A post found in two sources,
+    e.g. fanned out before its author crossed the threshold, is listed once.
+    """
+    rows, seen = [], set()
+    for row in heapq.merge(*(list(source) for source in feed_sources(user, limit, position, reverse)), reverse=not reverse):
+        if row[1] not in seen:
+            seen.add(row[1])
+            rows.append(row)
+            if len(rows) == limit:
+                break
+    return rows
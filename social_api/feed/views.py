@@ -0,0 +1,31 @@
+"""
+This module defines the FeedViewSet serving a user's home timeline.
+"""
+from rest_framework import mixins, viewsets, permissions
+
+from posts.models import Post
+from posts.serializers import PostSerializer
+from social_api.caching import CachedRepresentationViewMixin
+from social_api.fieldsets import get_field_selection
+from .pagination import FeedCursorPagination
+
+class FeedViewSet(CachedRepresentationViewMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    API endpoint listing the posts in the current user's home timeline, newest first.
+    """
+    serializer_class = PostSerializer
+    pagination_class = FeedCursorPagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        """
+        Return posts loaded with everything PostSerializer reads for the requested fields.
+        The page itself is chosen by the paginator; this only loads its cache misses.
+        """
+        return Post.objects.for_serializer(get_field_selection(self.request))
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginator.paginate_feed(request.user, request)
+        instances, context = self.get_cached_instances(page)
+        serializer = self.get_serializer(instances, many=True, context=context)
+        return self.get_paginated_response(serializer.data)
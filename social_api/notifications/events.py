@@ -0,0 +1,238 @@
+"""
+This module turns domain events into notifications off the request path.
+
+Views call `emit()` when a like, follow, comment, reply or message actually
+happens. The event is handed over once the request's transaction commits and
+put on an in-process queue; a background thread drains the queue and writes
+the notifications with `bulk_create`, up to `NOTIFICATION_BATCH_SIZE` at a
+time (also when the queue is flushed at once), waiting at most `NOTIFICATION_FLUSH_INTERVAL` seconds to fill a batch.
+The request itself never writes a notification.
+
+Events for the same recipient, verb and target are coalesced into the
+recipient's unread notification for that key if it saw an event within
+`NOTIFICATION_COALESCE_WINDOW` seconds, which is updated in place ("alice
+and 41 others liked your post") instead of gaining a row per event. Each
+batch costs one query for the actors' usernames, one for the notifications
+to coalesce into (by recipient, verb and target, matched to the keys in
+Python), one bulk update and one bulk insert. The notifications
+written are then published to their recipients' real-time streams.
+
+The queue holds at most `NOTIFICATION_QUEUE_MAX_SIZE` events; when the worker
+falls that far behind, new events are dropped and counted rather than slowing
+down requests. Queued events are flushed at interpreter exit but are lost if
+the process dies. With `NOTIFICATIONS_BACKGROUND_WORKER` off (as under
+`manage.py test`), each event is written in its commit callback instead.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from social_api.pubsub import get_broker, user_channel
+from .models import Notification
+from .serializers import NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+Event = namedtuple('Event', ['verb', 'recipient_id', 'actor_id', 'target_id'])
+
+ACTIONS = {
+    'like': 'liked your post.',
+    'follow': 'started following you.',
+    'comment': 'commented on your post.',
+    'reply': 'replied to your comment.',
+    'message': 'sent you a message.',
+}
+
+
+def render_message(verb, actor, actor_count):
+    """
+    Return the text of a notification whose latest actor is `actor`, out of `actor_count`.
+    """
+    others = actor_count - 1
+    if others > 1:
+        actor = f'{actor} and {others} others'
+    elif others == 1:
+        actor = f'{actor} and 1 other'
+    return f'{actor} {ACTIONS[verb]}'
+
+
+def _open_notifications(keys, since):
+    """
+    Return the newest unread notification since `since` of each (recipient, verb, target) key that has one.
+
+    The rows are looked up by recipients, verbs and targets rather than by
+    key, so the query's size grows with the number of distinct values instead
+    of building a condition per key, and are matched to the keys here.
+    """
+    targets = {key[2] for key in keys}
+    target_filter = Q(target_id__in=targets - {None})
+    if None in targets:
+        target_filter |= Q(target_id__isnull=True)
+    notifications = Notification.objects.filter(
+        target_filter,
+        user_id__in={key[0] for key in keys},
+        verb__in={key[1] for key in keys},
+        read=False,
+        created_at__gte=since,
+    ).order_by('created_at', 'id') # The newest one per key wins.
+    return {
+        key: notification
+        for notification in notifications
+        if (key := (notification.user_id, notification.verb, notification.target_id)) in keys
+    }
+
+
+def write_notifications(events):
+    """
+    Write the notifications for `events`, coalescing them by (recipient, verb, target).
+    """
+    usernames = dict(
+        get_user_model().objects.filter(pk__in={event.actor_id for event in events}).values_list('pk', 'username')
+    )
+    # The actors of each key, newest first and without repeats. An actor
+    # deleted since the event leaves nothing to notify about.
+    groups = {}
+    for event in reversed(events):
+        if event.actor_id in usernames:
+            groups.setdefault((event.recipient_id, event.verb, event.target_id), {})[event.actor_id] = None
+    if not groups:
+        return
+
+    now = timezone.now()
+    open_notifications = _open_notifications(groups, now - timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW))
+    updated, created = [], []
+    for key, actors in groups.items():
+        actors = list(actors)
+        notification = open_notifications.get(key)
+        if notification is None:
+            notification = Notification(user_id=key[0], verb=key[1], target_id=key[2], actor_count=len(actors))
+            created.append(notification)
+        else:
+            # Actors still among the latest (e.g. after an unlike and a like) are not counted twice.
+            notification.actor_count += sum(actor_id not in notification.latest_actor_ids for actor_id in actors)
+            actors += [actor_id for actor_id in notification.latest_actor_ids if actor_id not in actors]
+            notification.created_at = notification.updated_at = now
+            updated.append(notification)
+        notification.actor_id = actors[0]
+        notification.latest_actor_ids = actors[:settings.NOTIFICATION_LATEST_ACTORS]
+        notification.message = render_message(key[1], usernames[actors[0]], notification.actor_count)
+
+    if updated:
+        Notification.objects.bulk_update(
+            updated,
+            ['actor', 'actor_count', 'latest_actor_ids', 'message', 'created_at', 'updated_at'],
+            batch_size=settings.NOTIFICATION_BATCH_SIZE,
+        )
+    if created:
+        Notification.objects.bulk_create(created, batch_size=settings.NOTIFICATION_BATCH_SIZE)
+
+    broker = get_broker()
+    for notification in updated + created:
+        broker.publish(user_channel(notification.user_id), 'notification', NotificationSerializer(notification).data)
+
+
+class NotificationQueue:
+    """
+    A bounded queue of events with a lazily started consumer thread.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=settings.NOTIFICATION_QUEUE_MAX_SIZE)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.dropped = 0
+
+    def put(self, event):
+        """
+        Queue an event for writing, or drop it if the queue is full.
+        """
+        if settings.NOTIFICATIONS_BACKGROUND_WORKER:
+            self._ensure_started()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning('Notification queue is full; dropped a %s event.', event.verb)
+
+    def flush(self):
+        """
+        Write every queued event in the calling thread, in batches of up to
+        `NOTIFICATION_BATCH_SIZE`, and return how many were written.
+        """
+        written = 0
+        while True:
+            batch = []
+            while len(batch) < settings.NOTIFICATION_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return written
+            write_notifications(batch)
+            written += len(batch)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='notification-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _next_batch(self):
+        """
+        Block for an event, then gather more until the batch is full or the flush interval ends.
+        """
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + settings.NOTIFICATION_FLUSH_INTERVAL
+        while len(batch) < settings.NOTIFICATION_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                write_notifications(batch)
+            except Exception:
+                logger.exception('Failed to write %d notifications.', len(batch))
+            finally:
+                close_old_connections()
+
+
+notification_queue = NotificationQueue()
+
+
+def _publish(event):
+    notification_queue.put(event)
+    if not settings.NOTIFICATIONS_BACKGROUND_WORKER:
+        notification_queue.flush()
+
+
+def emit(verb, recipient_id, actor_id, target_id=None):
+    """
+    Notify `recipient_id` that `actor_id` did `verb`, once the current transaction commits.
+
+    Users are not notified of their own actions.
+    """
+    if recipient_id == actor_id:
+        return
+    event = Event(verb, recipient_id, actor_id, target_id)
+    transaction.on_commit(lambda: _publish(event))
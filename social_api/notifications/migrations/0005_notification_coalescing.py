@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_latest_actors(apps, schema_editor):
+    """
+    Start each existing notification's latest actors at its single actor.
+    """
+    Notification = apps.get_model('notifications', 'Notification')
+    notifications = list(Notification.objects.filter(actor__isnull=False).only('actor'))
+    for notification in notifications:
+        notification.latest_actor_ids = [notification.actor_id]
+    Notification.objects.bulk_update(notifications, ['latest_actor_ids'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='latest_actor_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(backfill_latest_actors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('read', False)), fields=['user', 'verb', 'target_id'], name='notification_unread_group_idx'),
+        ),
+    ]
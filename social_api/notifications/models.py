@@ -7,8 +7,40 @@ from django.conf import settings
 class Notification(models.Model):
     """
     Represents a notification for a user.
+
+    Notifications are written by `notifications.events` from the domain events
+    the other apps emit; `verb`, `actor` and `target_id` say what happened,
+    and `message` is its rendered text.
+
+    Events with the same recipient, verb and target are coalesced into one
+    unread notification while they keep arriving within
+    `NOTIFICATION_COALESCE_WINDOW`: `actor` is the latest actor, `actor_count`
+    counts them all and `created_at` is the latest event's time. Once read,
+    the next such event starts a new notification.
     """
+    VERB_CHOICES = [
+        ('like', 'Like'), # target_id is the liked post.
+        ('follow', 'Follow'), # No target; the actor followed the recipient.
+        ('comment', 'Comment'), # target_id is the post commented on.
+        ('reply', 'Reply'), # target_id is the comment replied to.
+        ('message', 'Message'), # target_id is the message sent.
+    ]
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications') # The user to whom the notification belongs. When a user is deleted, their notifications are also deleted.
     message = models.CharField(max_length=255) # The notification message.
-    created_at = models.DateTimeField(auto_now_add=True) # The timestamp when the notification was created. Automatically set on creation.
-    read = models.BooleanField(default=False) # Indicates whether the notification has been read by the user. Defaults to False.
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True) # The timestamp when the notification was created, moved forward when another event is coalesced into it.
+    updated_at = models.DateTimeField(auto_now=True) # The timestamp of the last change, e.g. being marked as read; drives conditional GETs.
+    read = models.BooleanField(default=False) # Indicates whether the notification has been read by the user. Defaults to False.
+    verb = models.CharField(max_length=20, choices=VERB_CHOICES, blank=True) # The kind of event; blank for notifications created before events.
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE, related_name='+') # The user whose action caused the notification.
+    target_id = models.PositiveBigIntegerField(null=True, blank=True) # The id of the object acted on, whose model depends on the verb.
+    actor_count = models.PositiveIntegerField(default=1) # Number of events coalesced into this notification.
+    latest_actor_ids = models.JSONField(default=list, blank=True) # Ids of the most recent actors, newest first, at most NOTIFICATION_LATEST_ACTORS.
+
+    class Meta:
+        ordering = ['-created_at', '-id'] # Newest first, with the id as a tie-breaker for a stable cursor.
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='notification_user_created_idx'), # Supports the cursor over a user's notifications.
+            models.Index(fields=['user', 'verb', 'target_id'], condition=models.Q(read=False), name='notification_unread_group_idx'), # Finds the unread notification an event coalesces into.
+            models.Index(fields=['user'], condition=models.Q(read=False), name='notification_user_unread_idx'), # Counts a user's unread notifications without reading any rows.
+        ]
\ No newline at end of file
@@ -2,9 +2,10 @@
 This module defines the NotificationSerializer for serializing and deserializing Notification objects.
 """
 from rest_framework import serializers
+from social_api.fieldsets import SparseFieldsetMixin
 from .models import Notification
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for the Notification model.
     """
@@ -13,4 +14,5 @@ class NotificationSerializer(serializers.ModelSerializer):
         Meta class for the NotificationSerializer. Defines metadata about the serializer.
         """
         model = Notification  # Specifies the model to be serialized.
-        fields = ['id', 'user', 'message', 'read', 'created_at']  # Specifies the fields to be included in the serialized output.
\ No newline at end of file
+        fields = ['id', 'user', 'verb', 'actor', 'actor_count', 'latest_actor_ids', 'target_id', 'message', 'read', 'created_at']  # Specifies the fields to be included in the serialized output.
+        read_only_fields = ['verb', 'actor', 'actor_count', 'latest_actor_ids', 'target_id']  # Set by the notification pipeline only.
\ No newline at end of file
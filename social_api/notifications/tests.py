@@ -2,12 +2,21 @@
 This module contains API tests for the Notification model.
 """
 
-from django.test import TestCase
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
 from accounts.models import User
+from comments.models import Comment
+from posts.models import Post
 from rest_framework.authtoken.models import Token
+from social_api.pubsub import InProcessBroker, get_broker, user_channel
+from social_api.streaming import websocket_application
+from .events import Event, NotificationQueue, write_notifications
 from .models import Notification
 
 
@@ -32,4 +41,268 @@ class NotificationAPITest(APITestCase):
         url = reverse('notification-list')  # Get the URL for the notification list endpoint.
         response = self.client.get(url)  # Make a GET request to retrieve the notification list.
         self.assertEqual(response.status_code, status.HTTP_200_OK)  # Assert that the response status code is 200 OK.
-        self.assertEqual(len(response.data), 1)  # Assert that the response data contains one notification (the one created in setUp).
\ No newline at end of file
+        self.assertEqual(len(response.data['results']), 1)  # Assert that the response page contains one notification (the one created in setUp).
+
+    def test_notifications_conditional_get(self):
+        """
+        Test that unchanged notifications are answered with 304 and that marking one read changes the ETag.
+        """
+        url = reverse('notification-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.notification.read = True
+        self.notification.save() # Saving bumps updated_at.
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_unread_count_and_bulk_mark_read(self):
+        """
+        Test that the unread count and the bulk mark-read actions each cost one query and only touch the user's own notifications.
+        """
+        others = [Notification.objects.create(user=self.user, message=f'Notification {i}') for i in range(3)]
+        stranger = User.objects.create(email='stranger@test.com', username='stranger')
+        foreign = Notification.objects.create(user=stranger, message='Not yours')
+        url = reverse('notification-unread-count')
+        self.client.get(url)  # Caches the token lookup.
+        with self.assertNumQueries(1):  # COUNT over the partial index.
+            self.assertEqual(self.client.get(url).data['unread_count'], 4)
+
+        ids = ','.join(str(pk) for pk in [self.notification.pk, others[0].pk, foreign.pk])
+        with self.assertNumQueries(1):  # A single UPDATE.
+            response = self.client.post(reverse('notification-mark-read') + f'?ids={ids}')
+        self.assertEqual(response.data['marked'], 2)
+        self.assertFalse(Notification.objects.get(pk=foreign.pk).read)
+        self.assertEqual(self.client.get(url).data['unread_count'], 2)
+
+        self.assertEqual(self.client.post(reverse('notification-mark-all-read')).data['marked'], 2)
+        self.assertEqual(self.client.get(url).data['unread_count'], 0)
+        self.assertEqual(self.client.post(reverse('notification-mark-read') + '?ids=1,x').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self.client.post(reverse('notification-mark-read') + '?ids=1,99999999999999999999').status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+
+
+class NotificationEventTest(APITestCase):
+    """
+    Test class for the notifications generated from likes, follows, comments and messages.
+    """
+
+    def setUp(self):
+        """
+        Set up two users, the first authenticated, and a post by the second.
+        """
+        self.user = User.objects.create(email='actor@test.com', username='actor')  # The user acting.
+        self.other = User.objects.create(email='owner@test.com', username='owner')  # The user notified.
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.user).key)
+        self.post = Post.objects.create(author=self.other, title='Post', content='Content')
+
+    def test_actions_notify_after_commit(self):
+        """
+        Test that each action notifies the affected user only once its transaction commits.
+        """
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(reverse('post-like', kwargs={'pk': self.post.pk}))
+        self.assertFalse(Notification.objects.exists())  # Nothing is written during the request.
+        for callback in callbacks:
+            callback()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('post-like', kwargs={'pk': self.post.pk}))  # Liking again changes nothing.
+            self.client.post(reverse('user-follow', kwargs={'pk': self.other.pk}))
+            self.client.post(reverse('comment-list'), {'post': self.post.pk, 'text': 'Nice'})
+            self.client.post(reverse('message-list'), {'recipient': self.other.pk, 'content': 'Hello'})
+        self.assertEqual(
+            list(Notification.objects.order_by('id').values_list('user', 'actor', 'verb', 'target_id')),
+            [
+                (self.other.pk, self.user.pk, 'like', self.post.pk),
+                (self.other.pk, self.user.pk, 'follow', None),
+                (self.other.pk, self.user.pk, 'comment', self.post.pk),
+                (self.other.pk, self.user.pk, 'message', Notification.objects.latest('id').target_id),
+            ],
+        )
+        self.assertEqual(Notification.objects.get(verb='like').message, 'actor liked your post.')
+
+    def test_replies_notify_parent_author_but_not_self(self):
+        """
+        Test that a reply notifies the parent comment's author, the post's author
+        only if someone else wrote the parent, and nobody of their own action.
+        """
+        third = User.objects.create(email='third@test.com', username='third')
+        parent = Comment.objects.create(post=self.post, user=self.other, text='Parent')
+        other_parent = Comment.objects.create(post=self.post, user=third, text='Other parent')
+        own_post = Post.objects.create(author=self.user, title='Own', content='Content')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('comment-list'), {'post': self.post.pk, 'text': 'Reply', 'parent': parent.pk}) # Only a reply for the post's author.
+            self.client.post(reverse('comment-list'), {'post': self.post.pk, 'text': 'Reply', 'parent': other_parent.pk})
+            self.client.post(reverse('post-like', kwargs={'pk': own_post.pk}))
+        self.assertEqual(
+            sorted(Notification.objects.values_list('user', 'verb', 'target_id')),
+            sorted([
+                (self.other.pk, 'reply', parent.pk),
+                (third.pk, 'reply', other_parent.pk),
+                (self.other.pk, 'comment', self.post.pk),
+            ]),
+        )
+
+    def test_queue_writes_batches(self):
+        """
+        Test that queued events are written with one username query, one coalescing lookup and one bulk insert.
+        """
+        queue = NotificationQueue()
+        posts = [Post.objects.create(author=self.other, title='Post', content='Content') for _ in range(3)]
+        for post in posts:
+            queue.put(Event('like', self.other.pk, self.user.pk, post.pk))
+        with self.assertNumQueries(3):
+            self.assertEqual(queue.flush(), 3)
+        self.assertEqual(Notification.objects.filter(user=self.other, verb='like').count(), 3)
+        self.assertEqual(queue.flush(), 0)
+
+    def test_many_distinct_keys(self):
+        """
+        Test that more than a thousand distinct keys are written and coalesced into, directly and through the queue.
+        """
+        events = [Event('like', self.other.pk, self.user.pk, target_id) for target_id in range(1, 1201)]
+        write_notifications(events)
+        self.assertEqual(Notification.objects.filter(user=self.other, verb='like').count(), 1200)
+
+        liker = User.objects.create(email='liker@test.com', username='liker')
+        queue = NotificationQueue()
+        for event in events:
+            queue.put(event._replace(actor_id=liker.pk))
+        self.assertEqual(queue.flush(), 1200)
+        self.assertEqual(Notification.objects.filter(user=self.other, verb='like').count(), 1200)
+        self.assertFalse(Notification.objects.filter(user=self.other, verb='like').exclude(actor_count=2).exists())
+
+    def test_events_coalesce_until_read(self):
+        """
+        Test that events with the same recipient, verb and target update one notification until it is read.
+        """
+        likers = [User.objects.create(email=f'liker{i}@test.com', username=f'liker{i}') for i in range(5)]
+        queue = NotificationQueue()
+        for liker in likers[:2]:
+            queue.put(Event('like', self.other.pk, liker.pk, self.post.pk))
+        queue.flush()
+        for liker in likers[2:] + [likers[1]]:  # A repeated actor is not counted again.
+            queue.put(Event('like', self.other.pk, liker.pk, self.post.pk))
+        with self.assertNumQueries(3):  # Usernames, the notification to coalesce into, one bulk update.
+            queue.flush()
+        notification = Notification.objects.get(user=self.other, verb='like')
+        self.assertEqual(notification.actor_count, 5)
+        self.assertEqual(notification.latest_actor_ids, [likers[1].pk, likers[4].pk, likers[3].pk])
+        self.assertEqual(notification.message, 'liker1 and 4 others liked your post.')
+
+        notification.read = True
+        notification.save()
+        queue.put(Event('like', self.other.pk, self.user.pk, self.post.pk))
+        queue.flush()
+        fresh = Notification.objects.get(user=self.other, verb='like', read=False)
+        self.assertEqual((fresh.actor_count, fresh.message), (1, 'actor liked your post.'))
+
+    def test_events_outside_window_start_new_notification(self):
+        """
+        Test that an unread notification whose last event is older than the window is not coalesced into.
+        """
+        queue = NotificationQueue()
+        queue.put(Event('follow', self.other.pk, self.user.pk, None))
+        queue.flush()
+        with self.settings(NOTIFICATION_COALESCE_WINDOW=0):
+            queue.put(Event('follow', self.other.pk, User.objects.create(email='new@test.com', username='new').pk, None))
+            queue.flush()
+        self.assertEqual(Notification.objects.filter(user=self.other, verb='follow').count(), 2)
+
+
+class RealtimeStreamTest(TestCase):
+    """
+    Test class for the pub/sub broker and the real-time notification and message streams.
+    """
+
+    def setUp(self):
+        """
+        Set up a user with a token.
+        """
+        self.user = User.objects.create(email='test@test.com', username='testuser')
+        self.token = Token.objects.create(user=self.user)
+
+    async def test_broker_delivers_across_threads_and_bounds_buffers(self):
+        """
+        Test that events published from another thread reach the subscription and that a full buffer drops events.
+        """
+        broker = InProcessBroker()
+        subscription = broker.subscribe('user:1')
+        await asyncio.to_thread(broker.publish, 'user:1', 'notification', {'id': 1})
+        self.assertEqual(await asyncio.wait_for(subscription.get(), 1), ('notification', '{"id": 1}'))
+        with override_settings(PUBSUB_SUBSCRIPTION_BUFFER=2):
+            small = broker.subscribe('user:2')
+        for i in range(5):
+            broker.publish('user:2', 'notification', {'id': i})
+        await asyncio.sleep(0)  # Runs the scheduled deliveries.
+        self.assertEqual(small.queue.qsize(), 2)
+        broker.unsubscribe(subscription)
+        broker.unsubscribe(small)
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    async def test_event_stream(self):
+        """
+        Test that the SSE endpoint requires a token and streams the user's events.
+        """
+        url = reverse('event-stream')
+        self.assertEqual((await self.async_client.get(url)).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.async_client.get(url, {'token': self.token.key})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        next_frame = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)  # Lets the stream subscribe and wait.
+        get_broker().publish(user_channel(self.user.pk), 'notification', {'id': 7})
+        self.assertEqual(await asyncio.wait_for(next_frame, 1), b'event: notification\ndata: {"id": 7}\n\n')
+        await stream.aclose()
+
+    def test_event_stream_refused_under_wsgi(self):
+        """
+        Test that the SSE endpoint refuses to stream when not served over ASGI.
+        """
+        response = self.client.get(reverse('event-stream'), {'token': self.token.key})
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        self.assertFalse(response.streaming)
+
+    async def test_websocket_stream(self):
+        """
+        Test that the WebSocket application rejects bad tokens, pushes the user's events and stops on disconnect.
+        """
+        sent, inbox = [], asyncio.Queue()
+
+        async def send(message):
+            sent.append(message)
+
+        await inbox.put({'type': 'websocket.connect'})
+        scope = {'type': 'websocket', 'path': '/ws/stream/', 'headers': [], 'query_string': b'token=wrong'}
+        await websocket_application(scope, inbox.get, send)
+        self.assertEqual(sent.pop(), {'type': 'websocket.close', 'code': 4401})
+
+        await inbox.put({'type': 'websocket.connect'})
+        scope['headers'] = [(b'authorization', f'Token {self.token.key}'.encode())]
+        connection = asyncio.ensure_future(websocket_application(scope, inbox.get, send))
+        while not sent:
+            await asyncio.sleep(0.01)
+        self.assertEqual(sent.pop(), {'type': 'websocket.accept'})
+        get_broker().publish(user_channel(self.user.pk), 'message', {'id': 3})
+        while not sent:
+            await asyncio.sleep(0.01)
+        self.assertEqual(json.loads(sent.pop()['text']), {'type': 'message', 'data': {'id': 3}})
+        await inbox.put({'type': 'websocket.disconnect', 'code': 1000})
+        await asyncio.wait_for(connection, 1)
+
+    async def test_new_notifications_are_published(self):
+        """
+        Test that the notification writer publishes what it writes to the recipient's stream.
+        """
+        actor = await User.objects.acreate(email='actor@test.com', username='actor')
+        subscription = get_broker().subscribe(user_channel(self.user.pk))
+        try:
+            queue = NotificationQueue()
+            queue.put(Event('follow', self.user.pk, actor.pk, None))
+            await sync_to_async(queue.flush)()
+            event, data = await asyncio.wait_for(subscription.get(), 1)
+        finally:
+            get_broker().unsubscribe(subscription)
+        self.assertEqual((event, json.loads(data)['message']), ('notification', 'actor started following you.'))
+
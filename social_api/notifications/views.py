@@ -1,14 +1,21 @@
 """
 This module defines the NotificationViewSet for managing user notifications via the API.
 """
-from rest_framework import viewsets, permissions
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from social_api.conditional import ConditionalGetMixin
 from .models import Notification
 from .serializers import NotificationSerializer
 from .permissions import IsNotificationOwner
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing user notifications.
+    Reads answer conditional requests with 304 before serializing.
+    Also serves the unread count and marks notifications read in bulk.
     """
     queryset = Notification.objects.all() # The base queryset for notifications (all notifications).
     serializer_class = NotificationSerializer # The serializer class to use for notification objects.
@@ -21,4 +28,46 @@ class NotificationViewSet(viewsets.ModelViewSet):
         Returns:
             A queryset containing only the current user's notifications.
         """
-        return self.queryset.filter(user=self.request.user) # Filter the queryset to only include notifications belonging to the currently authenticated user.
\ No newline at end of file
+        return self.queryset.filter(user=self.request.user) # Filter the queryset to only include notifications belonging to the currently authenticated user.
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """
+        Returns the number of unread notifications, for the app badge.
+
+        The count reads only the partial index on the user's unread
+        notifications (`notification_user_unread_idx`), never the rows or any
+        read notification; coalescing keeps the unread set small.
+        """
+        return Response({'unread_count': self.get_queryset().filter(read=False).count()})  # One indexed COUNT over the user's unread rows.
+
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        """
+        Marks all of the user's notifications read with a single UPDATE and returns how many changed.
+        """
+        marked = self.get_queryset().filter(read=False).update(read=True, updated_at=timezone.now())  # Bumps updated_at like a save would, for conditional GETs.
+        return Response({'marked': marked}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'])
+    def mark_read(self, request):
+        """
+        Marks the given notifications read with a single UPDATE and returns how many changed.
+
+        **Query parameters:**
+            - ids: Comma-separated notification ids, at most NOTIFICATION_MARK_READ_MAX_IDS of them.
+              Ids of other users' notifications are ignored.
+        """
+        try:
+            ids = {int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()}
+            if any(not -2**63 <= pk < 2**63 for pk in ids):
+                raise ValueError('id out of the 64-bit range')
+        except ValueError:
+            return Response({'error': 'ids must be comma-separated integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > settings.NOTIFICATION_MARK_READ_MAX_IDS:
+            return Response(
+                {'error': f'At most {settings.NOTIFICATION_MARK_READ_MAX_IDS} ids can be marked at once.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        marked = self.get_queryset().filter(pk__in=ids, read=False).update(read=True, updated_at=timezone.now())  # Scoped to the user's own notifications by get_queryset.
+        return Response({'marked': marked}, status=status.HTTP_200_OK)
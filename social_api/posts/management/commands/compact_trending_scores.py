@@ -0,0 +1,18 @@
+"""
+This module defines a management command that bounds the trending candidate set.
+"""
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    """
+    Deletes trending scores that decayed below `TRENDING_MIN_SCORE` and trims
+    the rest to `TRENDING_MAX_CANDIDATES`. Meant to run periodically, e.g. from cron.
+    """
+    help = 'Drop decayed trending scores and cap the number of trending candidates.'
+
+    def handle(self, *args, **options):
+        deleted = trending.compact()
+        self.stdout.write(self.style.SUCCESS(f'Removed {deleted} trending candidates.'))
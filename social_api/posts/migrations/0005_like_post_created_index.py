@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_trending_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(fields=['post', 'created_at', 'id'], name='like_post_created_id_idx'),
+        ),
+    ]
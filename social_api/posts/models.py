@@ -3,6 +3,36 @@ This module defines the Post and Like models for a simple blogging application.
 """
 from django.db import models
 from django.conf import settings
+from social_api.fieldsets import ALL_FIELDS
+
+class PostQuerySet(models.QuerySet):
+    """
+    QuerySet for posts with helpers for loading what PostSerializer reads.
+    """
+    def for_serializer(self, fields=ALL_FIELDS):
+        """
+        Select the author and prefetch the usernames of each post's most recent
+        likers so that serializing any number of posts costs a fixed number of queries.
+
+        The sliced prefetch runs as a single window query across all posts, returning
+        at most `LIKERS_PREVIEW_SIZE` likes per post however many likes exist.
+        The join and the prefetch are skipped, and the post body is not read,
+        when `fields` leaves out `author`, `likers` or `content` respectively.
+        """
+        queryset = self.select_related('author') if 'author' in fields else self
+        if 'content' not in fields:
+            queryset = queryset.defer('content')
+        if 'likers' not in fields:
+            return queryset
+        recent_likes = (
+            Like.objects.select_related('user')
+            .only('post', 'created_at', 'user__username')
+            .order_by('-created_at', '-id')[:settings.LIKERS_PREVIEW_SIZE]
+        )
+        return queryset.prefetch_related(
+            models.Prefetch('like_set', queryset=recent_likes, to_attr='recent_likes')
+        )
+
 
 class Post(models.Model):
     """
@@ -15,11 +45,55 @@ class Post(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True) # Bumped on every write, including counter updates; drives conditional GETs.
+    # Denormalized totals, kept in step with Like and Comment rows using F() updates.
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='post_created_id_idx'),
+            models.Index(fields=['author', 'created_at', 'id'], name='post_author_created_idx'), # Supports reading an author's posts into feeds.
+        ]
 
     def __str__(self):
         return str(self.title)
 
 
+class LikeQuerySet(models.QuerySet):
+    """
+    QuerySet for likes with batch membership lookups.
+    """
+    def liked_post_ids(self, user, post_ids):
+        """
+        Return the subset of `post_ids` that `user` liked, using one query.
+        """
+        if not post_ids or user is None or not user.is_authenticated:
+            return set()
+        return set(self.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True))
+
+    def previewed_post_ids(self, user_id):
+        """
+        Return the ids of the posts whose likers preview shows `user_id`, i.e. whose
+        like is among the post's `LIKERS_PREVIEW_SIZE` most recent.
+
+        Each of the user's likes costs one bounded probe of the (post, created_at, id)
+        index for a `LIKERS_PREVIEW_SIZE`-th newer like.
+        """
+        newer = self.filter(
+            models.Q(created_at__gt=models.OuterRef('created_at'))
+            | models.Q(created_at=models.OuterRef('created_at'), id__gt=models.OuterRef('id')),
+            post=models.OuterRef('post'),
+        ).order_by('created_at', 'id').values('id')[settings.LIKERS_PREVIEW_SIZE - 1:settings.LIKERS_PREVIEW_SIZE]
+        return (
+            self.filter(user_id=user_id).annotate(displaced_by=models.Subquery(newer))
+            .filter(displaced_by__isnull=True).values_list('post_id', flat=True)
+        )
+
+
 class Like(models.Model):
     """
     Represents a like on a post by a user.
@@ -31,8 +105,27 @@ class Like(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = LikeQuerySet.as_manager()
+
     class Meta:
         unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['post', 'created_at', 'id'], name='like_post_created_id_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user} likes {self.post}"
\ No newline at end of file
+        return f"{self.user} likes {self.post}"
+
+
+class TrendingScore(models.Model):
+    """
+    Time-decayed engagement score of a post, maintained by `posts.trending`.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='trending_score')
+    # Logarithm of the undecayed score; see posts.trending for the encoding.
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score'], name='trending_score_idx'),
+        ]
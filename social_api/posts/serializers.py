@@ -2,20 +2,35 @@
 This module defines the PostSerializer for serializing and deserializing Post objects.
 """
 from rest_framework import serializers
-from .models import Post
+from django.conf import settings
+from accounts.models import Follow
+from social_api.caching import CachedRepresentationMixin, RepresentationCache
+from social_api.fieldsets import SparseFieldsetMixin
+from social_api.serializers import ViewerContextListSerializer, get_viewer
+from .models import Post, Like
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsetMixin, CachedRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer for the Post model.
+    Representations are cached per post and author version; the viewer flags are always recomputed.
     """
+    representation_cache = RepresentationCache(
+        'post', dependencies=lambda post: [('post', post.pk), ('user', post.author_id)]
+    )
+    uncached_fields = ('liked_by_me', 'following')
+
     author = serializers.ReadOnlyField(source='author.username')
 
-    # Added fields to display the total number of likes and the users who liked the post
-    likes_count = serializers.SerializerMethodField()
+    # Added field to display a preview of the users who most recently liked the post
     likers = serializers.SerializerMethodField()
 
+    # Viewer-relative flags: whether the requesting user liked the post and follows its author
+    liked_by_me = serializers.SerializerMethodField()
+    following = serializers.SerializerMethodField()
+
     class Meta:
         model = Post
+        list_serializer_class = ViewerContextListSerializer
         fields = [
             'id',
             'title',
@@ -23,17 +38,69 @@ class PostSerializer(serializers.ModelSerializer):
             'author',
             'created_at',
             'likes_count',
+            'comments_count',
             'likers',
+            'liked_by_me',
+            'following',
         ]
+        read_only_fields = ['likes_count', 'comments_count']
+
+    def get_viewer_context(self, posts):
+        """
+        Look up, with one query each, which of the posts the viewer liked and which authors they follow.
+        Lookups for flags left out by a sparse fieldset are skipped.
+        """
+        viewer = get_viewer(self)
+        context = {}
+        if 'liked_by_me' in self.fields:
+            context['liked_post_ids'] = Like.objects.liked_post_ids(viewer, [post.pk for post in posts])
+        if 'following' in self.fields:
+            context['followed_user_ids'] = Follow.objects.followed_ids(viewer, {post.author_id for post in posts})
+        return context
+
+    def get_liked_by_me(self, obj):
+        """
+        Return whether the requesting user liked this post.
+        """
+        liked = self.context.get('liked_post_ids')
+        if liked is None:
+            liked = Like.objects.liked_post_ids(get_viewer(self), [obj.pk])
+        return obj.pk in liked
 
-    def get_likes_count(self, obj):
+    def get_following(self, obj):
         """
-        Return the total number of likes for this post.
+        Return whether the requesting user follows the author of this post.
         """
-        return obj.like_set.count()
+        followed = self.context.get('followed_user_ids')
+        if followed is None:
+            followed = Follow.objects.followed_ids(get_viewer(self), [obj.author_id])
+        return obj.author_id in followed
 
     def get_likers(self, obj):
         """
-        Return a list of usernames who liked this post.
+        Return the usernames of the most recent `LIKERS_PREVIEW_SIZE` likers of this post.
+        The full list is served by the paginated /api/posts/{id}/likers/ endpoint.
+
+        Uses the `recent_likes` list added by `PostQuerySet.for_serializer`
+        and falls back to a single username query for a bare Post.
         """
-        return [like.user.username for like in obj.like_set.all()]
\ No newline at end of file
+        likes = getattr(obj, 'recent_likes', None)
+        if likes is None:
+            return list(
+                obj.like_set.order_by('-created_at', '-id')
+                .values_list('user__username', flat=True)[:settings.LIKERS_PREVIEW_SIZE]
+            )
+        return [like.user.username for like in likes]
+
+
+class LikerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Serializer for a user who liked a post, as listed by the likers endpoint.
+    """
+    id = serializers.ReadOnlyField(source='user.id')
+    username = serializers.ReadOnlyField(source='user.username')
+    liked_at = serializers.DateTimeField(source='created_at', read_only=True)
+
+    class Meta:
+        model = Like
+        fields = ['id', 'username', 'liked_at']
\ No newline at end of file
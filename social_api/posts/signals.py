@@ -0,0 +1,96 @@
+"""
+This module feeds like and comment events into the trending scores and
+invalidates cached post representations when a post, like or comment changes
+or when a user shown among a post's recent likers is renamed.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from social_api import background
+from social_api.caching import invalidate, invalidate_many
+from .models import Post, Like
+from . import trending
+
+INVALIDATION_CHUNK_SIZE = 1000
+
+
+def like_created(sender, instance, created, **kwargs):
+    """
+    Add a new like to its post's score.
+    """
+    if created:
+        trending.record_event(instance.post_id, settings.TRENDING_LIKE_WEIGHT, at=instance.created_at)
+
+
+def like_deleted(sender, instance, **kwargs):
+    """
+    Remove a deleted like's decayed contribution from its post's score.
+    """
+    trending.record_event(instance.post_id, -settings.TRENDING_LIKE_WEIGHT, at=instance.created_at)
+
+
+def comment_created(sender, instance, created, **kwargs):
+    """
+    Add a new comment to its post's score.
+    """
+    if created:
+        trending.record_event(instance.post_id, settings.TRENDING_COMMENT_WEIGHT, at=instance.created_at)
+
+
+def comment_deleted(sender, instance, **kwargs):
+    """
+    Remove a deleted comment's decayed contribution from its post's score.
+    """
+    trending.record_event(instance.post_id, -settings.TRENDING_COMMENT_WEIGHT, at=instance.created_at)
+
+
+def invalidate_post(sender, instance, **kwargs):
+    """
+    Invalidate the cached representation of a saved or deleted post.
+    """
+    invalidate('post', instance.pk)
+
+
+def invalidate_parent_post(sender, instance, **kwargs):
+    """
+    Invalidate the cached representation of the post a like or comment belongs to.
+    """
+    invalidate('post', instance.post_id)
+
+
+def invalidate_previewed_posts(user_id):
+    """
+    Invalidate the cached posts whose likers preview shows the user, a chunk at a time.
+    """
+    post_ids = Like.objects.previewed_post_ids(user_id).iterator(chunk_size=INVALIDATION_CHUNK_SIZE)
+    while chunk := list(islice(post_ids, INVALIDATION_CHUNK_SIZE)):
+        invalidate_many('post', chunk)
+
+
+def invalidate_liked_posts(sender, instance, created, update_fields=None, **kwargs):
+    """
+    After a rename, invalidate the cached posts whose likers preview shows the
+    user. A heavy liker can be previewed on many posts, so this runs in the
+    background once the rename commits; other saves skip it.
+    """
+    if created or (update_fields is not None and 'username' not in update_fields) or not instance.username_changed():
+        return
+    user_id = instance.pk
+    transaction.on_commit(lambda: background.run(invalidate_previewed_posts, user_id))
+
+
+post_save.connect(like_created, sender=Like, dispatch_uid='trending_like_created')
+post_delete.connect(like_deleted, sender=Like, dispatch_uid='trending_like_deleted')
+# Comments live in an app that depends on this one, so they are referenced lazily.
+post_save.connect(comment_created, sender='comments.Comment', dispatch_uid='trending_comment_created')
+post_delete.connect(comment_deleted, sender='comments.Comment', dispatch_uid='trending_comment_deleted')
+post_save.connect(invalidate_post, sender=Post, dispatch_uid='cache_post_saved')
+post_delete.connect(invalidate_post, sender=Post, dispatch_uid='cache_post_deleted')
+post_save.connect(invalidate_parent_post, sender=Like, dispatch_uid='cache_like_saved')
+post_delete.connect(invalidate_parent_post, sender=Like, dispatch_uid='cache_like_deleted')
+post_save.connect(invalidate_parent_post, sender='comments.Comment', dispatch_uid='cache_comment_saved')
+post_delete.connect(invalidate_parent_post, sender='comments.Comment', dispatch_uid='cache_comment_deleted')
+post_save.connect(invalidate_liked_posts, sender=settings.AUTH_USER_MODEL, dispatch_uid='cache_liker_renamed')
@@ -1,12 +1,22 @@
 """
 This module contains unit and API tests for the Post and Like models.
 """
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
-from accounts.models import User
-from .models import Post, Like
+from accounts.models import User, Follow
+from comments.models import Comment
+from .models import Post, Like, TrendingScore
+from .serializers import PostSerializer
+from . import trending
 from rest_framework.authtoken.models import Token
 
 class PostModelTest(TestCase):
@@ -52,7 +62,7 @@ class PostAPITest(APITestCase):
         url = reverse('post-list') # Gets the URL for the post list endpoint.
         response = self.client.get(url) # Makes a GET request to the post list endpoint.
         self.assertEqual(response.status_code, status.HTTP_200_OK) # Asserts that the response status code is 200 OK.
-        self.assertEqual(len(response.data), 1) # Asserts that the response contains one post (the one created in setUp).
+        self.assertEqual(len(response.data['results']), 1) # Asserts that the response page contains one post (the one created in setUp).
 
     def test_post_create(self):
         """
@@ -113,4 +123,242 @@ class PostAPITest(APITestCase):
         self.assertTrue(Like.objects.filter(user=self.user, post=self.post).exists()) # Checks that the like object was created in the database.
         res = self.client.post(url_unlike) # Makes a POST request to unlike the post.
         self.assertEqual(res.status_code, status.HTTP_200_OK) # Asserts that the unlike request was successful.
-        self.assertFalse(Like.objects.filter(user=self.user, post=self.post).exists()) # Checks that the like object was deleted from the database.
\ No newline at end of file
+        self.assertFalse(Like.objects.filter(user=self.user, post=self.post).exists()) # Checks that the like object was deleted from the database.
+
+    def test_post_list_query_count_is_constant(self):
+        """
+        Test that listing 50 posts costs the same number of queries however many likes they have.
+        """
+        likers = [User.objects.create(email=f'liker{i}@test.com', username=f'liker{i}') for i in range(5)] # Creates users without hashing a password.
+        posts = [Post.objects.create(author=self.user, title=f'Post {i}', content='Content') for i in range(49)] + [self.post] # 50 posts in total.
+        url = reverse('post-list') + '?page_size=50' # Requests a single page of 50 posts.
+        Like.objects.bulk_create([Like(user=likers[0], post=post) for post in posts]) # One like per post.
+        cache.clear() # Measures a cold representation cache.
+        with self.assertNumQueries(8): # Token lookup, validator page, viewer's follow state, page ids, full posts, prefetched likers, viewer's likes, viewer's follows.
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        Like.objects.bulk_create([Like(user=liker, post=post) for liker in likers[1:] for post in posts]) # Five likes per post, bypassing signals.
+        cache.clear() # bulk_create sends no signals, so drop the cached representations by hand.
+        with self.assertNumQueries(7): # The same queries, except that the token is now resolved from the cache.
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 50)
+        self.assertTrue(all(len(item['likers']) == 3 for item in response.data['results'])) # Only the bounded likers preview is embedded.
+
+    def test_post_representation_cache(self):
+        """
+        Test that cached posts skip the full load and that likes, edits and author renames invalidate them.
+        """
+        url = reverse('post-detail', kwargs={'pk': self.post.pk}) # Gets the URL for the post detail endpoint.
+        self.client.get(url) # Fills the cache.
+        with self.assertNumQueries(5): # Validator row, viewer's follow state, the post's page fields, viewer's likes, viewer's follows.
+            response = self.client.get(url)
+        self.assertEqual(response.data['title'], 'Test Post')
+        self.client.post(reverse('post-like', kwargs={'pk': self.post.pk}))
+        response = self.client.get(url)
+        self.assertEqual((response.data['likes_count'], response.data['liked_by_me']), (1, True))
+        self.client.put(url, {'title': 'Updated Post', 'content': 'Updated Content'})
+        self.assertEqual(self.client.get(url).data['title'], 'Updated Post')
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertEqual(self.client.get(url).data['author'], 'renamed')
+
+    def test_liker_rename_invalidates_cached_posts(self):
+        """
+        Test that renaming a user refreshes the cached posts showing them among the recent likers, and only those.
+        """
+        liker = User.objects.create(email='liker@test.com', username='liker') # Creates a user without hashing a password.
+        older = Post.objects.create(author=self.user, title='Older', content='Content')
+        Like.objects.create(user=liker, post=self.post)
+        Like.objects.create(user=liker, post=older)
+        for i in range(3):
+            Like.objects.create(user=User.objects.create(email=f'other{i}@test.com', username=f'other{i}'), post=older) # Pushes the liker out of the older post's preview.
+        self.assertEqual(list(Like.objects.previewed_post_ids(liker.pk)), [self.post.pk])
+        url = reverse('post-detail', kwargs={'pk': self.post.pk})
+        self.assertEqual(self.client.get(url).data['likers'], ['liker']) # Fills the cache.
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            liker.is_staff = True
+            liker.save() # Saves that keep the username skip the lookup.
+        self.assertFalse(any('posts_like' in query['sql'] for query in queries))
+        with self.captureOnCommitCallbacks(execute=True):
+            liker.username = 'renamed'
+            liker.save()
+        self.assertEqual(self.client.get(url).data['likers'], ['renamed'])
+
+    def test_post_conditional_get(self):
+        """
+        Test that unchanged posts are answered with 304 before serialization and that likes, follows and renames change the ETag.
+        """
+        url = reverse('post-list')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(2): # Validator page, viewer's follow state; the token comes from the cache.
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.client.post(reverse('post-like', kwargs={'pk': self.post.pk})) # Liking bumps the post's updated_at.
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        Follow.objects.create(follower=self.user, following=User.objects.create(email='other@test.com', username='other')) # Changes the viewer's following flags.
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+        detail = reverse('post-detail', kwargs={'pk': self.post.pk})
+        etag = self.client.get(detail)['ETag']
+        self.assertEqual(self.client.get(detail, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.user.username = 'renamed'
+        self.user.save() # Changes the embedded author name.
+        self.assertEqual(self.client.get(detail, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_sparse_fieldsets(self):
+        """
+        Test that ?fields= and ?omit= trim posts and skip the queries behind the dropped fields.
+        """
+        self.client.post(reverse('post-like', kwargs={'pk': self.post.pk})) # Likes the post and bumps its counter.
+        url = reverse('post-list')
+        cache.clear() # Measures a cold representation cache.
+        with self.assertNumQueries(4): # Validator page, viewer's follow state, page ids, posts joined with authors.
+            response = self.client.get(url, {'fields': 'id,title,author,created_at'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'author', 'created_at'})
+        full = self.client.get(url).data['results'][0] # The sparse request must not have cached a partial post.
+        self.assertEqual((full['content'], full['likers'], full['liked_by_me']), ('Test Content', ['testuser'], True))
+        response = self.client.get(url, {'omit': 'likers,content'}) # Served from the cache this time.
+        self.assertNotIn('likers', response.data['results'][0])
+        self.assertEqual(response.data['results'][0]['likes_count'], 1)
+        response = self.client.post(url + '?fields=id', {'title': 'New', 'content': 'Body'}) # Writes ignore the selection.
+        self.assertEqual(response.data['title'], 'New')
+
+    def test_bare_post_serialization(self):
+        """
+        Test that the serializer still works for a Post without annotations or prefetches.
+        """
+        Like.objects.create(user=self.user, post=self.post) # Likes the post.
+        data = PostSerializer(Post.objects.get(pk=self.post.pk)).data # Serializes a bare post.
+        self.assertEqual(data['likers'], ['testuser'])
+
+    @override_settings(LIKERS_PREVIEW_SIZE=2)
+    def test_likers_preview_and_endpoint(self):
+        """
+        Test that posts embed only the most recent likers and the likers endpoint pages through all of them.
+        """
+        for i in range(3):
+            liker = User.objects.create(email=f'liker{i}@test.com', username=f'liker{i}') # Creates users without hashing a password.
+            Like.objects.create(user=liker, post=self.post)
+        response = self.client.get(reverse('post-detail', kwargs={'pk': self.post.pk}))
+        self.assertEqual(response.data['likers'], ['liker2', 'liker1']) # Most recent first, capped at the preview size.
+        url = reverse('post-likers', kwargs={'pk': self.post.pk}) + '?page_size=2' # Gets the URL for the likers endpoint.
+        response = self.client.get(url)
+        self.assertEqual([liker['username'] for liker in response.data['results']], ['liker2', 'liker1'])
+        response = self.client.get(response.data['next']) # Follows the cursor to the next page.
+        self.assertEqual([liker['username'] for liker in response.data['results']], ['liker0'])
+
+    def test_viewer_flags(self):
+        """
+        Test that posts report whether the viewer liked them and follows their author.
+        """
+        other_user = User.objects.create(email='other@test.com', username='otheruser') # Creates another author.
+        other_post = Post.objects.create(author=other_user, title='Other Post', content='Content')
+        Like.objects.create(user=self.user, post=other_post) # The viewer likes the other post.
+        Follow.objects.create(follower=self.user, following=other_user) # The viewer follows the other author.
+        response = self.client.get(reverse('post-list'))
+        flags = {item['id']: (item['liked_by_me'], item['following']) for item in response.data['results']}
+        self.assertEqual(flags, {other_post.pk: (True, True), self.post.pk: (False, False)})
+        self.client.credentials() # Anonymous viewers get False flags.
+        response = self.client.get(reverse('post-detail', kwargs={'pk': other_post.pk}))
+        self.assertEqual((response.data['liked_by_me'], response.data['following']), (False, False))
+
+    def test_like_counter_only_changes_on_state_change(self):
+        """
+        Test that repeated like/unlike requests do not double count.
+        """
+        url_like = reverse('post-like', kwargs={'pk': self.post.pk}) # Gets the URL for the like endpoint.
+        url_unlike = reverse('post-unlike', kwargs={'pk': self.post.pk}) # Gets the URL for the unlike endpoint.
+        self.client.post(url_like)
+        self.client.post(url_like) # Liking twice must not count twice.
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.client.post(url_unlike)
+        self.client.post(url_unlike) # Unliking twice must not go below zero.
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_reconcile_post_counters(self):
+        """
+        Test that the reconcile command repairs drifted counters.
+        """
+        Like.objects.create(user=self.user, post=self.post) # Creates a like without touching the counter.
+        Post.objects.filter(pk=self.post.pk).update(comments_count=7) # Simulates a drifted comment counter.
+        call_command('reconcile_post_counters', chunk_size=1, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_post_list_cursor_pagination(self):
+        """
+        Test that the post list is cursor-paginated newest first without a total count.
+        """
+        newer = Post.objects.create(author=self.user, title='Newer Post', content='Content') # Creates a second, newer post.
+        response = self.client.get(reverse('post-list') + '?page_size=1') # Requests the first page of one post.
+        self.assertNotIn('count', response.data) # Cursor pagination never counts the table.
+        self.assertEqual([item['id'] for item in response.data['results']], [newer.pk])
+        response = self.client.get(response.data['next']) # Follows the cursor to the next page.
+        self.assertEqual([item['id'] for item in response.data['results']], [self.post.pk])
+        self.assertIsNone(response.data['next'])
+
+
+class TrendingTest(APITestCase):
+    """
+    Tests for the incrementally maintained trending scores.
+    """
+    def setUp(self):
+        """
+        Set up method to create a user and two posts before each test.
+        """
+        self.user = User.objects.create(email='test@test.com', username='testuser') # Creates a user without hashing a password.
+        self.liked = Post.objects.create(author=self.user, title='Liked', content='Content') # A post that will get a like.
+        self.commented = Post.objects.create(author=self.user, title='Commented', content='Content') # A post that will get a comment.
+
+    def trending_titles(self):
+        """
+        Helper method to return the titles returned by the trending endpoint.
+        """
+        response = self.client.get(reverse('post-trending'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post['title'] for post in response.data]
+
+    def test_comments_outweigh_likes(self):
+        """
+        Test that events update scores and that a comment weighs more than a like.
+        """
+        Like.objects.create(user=self.user, post=self.liked)
+        Comment.objects.create(user=self.user, post=self.commented, text='Nice')
+        self.assertEqual(self.trending_titles(), ['Commented', 'Liked'])
+
+    def test_scores_decay_over_time(self):
+        """
+        Test that an older event counts for less than a recent one.
+        """
+        now = timezone.now()
+        trending.record_event(self.commented.pk, 2.0, at=now - timedelta(hours=24), now=now) # Four half-lives ago, worth 2/16 now.
+        trending.record_event(self.liked.pk, 1.0, at=now, now=now)
+        self.assertEqual(self.trending_titles(), ['Liked', 'Commented'])
+        score = TrendingScore.objects.get(post=self.commented).score
+        self.assertAlmostEqual(trending.decayed_score(score, now=now), 2.0 / 16)
+
+    def test_unlike_removes_contribution(self):
+        """
+        Test that deleting a like removes what it added.
+        """
+        like = Like.objects.create(user=self.user, post=self.liked)
+        like.delete()
+        score = TrendingScore.objects.get(post=self.liked).score
+        self.assertLess(trending.decayed_score(score), 1e-6)
+
+    @override_settings(TRENDING_MAX_CANDIDATES=1)
+    def test_compact_trending_scores(self):
+        """
+        Test that compaction drops decayed posts and caps the candidate set.
+        """
+        Like.objects.create(user=self.user, post=self.liked)
+        Comment.objects.create(user=self.user, post=self.commented, text='Nice')
+        call_command('compact_trending_scores', stdout=StringIO())
+        self.assertEqual(list(TrendingScore.objects.values_list('post_id', flat=True)), [self.commented.pk])
@@ -0,0 +1,94 @@
+"""
+This module maintains time-decayed trending scores for posts.
+
+Every like or comment adds `weight * exp(-decay * age)` to its post's score,
+so an event loses half of its weight every `TRENDING_HALF_LIFE_HOURS`. Because
+all scores decay at the same rate, the stored value is the logarithm of the
+undecayed sum, `ln(sum(weight * exp(decay * event_time)))`. Ordering by the
+stored value is then the same as ordering by the decayed score, so events only
+touch their own post's row and no job has to rewrite every score as time passes.
+"""
+import math
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Exp, Greatest, Ln
+from django.utils import timezone
+
+from .models import TrendingScore
+
+# Floor used instead of taking the logarithm of zero after removals.
+EPSILON = 1e-9
+
+
+def decay_rate():
+    """
+    Return the per-hour decay constant for `TRENDING_HALF_LIFE_HOURS`.
+    """
+    return math.log(2) / settings.TRENDING_HALF_LIFE_HOURS
+
+
+def log_time(at):
+    """
+    Return `decay * at` with `at` measured in hours, the log-domain scale of an event at time `at`.
+    """
+    return decay_rate() * at.timestamp() / 3600
+
+
+def record_event(post_id, weight, at=None, now=None):
+    """
+    Add an event of the given weight that happened at `at` to a post's score.
+
+    A negative weight removes a previously recorded event; pass the original
+    event time as `at` so exactly its decayed contribution is removed.
+    """
+    now = now or timezone.now()
+    at = at or now
+    base = log_time(now)
+    # The event's contribution, scaled to the current time so exp() stays in range.
+    contribution = weight * math.exp(log_time(at) - base)
+    score = Value(base) + Ln(Greatest(Exp(F('score') - Value(base)) + Value(contribution), Value(EPSILON)))
+    if TrendingScore.objects.filter(post_id=post_id).update(score=score):
+        return
+    if contribution <= 0:
+        return
+    try:
+        with transaction.atomic():
+            TrendingScore.objects.create(post_id=post_id, score=base + math.log(contribution))
+    except IntegrityError:
+        # Another request created the row first; apply the event to it instead.
+        TrendingScore.objects.filter(post_id=post_id).update(score=score)
+
+
+def decayed_score(stored, now=None):
+    """
+    Convert a stored log-domain score to the decayed score at `now`.
+    """
+    return math.exp(stored - log_time(now or timezone.now()))
+
+
+def top_post_ids(limit):
+    """
+    Return the ids of the `limit` highest scoring posts, best first, by reading the score index.
+    """
+    return list(TrendingScore.objects.order_by('-score').values_list('post_id', flat=True)[:limit])
+
+
+def compact(now=None):
+    """
+    Drop scores that decayed below `TRENDING_MIN_SCORE` and keep at most
+    `TRENDING_MAX_CANDIDATES` rows. Returns the number of deleted rows.
+    """
+    now = now or timezone.now()
+    floor = log_time(now) + math.log(settings.TRENDING_MIN_SCORE)
+    deleted, _ = TrendingScore.objects.filter(score__lt=floor).delete()
+    cutoff = (
+        TrendingScore.objects.order_by('-score')
+        .values_list('score', flat=True)[settings.TRENDING_MAX_CANDIDATES:settings.TRENDING_MAX_CANDIDATES + 1]
+    )
+    cutoff = list(cutoff)
+    if cutoff:
+        extra, _ = TrendingScore.objects.filter(score__lte=cutoff[0]).delete()
+        deleted += extra
+    return deleted
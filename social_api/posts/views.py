@@ -1,30 +1,74 @@
 """
 This module defines the PostViewSet for managing posts and likes using Django REST Framework.
 """
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 from rest_framework import viewsets, status
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from accounts.models import Follow, UserStats
+from notifications import events
 from .models import Post, Like
-from .serializers import PostSerializer
+from .serializers import PostSerializer, LikerSerializer
 from .permissions import IsAuthorOrReadOnly
+from social_api.caching import CachedRepresentationViewMixin
+from social_api.conditional import ConditionalGetMixin
+from social_api.fieldsets import get_field_selection
+from . import trending
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(ConditionalGetMixin, CachedRepresentationViewMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing posts and likes.
     Provides CRUD operations for posts and like/unlike actions.
+    List and retrieve serve cached representations and only load cache misses in full,
+    and answer conditional requests with 304 before loading anything.
     """
     queryset = Post.objects.all()
+    cache_page_fields = ('id', 'created_at', 'author')
+    conditional_fields = ('id', 'created_at', 'updated_at', 'author')
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
 
+    def get_queryset(self):
+        """
+        Load posts together with everything PostSerializer reads for the requested fields.
+        The likers action only needs the post itself.
+        """
+        if self.action == 'likers':
+            return Post.objects.all()
+        return Post.objects.for_serializer(get_field_selection(self.request))
+
+    def get_validator_extras(self, items):
+        """
+        Posts also depend on whom the viewer follows, and embed their authors'
+        usernames, whose changes are tracked by the representation cache versions.
+        """
+        return (
+            Follow.objects.state_token(self.request.user),
+            self.get_serializer_class().representation_cache.version_token(items),
+        )
+
     def perform_create(self, serializer):
         """
         Override the default perform_create method to set the author of the post
-        to the current user.
+        to the current user, and increment the author's post counter.
+        """
+        with transaction.atomic():
+            serializer.save(author=self.request.user)
+            UserStats.objects.adjust(self.request.user.pk, posts_count=1)
+
+    def perform_destroy(self, instance):
+        """
+        Delete the post and decrement its author's post counter.
         """
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            _, deleted = Post.objects.filter(pk=instance.pk).delete()
+            if deleted.get('posts.Post'):
+                UserStats.objects.adjust(instance.author_id, posts_count=-deleted['posts.Post'])
         
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
@@ -34,20 +78,67 @@ class PostViewSet(viewsets.ModelViewSet):
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-    @action(detail=True, methods=['post'], permission_classes=[IsAuthorOrReadOnly])
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def like(self, request, pk=None):
         """
         Allows a user to like a post.
+        The post's like counter is only incremented, and the author only notified, when a new Like row is created.
         """
         post = self.get_object()
-        Like.objects.get_or_create(user=request.user, post=post)
+        with transaction.atomic():
+            like, created = Like.objects.get_or_create(user=request.user, post=post)
+            if created:
+                Post.objects.filter(pk=post.pk).update(
+                    likes_count=F('likes_count') + 1, updated_at=timezone.now()
+                )
+                events.emit('like', recipient_id=post.author_id, actor_id=request.user.pk, target_id=post.pk)
         return Response({'status': 'liked'}, status=status.HTTP_200_OK)
 
-    @action(detail=True, methods=['post'], permission_classes=[IsAuthorOrReadOnly])
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def unlike(self, request, pk=None):
         """
         Allows a user to unlike a post.
+        The post's like counter is only decremented when a Like row is deleted.
         """
         post = self.get_object()
-        Like.objects.filter(user=request.user, post=post).delete()
-        return Response({'status': 'unliked'}, status=status.HTTP_200_OK)
\ No newline at end of file
+        with transaction.atomic():
+            deleted, _ = Like.objects.filter(user=request.user, post=post).delete()
+            if deleted:
+                Post.objects.filter(pk=post.pk).update(
+                    likes_count=F('likes_count') - deleted, updated_at=timezone.now()
+                )
+        return Response({'status': 'unliked'}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def likers(self, request, pk=None):
+        """
+        Returns the users who liked a post, most recent first, cursor-paginated.
+        """
+        post = self.get_object()
+        fields = get_field_selection(request)
+        likes = Like.objects.filter(post=post).only('created_at')
+        if 'id' in fields or 'username' in fields:
+            likes = likes.select_related('user').only('created_at', 'user__username')
+        page = self.paginate_queryset(likes)
+        serializer = LikerSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        """
+        Returns the top trending posts, ranked by likes and comments with exponential time decay.
+
+        **Query parameters:**
+            - limit: Number of posts to return (default and maximum TRENDING_TOP_K).
+
+        Scores are maintained incrementally as events happen, so this reads the
+        top of the score index and loads only those posts.
+        """
+        try:
+            limit = min(int(request.query_params.get('limit', settings.TRENDING_TOP_K)), settings.TRENDING_TOP_K)
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        post_ids = trending.top_post_ids(max(limit, 0))
+        posts = self.get_queryset().in_bulk(post_ids)
+        serializer = self.get_serializer([posts[pk] for pk in post_ids if pk in posts], many=True)
+        return Response(serializer.data)
@@ -0,0 +1,204 @@
+"""
+This module defines the pluggable search backends.
+
+A backend stores `Document`s and answers ranked queries. Results are ordered
+best first and paginated with an opaque keyset cursor: each hit carries the
+cursor that resumes the search right after it.
+
+The backend is chosen with the `SEARCH_BACKEND` setting.
+"""
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .documents import DOC_TYPES, get_models
+
+
+class SearchHit(NamedTuple):
+    doc_type: str
+    object_id: int
+    score: float
+    cursor: str
+
+
+def tokenize(query):
+    """
+    Split a free-text query into lowercase word tokens.
+    """
+    return re.findall(r'\w+', query.lower())
+
+
+class BaseSearchBackend:
+    """
+    Interface implemented by every search backend.
+    """
+
+    def index(self, documents):
+        """
+        Add or replace the given documents in the index.
+        """
+        raise NotImplementedError
+
+    def remove(self, doc_type, object_id):
+        """
+        Remove a single document from the index.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        """
+        Remove every document from the index.
+        """
+        raise NotImplementedError
+
+    def search(self, query, doc_types=None, after=None, limit=20):
+        """
+        Return up to `limit` SearchHits for `query`, best first.
+
+        `doc_types` restricts the document types searched, and `after` is the
+        cursor of the last hit of the previous page. Raises ValueError for a
+        malformed cursor.
+        """
+        raise NotImplementedError
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """
+    Inverted index stored in an SQLite FTS5 virtual table and ranked by BM25.
+
+    The table's rowid encodes the document type and object id, so replacing or
+    removing a document is a rowid lookup rather than a scan of the index.
+    """
+    table = 'search_index'
+    type_codes = {'post': 1, 'comment': 2, 'user': 3}
+    type_slots = 4
+    # BM25 column weights: title matches count ten times as much as body matches.
+    weights = (10.0, 1.0)
+
+    def _rowid(self, doc_type, object_id):
+        return object_id * self.type_slots + self.type_codes[doc_type]
+
+    def _split_rowid(self, rowid):
+        object_id, code = divmod(rowid, self.type_slots)
+        doc_type = next(name for name, value in self.type_codes.items() if value == code)
+        return doc_type, object_id
+
+    def index(self, documents):
+        rows = [(self._rowid(doc.doc_type, doc.object_id), doc.title, doc.body) for doc in documents]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(f'INSERT INTO {self.table} (rowid, title, body) VALUES (%s, %s, %s)', rows)
+
+    def remove(self, doc_type, object_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [self._rowid(doc_type, object_id)])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def search(self, query, doc_types=None, after=None, limit=20):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Quoting every token keeps user input from being parsed as FTS5 syntax.
+        match = ' '.join(f'"{token}"' for token in tokens)
+        sql = (
+            f'SELECT rid, score FROM ('
+            f'SELECT rowid AS rid, bm25({self.table}, %s, %s) AS score '
+            f'FROM {self.table} WHERE {self.table} MATCH %s'
+            f') WHERE 1 = 1'
+        )
+        params = [*self.weights, match]
+        if doc_types:
+            codes = [self.type_codes[doc_type] for doc_type in doc_types]
+            sql += f' AND rid %% {self.type_slots} IN ({", ".join(["%s"] * len(codes))})'
+            params += codes
+        if after:
+            score, rowid = self._parse_cursor(after)
+            sql += ' AND (score > %s OR (score = %s AND rid > %s))'
+            params += [score, score, rowid]
+        sql += ' ORDER BY score, rid LIMIT %s'
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        # BM25 scores are negative, lower is better; hits expose them as positive relevance.
+        return [
+            SearchHit(*self._split_rowid(rowid), score=-score, cursor=f'{score!r}:{rowid}')
+            for rowid, score in rows
+        ]
+
+    def _parse_cursor(self, cursor):
+        score, rowid = cursor.split(':')
+        return float(score), int(rowid)
+
+
+class ScanBackend(BaseSearchBackend):
+    """
+    Unindexed fallback for databases without FTS5.
+
+    Scans the searchable models with `icontains` and orders hits by type and
+    newest object first. Indexing calls are no-ops.
+    """
+    search_fields = {
+        'post': ('title', 'content'),
+        'comment': ('text',),
+        'user': ('username',),
+    }
+
+    def index(self, documents):
+        pass
+
+    def remove(self, doc_type, object_id):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, query, doc_types=None, after=None, limit=20):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        types = [doc_type for doc_type in DOC_TYPES if not doc_types or doc_type in doc_types]
+        after_type, after_id = None, None
+        if after:
+            after_type, after_id = after.split(':')
+            after_id = int(after_id)
+            if after_type not in types:
+                raise ValueError(f'Unknown document type {after_type!r}.')
+            types = types[types.index(after_type):]
+
+        hits = []
+        models = get_models()
+        for doc_type in types:
+            condition = Q()
+            for token in tokens:
+                condition &= Q(*[Q(**{f'{field}__icontains': token}) for field in self.search_fields[doc_type]], _connector=Q.OR)
+            queryset = models[doc_type].objects.filter(condition).order_by('-pk')
+            if doc_type == after_type:
+                queryset = queryset.filter(pk__lt=after_id)
+            for pk in queryset.values_list('pk', flat=True)[:limit - len(hits)]:
+                hits.append(SearchHit(doc_type, pk, 0.0, f'{doc_type}:{pk}'))
+            if len(hits) >= limit:
+                break
+        return hits
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path):
+    return import_string(path)()
+
+
+def get_backend():
+    """
+    Return the backend configured by the `SEARCH_BACKEND` setting.
+    """
+    return _load_backend(settings.SEARCH_BACKEND)
@@ -0,0 +1,53 @@
+"""
+This module maps searchable model instances to search documents.
+
+Each document has a type ('post', 'comment' or 'user'), the primary key of
+the indexed object, a short title and a longer body.
+"""
+from typing import NamedTuple
+
+from django.contrib.auth import get_user_model
+
+from comments.models import Comment
+from posts.models import Post
+
+
+class Document(NamedTuple):
+    doc_type: str
+    object_id: int
+    title: str
+    body: str
+
+
+DOC_TYPES = ('post', 'comment', 'user')
+
+
+def get_models():
+    """
+    Return the searchable models keyed by document type.
+    """
+    return {'post': Post, 'comment': Comment, 'user': get_user_model()}
+
+
+def doc_type_for(instance):
+    """
+    Return the document type of a model instance, or None if it is not searchable.
+    """
+    for doc_type, model in get_models().items():
+        if isinstance(instance, model):
+            return doc_type
+    return None
+
+
+def build_document(instance):
+    """
+    Return the Document indexed for a searchable model instance.
+    """
+    doc_type = doc_type_for(instance)
+    if doc_type == 'post':
+        return Document(doc_type, instance.pk, instance.title, instance.content)
+    if doc_type == 'comment':
+        return Document(doc_type, instance.pk, '', instance.text)
+    if doc_type == 'user':
+        return Document(doc_type, instance.pk, instance.username, '')
+    raise ValueError(f'{type(instance).__name__} is not searchable.')
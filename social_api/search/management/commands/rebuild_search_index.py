@@ -0,0 +1,39 @@
+"""
+This module defines a management command that rebuilds the search index.
+"""
+from django.core.management.base import BaseCommand
+
+from search.backends import get_backend
+from search.documents import DOC_TYPES, build_document, get_models
+
+
+class Command(BaseCommand):
+    """
+    Clears the search index and re-indexes every post, comment and user in chunks.
+    """
+    help = 'Rebuild the search index from posts, comments and users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of objects indexed per batch.'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        backend = get_backend()
+        backend.clear()
+        models = get_models()
+        for doc_type in DOC_TYPES:
+            indexed = 0
+            batch = []
+            for instance in models[doc_type].objects.order_by('pk').iterator(chunk_size=chunk_size):
+                batch.append(build_document(instance))
+                if len(batch) == chunk_size:
+                    backend.index(batch)
+                    indexed += len(batch)
+                    batch = []
+            backend.index(batch)
+            indexed += len(batch)
+            self.stdout.write(f'Indexed {indexed} {doc_type} documents.')
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    # Other databases fall back to search.backends.ScanBackend, which needs no table.
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index "
+            "USING fts5(title, body, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS search_index')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
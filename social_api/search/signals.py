@@ -0,0 +1,41 @@
+"""
+This module keeps the search index up to date as searchable models change.
+
+Index writes happen inside the triggering transaction, so a rollback also
+rolls back the index change.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+
+from comments.models import Comment
+from posts.models import Post
+from .backends import get_backend
+from .documents import build_document, doc_type_for
+
+# Saves limited to other fields (e.g. `last_login`) leave the indexed text unchanged.
+INDEXED_FIELDS = {
+    Post: {'title', 'content'},
+    Comment: {'text'},
+    get_user_model(): {'username'},
+}
+
+
+def update_document(sender, instance, update_fields=None, **kwargs):
+    """
+    Index the saved instance, unless the save did not touch any indexed field.
+    """
+    if update_fields is not None and not INDEXED_FIELDS[sender] & set(update_fields):
+        return
+    get_backend().index([build_document(instance)])
+
+
+def remove_document(sender, instance, **kwargs):
+    """
+    Remove the deleted instance from the index.
+    """
+    get_backend().remove(doc_type_for(instance), instance.pk)
+
+
+for model in INDEXED_FIELDS:
+    post_save.connect(update_document, sender=model, dispatch_uid=f'search_update_{model._meta.label_lower}')
+    post_delete.connect(remove_document, sender=model, dispatch_uid=f'search_remove_{model._meta.label_lower}')
@@ -0,0 +1,120 @@
+"""
+This module contains API tests for full-text search.
+"""
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from accounts.models import User
+from comments.models import Comment
+from posts.models import Post
+from rest_framework.authtoken.models import Token
+from .backends import get_backend
+
+
+class SearchAPITest(APITestCase):
+    """
+    API test class for the search endpoint and its incrementally maintained index.
+    """
+
+    def setUp(self):
+        """
+        Set up method to create a user, some posts and a comment before each test.
+        """
+        self.user = User.objects.create_user(email='test@test.com', username='gardener', password='testpass123') # Create a test user.
+        self.token = Token.objects.create(user=self.user) # Create a token for the test user.
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key) # Authenticate the client with the token.
+        self.title_match = Post.objects.create(author=self.user, title='Tomato harvest', content='Notes from the garden') # Matches "tomato" in the title.
+        self.body_match = Post.objects.create(author=self.user, title='Weekend', content='We ate a tomato salad') # Matches "tomato" in the body.
+        self.comment = Comment.objects.create(post=self.body_match, user=self.user, text='Tomato season is the best') # Matches "tomato" in a comment.
+
+    def search(self, **params):
+        """
+        Helper method to call the search endpoint.
+        """
+        return self.client.get(reverse('search-list'), params)
+
+    def test_search_ranks_title_matches_first(self):
+        """
+        Test that posts matching in the title outrank posts matching in the body.
+        """
+        response = self.search(q='tomato', type='post')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['object']['id'] for r in response.data['results']], [self.title_match.pk, self.body_match.pk])
+
+    def test_search_across_types(self):
+        """
+        Test that a search returns posts, comments and users.
+        """
+        response = self.search(q='tomato')
+        self.assertEqual(sorted(r['type'] for r in response.data['results']), ['comment', 'post', 'post'])
+        response = self.search(q='gardener')
+        self.assertEqual([(r['type'], r['object']['id']) for r in response.data['results']], [('user', self.user.pk)])
+
+    def test_search_keyset_pagination(self):
+        """
+        Test that following the next cursor walks through every hit exactly once.
+        """
+        seen = []
+        response = self.search(q='tomato', page_size=1)
+        while True:
+            seen += [(r['type'], r['object']['id']) for r in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(seen), 3)
+        self.assertEqual(len(set(seen)), 3)
+
+    def test_user_search_query_count(self):
+        """
+        Test that serializing user hits costs a fixed number of queries, with the users' totals joined in.
+        """
+        for i in range(10):
+            User.objects.create(email=f'rose{i}@test.com', username=f'rose_{i}')
+        self.search(q='tomato') # Caches the token lookup.
+        cache.clear() # Measures a cold representation cache.
+        with self.assertNumQueries(3): # Index search, users joined with their stats, viewer's follows.
+            response = self.search(q='rose', type='user')
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_index_follows_updates_and_deletes(self):
+        """
+        Test that edits and deletions are reflected in the index through signals.
+        """
+        self.title_match.title = 'Cucumber harvest'
+        self.title_match.save()
+        self.assertEqual([r['object']['id'] for r in self.search(q='cucumber').data['results']], [self.title_match.pk])
+        self.comment.delete()
+        self.assertEqual([r['type'] for r in self.search(q='season').data['results']], [])
+
+    def test_rebuild_search_index(self):
+        """
+        Test that the rebuild command restores a cleared index.
+        """
+        get_backend().clear()
+        self.assertEqual(self.search(q='tomato').data['results'], [])
+        call_command('rebuild_search_index', chunk_size=1, stdout=StringIO())
+        self.assertEqual(len(self.search(q='tomato').data['results']), 3)
+
+    def test_search_validates_parameters(self):
+        """
+        Test that missing queries, unknown types, bad cursors and page sizes below 1 are rejected.
+        """
+        self.assertEqual(self.search().status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.search(q='tomato', type='photo').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.search(q='tomato', cursor='bm90LWEtY3Vyc29y').status_code, status.HTTP_400_BAD_REQUEST)
+        for page_size in (0, -1):
+            self.assertEqual(self.search(q='tomato', page_size=page_size).status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(SEARCH_BACKEND='search.backends.ScanBackend')
+    def test_scan_backend_fallback(self):
+        """
+        Test that the unindexed fallback backend answers the same queries.
+        """
+        response = self.search(q='tomato', page_size=2)
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
@@ -0,0 +1,105 @@
+"""
+This module defines the SearchViewSet for ranked full-text search over posts, comments and users.
+"""
+import base64
+import binascii
+
+from django.contrib.auth import get_user_model
+from rest_framework import viewsets, permissions, status
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from accounts.serializers import UserSerializer
+from comments.models import Comment
+from comments.serializers import CommentSerializer
+from posts.models import Post
+from posts.serializers import PostSerializer
+from social_api.fieldsets import get_field_selection
+from .backends import get_backend
+from .documents import DOC_TYPES
+
+class SearchViewSet(viewsets.ViewSet):
+    """
+    API endpoint for searching posts, comments and users.
+
+    **Query parameters:**
+        - q: The search terms (required).
+        - type: Optional comma-separated document types (post, comment, user).
+        - cursor: The `next` cursor returned by the previous page.
+        - page_size: Number of results per page (default 20, max 100).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    page_size = 20
+    max_page_size = 100
+
+    def list(self, request):
+        """
+        Return one page of ranked search results, best match first.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'The q parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        doc_types = [t for t in request.query_params.get('type', '').split(',') if t]
+        if any(t not in DOC_TYPES for t in doc_types):
+            return Response({'error': f'type must be one of {", ".join(DOC_TYPES)}.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page_size = min(int(request.query_params.get('page_size', self.page_size)), self.max_page_size)
+            if page_size < 1:
+                raise ValueError('page_size must be positive.')
+            after = self.decode_cursor(request.query_params.get('cursor'))
+            # Fetch one extra hit to learn whether there is a next page.
+            hits = get_backend().search(query, doc_types=doc_types, after=after, limit=page_size + 1)
+        except ValueError:
+            return Response({'error': 'Invalid cursor or page size.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        next_url = None
+        if len(hits) > page_size:
+            hits = hits[:page_size]
+            next_url = replace_query_param(
+                request.build_absolute_uri(), 'cursor', self.encode_cursor(hits[-1].cursor)
+            )
+        return Response({'next': next_url, 'results': self.serialize_hits(hits)})
+
+    def serialize_hits(self, hits):
+        """
+        Load and serialize the objects behind the hits with a fixed number of
+        queries per document type, and return them in rank order.
+        """
+        fields = get_field_selection(self.request)
+        querysets = {
+            'post': Post.objects.for_serializer(fields),
+            'comment': Comment.objects.select_related('user') if 'user' in fields else Comment.objects.all(),
+            'user': get_user_model().objects.select_related('stats'),
+        }
+        serializers = {'post': PostSerializer, 'comment': CommentSerializer, 'user': UserSerializer}
+        data = {}
+        for doc_type in DOC_TYPES:
+            ids = [hit.object_id for hit in hits if hit.doc_type == doc_type]
+            if not ids:
+                continue
+            instances = list(querysets[doc_type].in_bulk(ids).values())
+            items = serializers[doc_type](instances, many=True, context={'request': self.request}).data
+            # Keyed by instance rather than by item['id'], which a sparse fieldset may leave out.
+            data[doc_type] = {instance.pk: item for instance, item in zip(instances, items)}
+
+        results = []
+        for hit in hits:
+            item = data.get(hit.doc_type, {}).get(hit.object_id)
+            if item is None:
+                # The object was deleted after the search ran.
+                continue
+            results.append({'type': hit.doc_type, 'score': hit.score, 'object': item})
+        return results
+
+    @staticmethod
+    def encode_cursor(cursor):
+        return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(encoded):
+        if not encoded:
+            return None
+        try:
+            return base64.urlsafe_b64decode(encoded.encode()).decode()
+        except (binascii.Error, UnicodeDecodeError) as exc:
+            raise ValueError('Invalid cursor.') from exc
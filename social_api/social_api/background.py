@@ -0,0 +1,45 @@
+"""
+This module runs maintenance work that follows a write off the request path.
+
+Work that a request's writes make necessary but that its response does not
+wait for (fanning a post out to timelines, updating follow suggestions) is
+handed to `run()` once the transaction commits. A single background thread
+runs the tasks in the order they were submitted, so a follow and a quick
+unfollow are applied in that order. Pending tasks finish at interpreter exit
+but are lost if the process dies. With `BACKGROUND_TASKS` off (as under
+`manage.py test`), each task runs in the calling thread instead.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def run(fn, *args):
+    """
+    Run `fn(*args)` on the background thread, or right away with `BACKGROUND_TASKS` off.
+    """
+    if not settings.BACKGROUND_TASKS:
+        fn(*args)
+        return
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='background-tasks')
+    _executor.submit(_run_task, fn, args)
+
+
+def _run_task(fn, args):
+    try:
+        fn(*args)
+    except Exception:
+        logger.exception('Background task %s failed.', fn.__qualname__)
+    finally:
+        close_old_connections()
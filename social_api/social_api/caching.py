@@ -0,0 +1,234 @@
+"""
+This module implements a versioned read-through cache for serialized representations.
+
+Each cached representation depends on one or more version slots, e.g. a post
+depends on its own slot and on its author's slot because it embeds the
+author's username. An entry is stored under a key that includes the current
+version of each of its slots, so invalidating an object only replaces its
+version token: every entry built from the old version becomes unreachable
+and simply expires. Reading a page of entries costs two cache round trips
+(versions, then entries) regardless of the page size.
+
+Fields that depend on the requesting user are listed in a serializer's
+`uncached_fields`; they are never stored and are recomputed on every read.
+"""
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from rest_framework.response import Response
+
+from .fieldsets import get_field_selection
+
+_registry = {}
+
+
+def _version_key(namespace, pk):
+    return f'repr:version:{namespace}:{pk}'
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def _get_versions(keys):
+    """
+    Return the current version token of each version slot, creating missing ones.
+    """
+    versions = cache.get_many(keys)
+    for key in set(keys) - versions.keys():
+        # A fresh random token never matches entries built before the slot was evicted.
+        token = _new_version()
+        if not cache.add(key, token, timeout=None):
+            token = cache.get(key, token)
+        versions[key] = token
+    return versions
+
+
+def _bump(namespace, pk):
+    cache.set(_version_key(namespace, pk), _new_version(), timeout=None)
+
+
+def invalidate(namespace, pk):
+    """
+    Invalidate every cached representation that depends on the given object.
+
+    The version is bumped immediately and again when the current transaction
+    commits, so a reader that cached pre-commit data in between cannot leave a
+    stale entry behind.
+    """
+    _bump(namespace, pk)
+    transaction.on_commit(lambda: _bump(namespace, pk))
+
+
+def invalidate_many(namespace, pks):
+    """
+    Like `invalidate`, for several objects of one kind, with one cache round trip per bump.
+    """
+    def bump():
+        cache.set_many({_version_key(namespace, pk): _new_version() for pk in pks}, timeout=None)
+
+    pks = list(pks)
+    if pks:
+        bump()
+        transaction.on_commit(bump)
+
+
+def version_token(slots):
+    """
+    Return a string that changes whenever any of the given (namespace, pk) version slots is invalidated.
+    """
+    keys = [_version_key(*slot) for slot in slots]
+    versions = _get_versions(set(keys))
+    return ':'.join(versions[key] for key in keys)
+
+
+def cache_stats():
+    """
+    Return this process's hit and miss counters for every representation cache.
+    """
+    return {namespace: {'hits': rc.hits, 'misses': rc.misses} for namespace, rc in _registry.items()}
+
+
+class RepresentationCache:
+    """
+    Read-through cache of serialized representations for one kind of object.
+
+    `dependencies(instance)` returns the (namespace, pk) version slots the
+    representation depends on; by default only the instance's own slot.
+    """
+
+    def __init__(self, namespace, dependencies=None):
+        self.namespace = namespace
+        self.dependencies = dependencies or (lambda instance: [(namespace, instance.pk)])
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        _registry[namespace] = self
+
+    def lookup(self, instances):
+        """
+        Multi-get the representations of `instances`.
+
+        Returns a pair of dicts keyed by primary key: the cached representations
+        that were found, and the cache key of every instance for storing misses.
+        """
+        slots = {instance.pk: self.dependencies(instance) for instance in instances}
+        versions = _get_versions({_version_key(*slot) for deps in slots.values() for slot in deps})
+        keys = {
+            pk: ':'.join(['repr', self.namespace, str(pk)] + [versions[_version_key(*slot)] for slot in deps])
+            for pk, deps in slots.items()
+        }
+        found = cache.get_many(keys.values())
+        hits = {pk: found[key] for pk, key in keys.items() if key in found}
+        with self._lock:
+            self.hits += len(hits)
+            self.misses += len(keys) - len(hits)
+        return hits, keys
+
+    def version_token(self, instances):
+        """
+        Return a string that changes whenever any representation of `instances` is invalidated.
+        """
+        return version_token(slot for instance in instances for slot in self.dependencies(instance))
+
+    def store(self, entries):
+        """
+        Store representations given as a dict of cache key to data.
+        """
+        cache.set_many(entries, timeout=settings.REPRESENTATION_CACHE_TIMEOUT)
+
+
+class CachedRepresentationMixin:
+    """
+    Serializer mixin that reads and fills a RepresentationCache.
+
+    Lists get their cache lookups done once per page by the list serializer or
+    the view (see `CachedRepresentationViewMixin`), which leave the results in
+    the serializer context. A single object is looked up on its own.
+
+    Sparse representations (see `social_api.fieldsets`) are cut from cached
+    entries on a hit but never stored, since they lack fields.
+    """
+    representation_cache = None
+    uncached_fields = ()
+
+    def to_representation(self, instance):
+        hits = self.context.get('cached_representations', {})
+        keys = self.context.get('representation_cache_keys', {})
+        if instance.pk not in keys:
+            hits, keys = self.representation_cache.lookup([instance])
+        cached = hits.get(instance.pk)
+        if cached is None:
+            data = super().to_representation(instance)
+            if not get_field_selection(self.context.get('request')).is_sparse:
+                self.representation_cache.store({
+                    keys[instance.pk]: {name: value for name, value in data.items() if name not in self.uncached_fields}
+                })
+            return data
+
+        data = {}
+        for field in self._readable_fields:
+            if field.field_name in self.uncached_fields:
+                data[field.field_name] = field.to_representation(field.get_attribute(instance))
+            else:
+                data[field.field_name] = cached[field.field_name]
+        return data
+
+
+class CachedRepresentationViewMixin:
+    """
+    ViewSet mixin whose list and retrieve actions load full objects only for cache misses.
+
+    The page (or the single object) is first fetched with only the columns in
+    `cache_page_fields`, which must cover the pagination ordering and whatever
+    the serializer's uncached fields read. Representations found in the cache
+    are served from that light query; the view's full queryset, with its
+    joins and prefetches, is run only for the misses.
+    """
+    cache_page_fields = ('id',)
+
+    def get_page_queryset(self):
+        """
+        Return the filtered queryset restricted to `cache_page_fields`, without joins or prefetches.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return queryset.select_related(None).prefetch_related(None).only(*self.cache_page_fields)
+
+    def get_cached_instances(self, items):
+        """
+        Look up the representations of `items` and load full objects for the misses.
+
+        Returns the instances to serialize and a serializer context carrying the lookups.
+        """
+        hits, keys = self.get_serializer_class().representation_cache.lookup(items)
+        misses = [item.pk for item in items if item.pk not in hits]
+        loaded = self.filter_queryset(self.get_queryset()).in_bulk(misses) if misses else {}
+        # Skip misses that were deleted between the two queries.
+        instances = [loaded.get(item.pk, item) for item in items if item.pk in hits or item.pk in loaded]
+        context = self.get_serializer_context()
+        context.update(cached_representations=hits, representation_cache_keys=keys)
+        return instances, context
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_page_queryset()
+        page = self.paginate_queryset(queryset)
+        instances, context = self.get_cached_instances(list(queryset) if page is None else page)
+        serializer = self.get_serializer(instances, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        instance = get_object_or_404(self.get_page_queryset(), **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, instance)
+        instances, context = self.get_cached_instances([instance])
+        if not instances:
+            raise Http404
+        serializer = self.get_serializer(instances[0], context=context)
+        return Response(serializer.data)
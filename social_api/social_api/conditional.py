@@ -0,0 +1,92 @@
+"""
+This module adds ETag / Last-Modified conditional GET support to viewsets.
+
+Validators are derived from a light query that reads only the ids and
+timestamps of the objects a response would contain (one page for lists), so
+`If-None-Match` and `If-Modified-Since` are answered with 304 before any
+object is loaded in full or serialized. Any edit bumps a row's `updated_at`
+past every earlier value, and any insert or delete changes the set of ids,
+so the pair (ids, max(updated_at)) changes whenever the rows do.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet mixin answering conditional GETs on list and retrieve.
+
+    `conditional_fields` must include the primary key, `updated_at` and the
+    fields the paginator orders by. Views whose representations depend on more
+    than their own rows return that extra state from `get_validator_extras`,
+    which sees the light objects and may need further fields listed.
+    """
+    conditional_fields = ('id', 'created_at', 'updated_at')
+
+    def get_validator_extras(self, items):
+        """
+        Return extra state that the representation of `items` depends on, mixed into the ETag.
+        """
+        return ''
+
+    def get_validators(self, items):
+        """
+        Return the quoted ETag and the Last-Modified timestamp for the given objects.
+        """
+        last_modified = max((item.updated_at for item in items), default=None)
+        user = getattr(self.request, 'user', None)
+        digest = hashlib.md5('|'.join([
+            self.request.get_full_path(),
+            self.request.META.get('HTTP_ACCEPT', ''),
+            str(getattr(user, 'pk', None)),
+            ','.join(str(item.pk) for item in items),
+            last_modified.isoformat() if last_modified else '',
+            str(self.get_validator_extras(items)),
+        ]).encode(), usedforsecurity=False).hexdigest()
+        return quote_etag(digest), int(last_modified.timestamp()) if last_modified else None
+
+    def conditional_response(self, queryset, render, many=True):
+        """
+        Return 304 if the client's validators still match `queryset`, else the response from `render()`.
+
+        With `many` the validators cover the page the paginator would return;
+        otherwise they cover the first object in `queryset`.
+        """
+        items = queryset.select_related(None).prefetch_related(None).only(*self.conditional_fields)
+        if many:
+            page = self.paginate_queryset(items)
+            items = list(items) if page is None else page
+        else:
+            items = list(items[:1])
+            if not items:
+                # Let the view produce its usual 404.
+                return render()
+
+        etag, last_modified = self.get_validators(items)
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.filter_queryset(self.get_queryset()),
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        return self.conditional_response(
+            queryset,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+            many=False,
+        )
@@ -0,0 +1,79 @@
+"""
+This module implements sparse fieldsets: the `fields` and `omit` query parameters.
+
+`?fields=id,title` keeps only the listed fields and `?omit=likers` drops the
+listed ones; both take comma-separated field names and may be combined.
+Unknown names are ignored, so one selection can be applied to responses that
+mix several object types (e.g. search results).
+
+Serializers drop the unrequested fields before representation, and views
+consult the same selection to skip the joins, prefetches and batch lookups
+that only those fields need. Selections only apply to reads; writes always
+validate and return the full representation.
+"""
+from rest_framework.permissions import SAFE_METHODS
+
+
+class FieldSelection:
+    """
+    The set of fields requested by a client; supports `name in selection`.
+    """
+
+    def __init__(self, fields=None, omit=()):
+        self.fields = fields
+        self.omit = frozenset(omit)
+
+    def __contains__(self, name):
+        return (self.fields is None or name in self.fields) and name not in self.omit
+
+    @property
+    def is_sparse(self):
+        """
+        Whether some fields may have been left out of the representation.
+        """
+        return self.fields is not None or bool(self.omit)
+
+
+ALL_FIELDS = FieldSelection()
+
+
+def _parse(value):
+    return frozenset(name.strip() for name in value.split(',') if name.strip())
+
+
+def get_field_selection(request):
+    """
+    Return the FieldSelection of a request, or ALL_FIELDS outside a read request.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return ALL_FIELDS
+    selection = getattr(request, '_field_selection', None)
+    if selection is None:
+        params = request.query_params
+        fields = params.get('fields')
+        selection = FieldSelection(
+            fields=_parse(fields) if fields is not None else None,
+            omit=_parse(params.get('omit', '')),
+        )
+        request._field_selection = selection
+    return selection
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin that drops the fields excluded by the request's `fields`/`omit` parameters.
+
+    `field_selection` is available to methods such as `get_viewer_context` to
+    skip lookups for fields that will not be rendered.
+    """
+
+    @property
+    def field_selection(self):
+        return get_field_selection(self.context.get('request'))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self.field_selection
+        if not selection.is_sparse:
+            return fields
+        return {name: field for name, field in fields.items() if name in selection}
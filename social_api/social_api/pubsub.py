@@ -0,0 +1,140 @@
+"""
+This module defines the publish/subscribe layer behind the real-time stream.
+
+Publishers (the notification writer, the message endpoint) send an event to
+a user's channel from any thread; each open stream connection subscribes to
+its user's channel from the event loop serving it. The broker is chosen with
+the `PUBSUB_BROKER` setting. The default, `InProcessBroker`, needs no
+external service but only reaches connections served by the same process, so
+deployments running several ASGI processes plug in a broker backed by a
+shared transport by subclassing `Broker`.
+
+Payloads are encoded to JSON once when published, whatever the number of
+subscribers. Each subscription buffers at most `PUBSUB_SUBSCRIPTION_BUFFER`
+events; a connection too slow to keep up loses events rather than growing
+without bound, and clients recover them through the REST endpoints.
+"""
+import asyncio
+import json
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+def user_channel(user_id):
+    """
+    Return the name of the channel carrying a user's events.
+    """
+    return f'user:{user_id}'
+
+
+class Subscription:
+    """
+    A channel subscription bound to the event loop that reads it.
+    """
+    __slots__ = ('channel', 'loop', 'queue')
+
+    def __init__(self, channel, loop):
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=settings.PUBSUB_SUBSCRIPTION_BUFFER)
+
+    def deliver(self, message):
+        """
+        Buffer a message; runs on the subscription's loop. Dropped if the buffer is full.
+        """
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self):
+        """
+        Wait for the next (event, JSON data) pair.
+        """
+        return await self.queue.get()
+
+
+class Broker:
+    """
+    Base class for brokers.
+
+    `subscribe` and `unsubscribe` are called from a running event loop;
+    `publish` may be called from any thread.
+    """
+
+    def subscribe(self, channel):
+        raise NotImplementedError('.subscribe() must be overridden')
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError('.unsubscribe() must be overridden')
+
+    def publish(self, channel, event, data):
+        raise NotImplementedError('.publish() must be overridden')
+
+
+class InProcessBroker(Broker):
+    """
+    Broker delivering to the subscriptions of the current process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def subscribe(self, channel):
+        subscription = Subscription(channel, asyncio.get_running_loop())
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._channels.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._channels[subscription.channel]
+
+    def publish(self, channel, event, data):
+        with self._lock:
+            subscriptions = list(self._channels.get(channel, ()))
+        if not subscriptions:
+            return
+        message = (event, json.dumps(data, cls=DjangoJSONEncoder))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The loop closed before the subscription was dropped.
+                pass
+
+    def subscriber_count(self):
+        """
+        Return the number of open subscriptions in this process.
+        """
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._channels.values())
+
+
+@lru_cache(maxsize=None)
+def _load_broker(path):
+    return import_string(path)()
+
+
+def get_broker():
+    """
+    Return the broker configured by the `PUBSUB_BROKER` setting.
+    """
+    return _load_broker(settings.PUBSUB_BROKER)
+
+
+def publish_on_commit(user_id, event, data):
+    """
+    Publish an event to a user's channel once the current transaction commits.
+    """
+    transaction.on_commit(lambda: get_broker().publish(user_channel(user_id), event, data))
@@ -0,0 +1,36 @@
+"""
+This module defines serializer helpers shared by the API's apps.
+"""
+from django.db import models
+from rest_framework import serializers
+
+
+class ViewerContextListSerializer(serializers.ListSerializer):
+    """
+    List serializer that computes the child's viewer-relative lookups once per page.
+
+    The child serializer implements `get_viewer_context(instances)`, returning a
+    dict of batch lookups (e.g. the ids of posts the viewer liked) that is merged
+    into the shared serializer context before any item is serialized. Each item
+    then answers its viewer-relative fields from that context without a query.
+
+    If the child has a `representation_cache` and the view did not already look
+    the page up, the cached representations are multi-fetched here as well.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.context.update(self.child.get_viewer_context(items))
+        representation_cache = getattr(self.child, 'representation_cache', None)
+        if representation_cache is not None and 'representation_cache_keys' not in self.context:
+            hits, keys = representation_cache.lookup(items)
+            self.context.update(cached_representations=hits, representation_cache_keys=keys)
+        return super().to_representation(items)
+
+
+def get_viewer(serializer):
+    """
+    Return the user making the request being serialized, or None outside a request.
+    """
+    request = serializer.context.get('request')
+    return getattr(request, 'user', None)
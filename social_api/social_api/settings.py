@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -26,6 +27,9 @@ SECRET_KEY = os.getenv('DJANGO_SECRET_KEY', 'fallback-secret-key')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv('DJANGO_DEBUG', 'False') == 'True'
 
+# True while running `manage.py test`.
+TESTING = sys.argv[1:2] == ['test']
+
 
 ALLOWED_HOSTS = ["*"]
 
@@ -47,6 +51,8 @@ INSTALLED_APPS = [
     'comments',
     'user_messages',
     'notifications',
+    'feed',
+    'search',
     
 ]
 
@@ -170,8 +176,173 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'social_api.pagination.CreatedAtCursorPagination',
+    'PAGE_SIZE': 20,
+}
+
+AUTH_USER_MODEL = 'accounts.User'
+
+
+# Caching
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'social-api',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
 }
 
-AUTH_USER_MODEL = 'accounts.User'
\ No newline at end of file
+# Seconds a serialized post or user representation stays in the cache.
+REPRESENTATION_CACHE_TIMEOUT = 300
+
+
+# Background tasks (social_api.background)
+
+# Run post fan-out, follow suggestion updates, the cache invalidation of
+# renamed likers and autocomplete index reloads on a background thread; when off, they run in their
+# transaction's commit callback. Off under `manage.py test`.
+BACKGROUND_TASKS = os.getenv('BACKGROUND_TASKS', 'True') == 'True' and not TESTING
+
+
+# Follow graph index (accounts app)
+
+# Answer follow relationship lookups from the in-process graph index.
+FOLLOW_GRAPH_ENABLED = os.getenv('FOLLOW_GRAPH_ENABLED', 'False') == 'True'
+# Maximum number of adjacency lists kept per direction, least recently used first out.
+FOLLOW_GRAPH_MAX_USERS = 50000
+# Seconds before an adjacency list is reloaded, bounding staleness from other processes' writes.
+FOLLOW_GRAPH_TTL = 300
+
+# Number of "who to follow" suggestions stored and served per user.
+FOLLOW_SUGGESTIONS_SIZE = 50
+# A follow change updates the suggestions of at most this many of the
+# follower's own followers; the rest catch up on the next batch run.
+FOLLOW_SUGGESTIONS_FANOUT_LIMIT = 10000
+
+
+# User batch lookup and autocomplete (accounts app)
+
+# Maximum number of ids accepted by the user batch lookup endpoint.
+USER_BATCH_MAX_IDS = 300
+# Default and maximum number of users returned by the autocomplete action.
+USER_AUTOCOMPLETE_SIZE = 10
+# Autocomplete ranks the popular accounts' matches and at most this many other
+# prefix matches, taken in index order; prefixes with more matches (typically
+# one or two characters) only rank the less followed accounts approximately.
+USER_AUTOCOMPLETE_SCAN_LIMIT = 200
+# Number of most followed accounts held in each process's autocomplete index.
+USER_AUTOCOMPLETE_INDEX_SIZE = 10000
+# Seconds before the autocomplete index is reloaded, bounding how long a newly
+# popular account or a rename takes to reach it.
+USER_AUTOCOMPLETE_INDEX_TTL = 60
+
+
+# Token authentication cache (accounts app)
+
+# Seconds a token lookup stays in the default cache. Unless CACHES is shared
+# by every process (the locmem default is not), this bounds how long other
+# processes keep accepting a deleted token or a deactivated user.
+TOKEN_AUTH_CACHE_TTL = 300
+# Seconds a token lookup stays in each process's own LRU; with a shared
+# CACHES backend, this bounds how long other processes lag behind a revocation.
+TOKEN_AUTH_LOCAL_TTL = 5
+TOKEN_AUTH_LOCAL_MAX_ENTRIES = 10000
+
+
+# Password hashing and sign-in throttling (accounts app)
+
+# Password hashes computed at once; the rest of the pending requests wait.
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', '2'))
+# Requests allowed to run or wait for a hash before new ones get 503.
+PASSWORD_HASHING_MAX_PENDING = int(os.getenv('PASSWORD_HASHING_MAX_PENDING', '16'))
+# Seconds sent in Retry-After when the hashing pool is full.
+PASSWORD_HASHING_RETRY_AFTER = 1
+# Token buckets for login and registration attempts, per email and per client IP.
+LOGIN_THROTTLE_BUCKETS = {
+    'email': {'capacity': 5, 'refill_per_second': 5 / 60},
+    'ip': {'capacity': 30, 'refill_per_second': 1.0},
+}
+
+
+# Home timeline (feed app)
+
+# Authors with more followers than this are merged into feeds at read time
+# instead of being fanned out to every follower's timeline.
+FEED_FANOUT_THRESHOLD = int(os.getenv('FEED_FANOUT_THRESHOLD', '5000'))
+# Maximum number of entries kept in each user's materialized timeline.
+FEED_MAX_ENTRIES = 800
+# Each timeline is trimmed on average once per this many deliveries.
+FEED_TRIM_INTERVAL = 20
+# Number of recent posts copied into a timeline when following an author.
+FEED_BACKFILL_POSTS = 50
+
+
+# Full-text search (search app)
+
+# Use 'search.backends.ScanBackend' on databases without SQLite FTS5.
+SEARCH_BACKEND = 'search.backends.SQLiteFTS5Backend'
+
+
+# Trending posts (posts app)
+
+# An event loses half of its weight every this many hours.
+TRENDING_HALF_LIFE_HOURS = 6
+TRENDING_LIKE_WEIGHT = 1.0
+TRENDING_COMMENT_WEIGHT = 2.0
+# Maximum number of posts returned by /api/posts/trending/.
+TRENDING_TOP_K = 50
+# compact_trending_scores drops posts whose decayed score fell below this
+# and keeps at most TRENDING_MAX_CANDIDATES posts.
+TRENDING_MIN_SCORE = 0.01
+TRENDING_MAX_CANDIDATES = 10000
+
+
+# Notification pipeline (notifications app)
+
+# Write notifications from a background thread; when off, each event is
+# written in its transaction's commit callback. Off under `manage.py test`.
+NOTIFICATIONS_BACKGROUND_WORKER = os.getenv('NOTIFICATIONS_BACKGROUND_WORKER', 'True') == 'True' and not TESTING
+# Events waiting to be written; beyond this new events are dropped.
+NOTIFICATION_QUEUE_MAX_SIZE = 10000
+# Notifications written per bulk insert.
+NOTIFICATION_BATCH_SIZE = 500
+# Seconds the worker waits to fill a batch before writing what it has.
+NOTIFICATION_FLUSH_INTERVAL = 0.5
+# Events coalesce into an unread notification with the same recipient, verb
+# and target as long as its last event is at most this many seconds old.
+NOTIFICATION_COALESCE_WINDOW = 24 * 60 * 60
+# Number of most recent actors kept on each notification.
+NOTIFICATION_LATEST_ACTORS = 3
+# Maximum number of ids accepted by /api/notifications/mark_read/.
+NOTIFICATION_MARK_READ_MAX_IDS = 500
+
+
+# Real-time stream (social_api.pubsub and social_api.streaming)
+
+# Broker delivering events to stream connections; the in-process default
+# only reaches connections served by the publishing process.
+PUBSUB_BROKER = 'social_api.pubsub.InProcessBroker'
+# Events buffered per connection before new ones are dropped.
+PUBSUB_SUBSCRIPTION_BUFFER = 32
+# Seconds between keepalive comments on an idle server-sent event stream.
+STREAM_HEARTBEAT_INTERVAL = 20
+# Milliseconds EventSource clients wait before reconnecting.
+STREAM_RETRY_MILLISECONDS = 5000
+
+
+# Comment threads (comments app)
+
+# Deepest reply level accepted; paths of this depth still fit their column.
+COMMENT_MAX_DEPTH = 20
+# Maximum number of comments returned by a thread fetch, in depth-first order.
+COMMENT_THREAD_MAX_SIZE = 500
+# Default and maximum number of first replies embedded under each root comment.
+COMMENT_REPLIES_PREVIEW_SIZE = 5
+
+
+# Number of most recent likers embedded in each post representation.
+LIKERS_PREVIEW_SIZE = 3
\ No newline at end of file
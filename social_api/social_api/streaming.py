@@ -0,0 +1,153 @@
+"""
+This module streams a user's new notifications and messages in real time.
+
+Two transports share the `social_api.pubsub` broker:
+
+    - Server-sent events at /api/stream/, a Django async view.
+    - WebSocket at /ws/stream/, a bare ASGI application routed by `asgi.py`.
+
+Both need an ASGI server. Under WSGI (e.g. `manage.py runserver`) a stream
+would hold a worker thread for its whole lifetime, so the SSE endpoint
+refuses it with a 501 instead. Clients authenticate with their API token, either in an
+`Authorization: Token <key>` header or, since browsers' EventSource and
+WebSocket cannot set headers, in a `token` query parameter.
+
+An idle connection costs a suspended coroutine and a subscription with a
+small bounded buffer; no thread or database connection is held between
+events. Each event is sent as its type (`notification` or `message`) and
+the JSON representation of the object, as the REST endpoints return it.
+Events published while a client is disconnected are not replayed; clients
+fetch them through the REST endpoints when they reconnect.
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+
+from accounts.authentication import CachedTokenAuthentication
+from .pubsub import get_broker, user_channel
+
+WEBSOCKET_PATH = '/ws/stream/'
+
+
+def _user_id_for(key):
+    """
+    Return the id of the active user owning the token `key`, or None.
+    """
+    try:
+        user, _ = CachedTokenAuthentication().authenticate_credentials(key)
+    except AuthenticationFailed:
+        return None
+    return user.pk
+
+
+_authenticate = sync_to_async(_user_id_for)
+
+
+@sync_to_async
+def _authenticate_websocket(key):
+    """
+    Like `_authenticate`, but closing stale database connections itself, since
+    WebSocket connections run outside Django's request cycle, which otherwise does.
+    """
+    close_old_connections()
+    try:
+        return _user_id_for(key)
+    finally:
+        close_old_connections()
+
+
+def _token_key(headers, query_string):
+    """
+    Return the token key from an `Authorization: Token <key>` header or a `token` query parameter.
+    """
+    authorization = headers.get('authorization', '').split()
+    if len(authorization) == 2 and authorization[0].lower() == 'token':
+        return authorization[1]
+    return parse_qs(query_string).get('token', [None])[0]
+
+
+async def _events(user_id):
+    """
+    Yield the SSE frames for a user's events, with a comment line as heartbeat while idle.
+    """
+    broker = get_broker()
+    subscription = broker.subscribe(user_channel(user_id))
+    try:
+        yield f'retry: {settings.STREAM_RETRY_MILLISECONDS}\n\n'
+        while True:
+            try:
+                event, data = await asyncio.wait_for(subscription.get(), settings.STREAM_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing the idle connection.
+                yield ': keepalive\n\n'
+                continue
+            yield f'event: {event}\ndata: {data}\n\n'
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def event_stream(request):
+    """
+    Stream the requesting user's new notifications and messages as server-sent events.
+    e.g. GET /api/stream/?token=<key>
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'detail': 'The event stream needs an ASGI server; it cannot be served over WSGI.'}, status=501
+        )
+    key = _token_key(request.headers, request.META.get('QUERY_STRING', ''))
+    user_id = await _authenticate(key) if key else None
+    if user_id is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    response = StreamingHttpResponse(_events(user_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no' # Stops nginx from buffering the stream.
+    return response
+
+
+async def websocket_application(scope, receive, send):
+    """
+    ASGI application pushing the user's new notifications and messages over a WebSocket.
+
+    Messages from the client are ignored; each event is sent as a text frame
+    holding `{"type": <event>, "data": <object>}`.
+    """
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    if scope['path'] != WEBSOCKET_PATH:
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope.get('headers', [])}
+    key = _token_key(headers, scope.get('query_string', b'').decode('latin-1'))
+    user_id = await _authenticate_websocket(key) if key else None
+    if user_id is None:
+        await send({'type': 'websocket.close', 'code': 4401})
+        return
+    await send({'type': 'websocket.accept'})
+
+    broker = get_broker()
+    subscription = broker.subscribe(user_channel(user_id))
+    receiving = asyncio.ensure_future(receive())
+    getting = asyncio.ensure_future(subscription.get())
+    try:
+        while True:
+            await asyncio.wait({receiving, getting}, return_when=asyncio.FIRST_COMPLETED)
+            if receiving.done():
+                if receiving.result()['type'] == 'websocket.disconnect':
+                    break
+                receiving = asyncio.ensure_future(receive())
+            if getting.done():
+                event, data = getting.result()
+                await send({'type': 'websocket.send', 'text': f'{{"type": {json.dumps(event)}, "data": {data}}}'})
+                getting = asyncio.ensure_future(subscription.get())
+    finally:
+        receiving.cancel()
+        getting.cancel()
+        broker.unsubscribe(subscription)
@@ -12,6 +12,9 @@ from posts.views import PostViewSet
 from comments.views import CommentViewSet
 from user_messages.views import MessageViewSet
 from notifications.views import NotificationViewSet
+from feed.views import FeedViewSet
+from search.views import SearchViewSet
+from social_api.streaming import event_stream
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
@@ -39,10 +42,13 @@ router.register(r'posts', PostViewSet, basename='post') # Registers the PostView
 router.register(r'comments', CommentViewSet, basename='comment') # Registers the CommentViewSet at the /api/comments/ endpoint.
 router.register(r'messages', MessageViewSet, basename='message') # Registers the MessageViewSet at the /api/messages/ endpoint.
 router.register(r'notifications', NotificationViewSet, basename='notification') # Registers the NotificationViewSet at the /api/notifications/ endpoint.
+router.register(r'feed', FeedViewSet, basename='feed') # Registers the FeedViewSet at the /api/feed/ endpoint.
+router.register(r'search', SearchViewSet, basename='search') # Registers the SearchViewSet at the /api/search/ endpoint.
 
 # Define URL patterns for the project.
 urlpatterns = [
     path('admin/', admin.site.urls), # Includes the Django admin URLs.
+    path('api/stream/', event_stream, name='event-stream'), # Server-sent events with the user's new notifications and messages.
     path('api/', include(router.urls)), # Includes the API URLs generated by the router.
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'), # URL for the Swagger UI.
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'), # URL for the Redoc UI.
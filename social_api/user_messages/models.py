@@ -11,4 +11,10 @@ class UserMessage(models.Model):
     sender = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='sent_messages', on_delete=models.CASCADE) # The user who sent the message. If the sender is deleted, the message is also deleted. The related_name allows easy access to messages sent by a user (e.g., user.sent_messages.all()).
     recipient = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='received_messages', on_delete=models.CASCADE) # The user who received the message. If the recipient is deleted, the message is also deleted. The related_name allows easy access to messages received by a user (e.g., user.received_messages.all()).
     content = models.TextField() # The text content of the message.
-    created_at = models.DateTimeField(auto_now_add=True) # The timestamp when the message was created. Automatically set on creation.
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True) # The timestamp when the message was created. Automatically set on creation.
+
+    class Meta:
+        ordering = ['-created_at', '-id'] # Newest first, with the id as a tie-breaker for a stable cursor.
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='message_created_id_idx'), # Supports the cursor over messages.
+        ]
\ No newline at end of file
@@ -2,9 +2,10 @@
 This module defines the MessageSerializer for serializing and deserializing UserMessage objects.
 """
 from rest_framework import serializers
+from social_api.fieldsets import SparseFieldsetMixin
 from .models import UserMessage
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for the UserMessage model.
     """
@@ -1,12 +1,16 @@
 """
 This module contains API tests for the UserMessage model.
 """
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.test import TestCase
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
 from accounts.models import User
 from rest_framework.authtoken.models import Token
+from social_api.pubsub import get_broker, user_channel
 from .models import UserMessage
 
 class MessageAPITest(APITestCase):
@@ -31,4 +35,24 @@ class MessageAPITest(APITestCase):
         data = {'recipient': self.user2.id, 'content': 'Hello'} # Creates the data for the POST request (recipient ID and message content).
         response = self.client.post(url, data) # Sends a POST request to the message list endpoint with the data.
         self.assertEqual(response.status_code, status.HTTP_201_CREATED) # Asserts that the response status code is 201 Created (successful creation).
-        self.assertTrue(UserMessage.objects.filter(sender=self.user, recipient=self.user2).exists()) # Asserts that a UserMessage object exists in the database with the correct sender and recipient.
\ No newline at end of file
+        self.assertTrue(UserMessage.objects.filter(sender=self.user, recipient=self.user2).exists()) # Asserts that a UserMessage object exists in the database with the correct sender and recipient.
+
+    def send_message(self, content):
+        """
+        Send a message to the second user through the API, running the commit callbacks.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('message-list'), {'recipient': self.user2.id, 'content': content})
+
+    async def test_sent_message_is_pushed_to_recipient(self):
+        """
+        Test that a sent message is published to the recipient's real-time stream once committed.
+        """
+        subscription = get_broker().subscribe(user_channel(self.user2.pk)) # Stands in for the recipient's open stream.
+        try:
+            await sync_to_async(self.send_message)('Hello')
+            events = dict([await asyncio.wait_for(subscription.get(), 1) for _ in range(2)]) # The message and its notification.
+        finally:
+            get_broker().unsubscribe(subscription)
+        self.assertEqual(set(events), {'message', 'notification'})
+        self.assertIn('"content": "Hello"', events['message']) # The message as the REST endpoint returns it.
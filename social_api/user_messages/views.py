@@ -2,6 +2,9 @@
 This module defines the MessageViewSet for managing user messages using Django REST framework.
 """
 from rest_framework import viewsets, permissions
+from notifications import events
+from social_api.pubsub import publish_on_commit
+from social_api.fieldsets import get_field_selection
 from .models import UserMessage
 from .serializers import MessageSerializer
 from .permissions import IsSenderOrRecipient
@@ -15,6 +18,14 @@ class MessageViewSet(viewsets.ModelViewSet):
     serializer_class = MessageSerializer  # Serializer class used for serializing and deserializing UserMessage objects.
     permission_classes = [permissions.IsAuthenticated, IsSenderOrRecipient]  # Permissions required for accessing messages.
 
+    def get_queryset(self):
+        """
+        Join the senders when their usernames are part of the requested fields.
+        """
+        if 'sender' in get_field_selection(self.request):
+            return self.queryset.select_related('sender')  # Avoids one query per message for the sender's username.
+        return self.queryset.all()
+
     def perform_create(self, serializer):
         """
         Overrides the default perform_create method to set the sender of the message to the currently authenticated user.
@@ -22,4 +33,6 @@ class MessageViewSet(viewsets.ModelViewSet):
         Args:
             serializer: The serializer instance containing the message data.
         """
-        serializer.save(sender=self.request.user)  # Saves the message, setting the sender to the authenticated user.
\ No newline at end of file
+        message = serializer.save(sender=self.request.user)  # Saves the message, setting the sender to the authenticated user.
+        events.emit('message', recipient_id=message.recipient_id, actor_id=message.sender_id, target_id=message.pk)  # Notifies the recipient once the message is committed.
+        publish_on_commit(message.recipient_id, 'message', serializer.data)  # Pushes the message to the recipient's open streams.
\ No newline at end of file